@@ -0,0 +1,257 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from scipy.optimize import minimize
+
+from .item_bank import P_EPSILON, ItemBank
+from .item_cache import ItemBankCache
+from .models import AnswerLog, QuestionBank
+
+
+# Bounds keep the M-step inside a plausible 3PL region
+A_BOUNDS = (0.2, 4.0)
+B_BOUNDS = (-4.0, 4.0)
+C_BOUNDS = (0.0, 0.5)
+
+# Weak item priors: log a ~ N(0, 0.5^2), b ~ N(0, 2^2), c ~ Beta(5, 17)
+LOG_A_SD = 0.5
+B_SD = 2.0
+C_ALPHA, C_BETA = 5.0, 17.0
+
+
+class MMLCalibrator:
+    """
+    Batch 3PL item calibration by marginal maximum likelihood (Bock-Aitkin EM).
+
+    Each EM iteration streams AnswerLog ordered by session in chunks that
+    end on session boundaries. The E-step turns each chunk into posterior
+    weights over a quadrature grid and accumulates expected counts per
+    item and node; the M-step refits every item at once from those counts
+    with L-BFGS-B. Memory is bounded by the chunk size and the
+    items x nodes count tables, not by the number of responses.
+    """
+
+    def __init__(self, points=41, bounds=(-4.0, 4.0), chunk_size=50000,
+                 max_iter=20, tol=1e-3, min_responses=50, change_tolerance=1e-3):
+        self.grid = np.linspace(bounds[0], bounds[1], points)
+        log_prior = -0.5 * self.grid ** 2
+        self.log_prior = log_prior - np.log(np.exp(log_prior).sum())
+        self.chunk_size = chunk_size
+        self.max_iter = max_iter
+        self.tol = tol
+        self.min_responses = min_responses
+        self.change_tolerance = change_tolerance
+
+    @classmethod
+    def from_settings(cls, **overrides):
+        options = dict(getattr(settings, 'IRT_CALIBRATION', {}))
+        options.update(overrides)
+        return cls(**options)
+
+    # ---------- DATA ----------
+    def _response_chunks(self, responses, item_ids):
+        """
+        Yield (session_starts, item_positions, correct) arrays for chunks of
+        about chunk_size responses, never splitting a session.
+        """
+        rows = responses.order_by('session_id', 'id').values_list(
+            'session_id', 'question_id', 'is_correct'
+        ).iterator(chunk_size=self.chunk_size)
+
+        buffer = []
+        for row in rows:
+            if len(buffer) >= self.chunk_size and row[0] != buffer[-1][0]:
+                yield self._to_arrays(buffer, item_ids)
+                buffer = []
+            buffer.append(row)
+
+        if buffer:
+            yield self._to_arrays(buffer, item_ids)
+
+    @staticmethod
+    def _to_arrays(rows, item_ids):
+        data = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        sessions = data[:, 0]
+        starts = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]])
+        positions = np.searchsorted(item_ids, data[:, 1])
+        return starts, positions, data[:, 2].astype(bool)
+
+    # ---------- E-STEP ----------
+    def _expected_counts(self, bank, responses):
+        n_items, n_nodes = len(bank), len(self.grid)
+        expected_n = np.zeros((n_items, n_nodes))
+        expected_r = np.zeros((n_items, n_nodes))
+        log_likelihood = 0.0
+
+        p_grid = np.clip(bank.probability(self.grid), P_EPSILON, 1 - P_EPSILON)
+        log_p, log_q = np.log(p_grid), np.log(1 - p_grid)
+
+        for starts, positions, correct in self._response_chunks(responses, bank.ids):
+            # (nodes, responses) log-likelihood, summed per session
+            response_ll = np.where(correct, log_p[:, positions], log_q[:, positions])
+            session_ll = np.add.reduceat(response_ll, starts, axis=1) + self.log_prior[:, None]
+
+            peak = session_ll.max(axis=0)
+            posterior = np.exp(session_ll - peak)
+            total = posterior.sum(axis=0)
+            posterior /= total
+            log_likelihood += (peak + np.log(total)).sum()
+
+            counts = np.diff(np.r_[starts, len(positions)])
+            response_posterior = np.repeat(posterior, counts, axis=1)
+
+            for k in range(n_nodes):
+                weights = response_posterior[k]
+                expected_n[:, k] += np.bincount(positions, weights=weights, minlength=n_items)
+                expected_r[:, k] += np.bincount(
+                    positions, weights=weights * correct, minlength=n_items
+                )
+
+        return expected_n, expected_r, log_likelihood
+
+    # ---------- M-STEP ----------
+    def _maximize(self, a, b, c, expected_n, expected_r):
+        """Refit (a, b, c) for all items jointly; the objective is separable."""
+        n = len(a)
+        theta = self.grid[None, :]
+
+        def objective(x):
+            a_, b_, c_ = x[:n, None], x[n:2 * n, None], x[2 * n:, None]
+            sigma = 1 / (1 + np.exp(-a_ * (theta - b_)))
+            p = np.clip(c_ + (1 - c_) * sigma, P_EPSILON, 1 - P_EPSILON)
+
+            ll = (expected_r * np.log(p) + (expected_n - expected_r) * np.log(1 - p)).sum()
+            dll_dp = (expected_r - expected_n * p) / (p * (1 - p))
+            slope = (1 - c_) * sigma * (1 - sigma)
+
+            grad_a = (dll_dp * slope * (theta - b_)).sum(axis=1)
+            grad_b = -(dll_dp * slope * a_).sum(axis=1)
+            grad_c = (dll_dp * (1 - sigma)).sum(axis=1)
+
+            a_, b_, c_ = a_[:, 0], b_[:, 0], c_[:, 0]
+            log_a = np.log(a_)
+            ll += (
+                -(log_a ** 2) / (2 * LOG_A_SD ** 2) - log_a
+                - b_ ** 2 / (2 * B_SD ** 2)
+                + (C_ALPHA - 1) * np.log(np.maximum(c_, P_EPSILON))
+                + (C_BETA - 1) * np.log(1 - c_)
+            ).sum()
+            grad_a += -log_a / (LOG_A_SD ** 2 * a_) - 1 / a_
+            grad_b += -b_ / B_SD ** 2
+            grad_c += (C_ALPHA - 1) / np.maximum(c_, P_EPSILON) - (C_BETA - 1) / (1 - c_)
+
+            return -ll, -np.concatenate([grad_a, grad_b, grad_c])
+
+        result = minimize(
+            objective,
+            np.concatenate([a, b, c]),
+            jac=True,
+            method='L-BFGS-B',
+            bounds=[A_BOUNDS] * n + [B_BOUNDS] * n + [C_BOUNDS] * n,
+        )
+        x = result.x
+        return x[:n], x[n:2 * n], x[2 * n:]
+
+    # ---------- DRIVER ----------
+    def fit(self, bank, responses):
+        """
+        Run EM from the bank's current parameters. Items with fewer than
+        min_responses responses keep their parameters. Returns the fitted
+        bank and a summary dict.
+        """
+        a, b, c = bank.a.copy(), bank.b.copy(), bank.c.copy()
+        log_likelihood = None
+        iterations = 0
+        fitted = None
+
+        for iterations in range(1, self.max_iter + 1):
+            current = ItemBank(bank.ids, a, b, c)
+            expected_n, expected_r, log_likelihood = self._expected_counts(current, responses)
+
+            if fitted is None:
+                fitted = expected_n.sum(axis=1) >= self.min_responses
+                if not fitted.any():
+                    break
+                # Only the items being fitted are moved inside the prior's support
+                c[fitted] = np.clip(c[fitted], *C_BOUNDS)
+
+            new_a, new_b, new_c = self._maximize(
+                a[fitted], b[fitted], c[fitted],
+                expected_n[fitted], expected_r[fitted]
+            )
+            change = max(
+                np.abs(new_a - a[fitted]).max(),
+                np.abs(new_b - b[fitted]).max(),
+                np.abs(new_c - c[fitted]).max(),
+            )
+            a[fitted], b[fitted], c[fitted] = new_a, new_b, new_c
+
+            if change < self.tol:
+                break
+
+        return ItemBank(bank.ids, a, b, c), {
+            'items': len(bank),
+            'calibrated_items': int(fitted.sum()) if fitted is not None else 0,
+            'iterations': iterations,
+            'log_likelihood': float(log_likelihood) if log_likelihood is not None else None,
+        }
+
+    def run(self, skill_ids=None, dry_run=False):
+        """Calibrate QuestionBank items (optionally limited to skills) in place."""
+        questions = QuestionBank.objects.order_by('id')
+        responses = AnswerLog.objects.all()
+        if skill_ids:
+            questions = questions.filter(skill_id__in=skill_ids)
+            responses = responses.filter(question__skill_id__in=skill_ids)
+
+        bank = ItemBank.from_queryset(questions)
+        if not len(bank):
+            return {'items': 0, 'calibrated_items': 0, 'iterations': 0, 'updated': 0}
+
+        fitted, summary = self.fit(bank, responses)
+
+        changed = (
+            (np.abs(fitted.a - bank.a) > self.change_tolerance)
+            | (np.abs(fitted.b - bank.b) > self.change_tolerance)
+            | (np.abs(fitted.c - bank.c) > self.change_tolerance)
+        )
+        summary['updated'] = int(changed.sum())
+
+        if not dry_run and changed.any():
+            self.write_back(fitted.take(changed))
+
+        return summary
+
+    @staticmethod
+    def write_back(bank, batch_size=500):
+        """Bulk-update the given items' parameters and invalidate their skills."""
+        now = timezone.now()
+        updates = [
+            QuestionBank(
+                id=int(item_id),
+                discrimination_a=float(a),
+                difficulty_b=float(b),
+                guessing_c=float(c),
+                updated_at=now,
+            )
+            for item_id, a, b, c in zip(bank.ids, bank.a, bank.b, bank.c)
+        ]
+
+        with transaction.atomic():
+            QuestionBank.objects.bulk_update(
+                updates,
+                ['discrimination_a', 'difficulty_b', 'guessing_c', 'updated_at'],
+                batch_size=batch_size,
+            )
+            skill_ids = set(
+                QuestionBank.objects.filter(id__in=bank.ids.tolist())
+                .values_list('skill_id', flat=True)
+                .distinct()
+            )
+
+            # bulk_update skips post_save, so invalidate cached banks here
+            for skill_id in skill_ids:
+                transaction.on_commit(
+                    lambda skill_id=skill_id: ItemBankCache.invalidate(skill_id)
+                )
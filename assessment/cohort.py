@@ -0,0 +1,146 @@
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from .models import SkillGap
+
+
+class CohortGapMatrix:
+    """
+    Dense users x skills gap and priority matrices for one occupation.
+
+    Built from three queries (requirements, cohort users, proficiencies)
+    and one vectorized step, instead of calling calculate_skill_gaps once
+    per user.
+    """
+
+    def __init__(self, occupation, user_ids, requirements, theta):
+        self.occupation = occupation
+        self.user_ids = user_ids
+        self.skills = requirements['skills']
+        self.skill_ids = requirements['skill_ids']
+        self.required_theta = requirements['required_theta']
+        self.criticality = requirements['criticality']
+        self.theta = theta
+
+        self.gap = self.required_theta[np.newaxis, :] - theta
+        self.priority = self.gap * self.criticality[np.newaxis, :]
+
+    @classmethod
+    def build(cls, occupation, users=None):
+        """
+        users defaults to everyone targeting the occupation, by
+        User.target_role or by a study plan for it.
+        """
+        from users.models import UserProficiency
+        from .services import UNASSESSED_THETA, AssessmentService
+
+        if users is None:
+            users = get_user_model().objects.filter(
+                Q(target_role__iexact=occupation.preferred_label)
+                | Q(study_plans__target_occupation=occupation)
+            ).distinct()
+
+        requirements = AssessmentService.occupation_requirements(occupation)
+        user_ids = np.array(
+            list(users.order_by('id').values_list('id', flat=True)), dtype=np.int64
+        )
+
+        theta = np.full((len(user_ids), len(requirements['skill_ids'])), UNASSESSED_THETA)
+
+        if len(user_ids) and len(requirements['skill_ids']):
+            rows = np.array(
+                list(UserProficiency.objects.filter(
+                    user_id__in=users.values('id'),
+                    skill_id__in=requirements['skill_ids'].tolist()
+                ).values_list('user_id', 'skill_id', 'theta')),
+                dtype=np.float64
+            ).reshape(-1, 3)
+
+            # skill_ids and user_ids are sorted, so positions are a searchsorted away
+            user_pos = np.searchsorted(user_ids, rows[:, 0].astype(np.int64))
+            skill_pos = np.searchsorted(requirements['skill_ids'], rows[:, 1].astype(np.int64))
+            theta[user_pos, skill_pos] = rows[:, 2]
+
+        return cls(occupation, user_ids, requirements, theta)
+
+    @property
+    def has_gap(self):
+        return self.gap > 0
+
+    def ranked_gaps(self, limit=None):
+        """{user_id: [gap dicts by descending priority]} for positive gaps only."""
+        masked = np.where(self.has_gap, self.priority, -np.inf)
+        order = np.argsort(-masked, axis=1, kind='stable')
+        counts = self.has_gap.sum(axis=1)
+
+        ranked = {}
+        for row, user_id in enumerate(self.user_ids.tolist()):
+            top = order[row, :counts[row]][:limit]
+            ranked[user_id] = [
+                {
+                    'skill_id': int(self.skill_ids[j]),
+                    'skill': self.skills[j].preferred_label,
+                    'current_level': float(self.theta[row, j]),
+                    'required_level': float(self.required_theta[j]),
+                    'gap_score': float(self.gap[row, j]),
+                    'criticality_coefficient': float(self.criticality[j]),
+                    'priority_score': float(self.priority[row, j]),
+                }
+                for j in top.tolist()
+            ]
+        return ranked
+
+    def cohort_statistics(self):
+        """Per-skill cohort aggregates, highest total priority first."""
+        if not len(self.user_ids):
+            return []
+
+        positive_gap = np.where(self.has_gap, self.gap, 0.0)
+        positive_priority = np.where(self.has_gap, self.priority, 0.0)
+        total_priority = positive_priority.sum(axis=0)
+        p50, p90 = np.percentile(positive_gap, [50, 90], axis=0)
+
+        return [
+            {
+                'skill_id': int(self.skill_ids[j]),
+                'skill': self.skills[j].preferred_label,
+                'users_with_gap': int(self.has_gap[:, j].sum()),
+                'share_with_gap': float(self.has_gap[:, j].mean()),
+                'mean_gap': float(positive_gap[:, j].mean()),
+                'median_gap': float(p50[j]),
+                'p90_gap': float(p90[j]),
+                'mean_priority': float(positive_priority[:, j].mean()),
+                'total_priority': float(total_priority[j]),
+            }
+            for j in np.argsort(-total_priority, kind='stable').tolist()
+        ]
+
+    def persist(self, batch_size=1000):
+        """Upsert SkillGap rows for every positive gap in the cohort."""
+        users, skills = np.nonzero(self.has_gap)
+        gaps = [
+            SkillGap(
+                user_id=int(self.user_ids[i]),
+                occupation=self.occupation,
+                skill_id=int(self.skill_ids[j]),
+                current_level=float(self.theta[i, j]),
+                required_level=float(self.required_theta[j]),
+                gap_score=float(self.gap[i, j]),
+                criticality_coefficient=float(self.criticality[j]),
+                priority_score=float(self.priority[i, j])
+            )
+            for i, j in zip(users.tolist(), skills.tolist())
+        ]
+
+        SkillGap.objects.bulk_create(
+            gaps,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['user', 'occupation', 'skill'],
+            update_fields=[
+                'current_level', 'required_level', 'gap_score',
+                'criticality_coefficient', 'priority_score', 'updated_at'
+            ]
+        )
+        return len(gaps)
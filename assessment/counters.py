@@ -0,0 +1,148 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .models import QuestionBank
+
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionUsageBuffer:
+    """
+    Per-process accumulator for QuestionBank.times_used / times_correct.
+
+    Increments are summed in memory and written with one F() UPDATE per
+    distinct (used, correct) increment pair. A daemon thread flushes every
+    flush_interval seconds, whether or not answers keep arriving, so hot
+    items cost one statement per interval instead of one per answer. A
+    flush that fails puts its counts back for the next one.
+
+    Counts buffered when a process dies without running its exit hooks
+    (SIGKILL, OOM kill) are lost, up to one interval's worth; that is
+    why 'atomic' is the default IRT_USAGE_COUNTER_MODE.
+    """
+
+    def __init__(self, flush_interval=5.0):
+        self.flush_interval = flush_interval
+        self._pending = defaultdict(lambda: [0, 0])
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._thread = None
+        self._pid = None
+
+    def add(self, question_id, is_correct):
+        with self._lock:
+            counts = self._pending[question_id]
+            counts[0] += 1
+            counts[1] += int(is_correct)
+        self._ensure_timer()
+
+    # ---------- FLUSHING ----------
+    def _ensure_timer(self):
+        # Threads do not survive fork, so each process starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='question-usage-flush', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.maybe_flush()
+            close_old_connections()
+
+    def maybe_flush(self):
+        """flush() if the interval has passed; a failure is logged, not raised."""
+        if time.monotonic() - self._last_flush < self.flush_interval:
+            return 0
+        try:
+            return self.flush()
+        except Exception:
+            logger.exception("Could not flush question usage counters; retrying next interval")
+            return 0
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: [0, 0])
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        try:
+            self._write(pending)
+        except Exception:
+            self._restore(pending)
+            raise
+
+        return len(pending)
+
+    @staticmethod
+    def _write(pending):
+        groups = defaultdict(list)
+        for question_id, (used, correct) in pending.items():
+            groups[(used, correct)].append(question_id)
+
+        with transaction.atomic():
+            for (used, correct), question_ids in groups.items():
+                QuestionBank.objects.filter(pk__in=question_ids).update(
+                    times_used=F('times_used') + used,
+                    times_correct=F('times_correct') + correct,
+                )
+
+    def _restore(self, pending):
+        with self._lock:
+            for question_id, (used, correct) in pending.items():
+                counts = self._pending[question_id]
+                counts[0] += used
+                counts[1] += correct
+
+    def pending(self):
+        """{question_id: (used, correct)} not yet written."""
+        with self._lock:
+            return {question_id: tuple(counts) for question_id, counts in self._pending.items()}
+
+    def _after_fork(self):
+        # The parent still holds, and will flush, what it had buffered
+        self._lock = threading.Lock()
+        self._pending = defaultdict(lambda: [0, 0])
+        self._thread = None
+        self._pid = None
+
+
+usage_buffer = QuestionUsageBuffer(
+    flush_interval=getattr(settings, 'IRT_USAGE_FLUSH_INTERVAL', 5.0)
+)
+atexit.register(usage_buffer.flush)
+os.register_at_fork(after_in_child=usage_buffer._after_fork)
+
+
+def record_question_usage(question_id, is_correct):
+    """
+    Count one administration of a question.
+
+    IRT_USAGE_COUNTER_MODE 'atomic' issues a single F() UPDATE; 'buffered'
+    adds to the per-process buffer once the surrounding transaction
+    commits, and the buffer's timer writes it out.
+    """
+    if getattr(settings, 'IRT_USAGE_COUNTER_MODE', 'atomic') == 'buffered':
+        transaction.on_commit(lambda: usage_buffer.add(question_id, is_correct))
+        return
+
+    QuestionBank.objects.filter(pk=question_id).update(
+        times_used=F('times_used') + 1,
+        times_correct=F('times_correct') + int(is_correct),
+    )
@@ -0,0 +1,268 @@
+import numpy as np
+from django.conf import settings
+from scipy.optimize import minimize_scalar
+
+
+DEFAULT_BOUNDS = (-4.0, 4.0)
+
+
+def grid_peak(grid, values):
+    """
+    Refine the maximum of values sampled on an evenly spaced grid by
+    parabolic interpolation. Returns (theta, curvature information) or
+    None when the maximum sits on the grid edge or is not concave.
+    """
+    i = int(np.argmax(values))
+    if i == 0 or i == len(grid) - 1:
+        return None
+
+    h = grid[1] - grid[0]
+    y0, y1, y2 = values[i - 1:i + 2]
+    second_difference = y0 - 2 * y1 + y2
+    if second_difference >= 0:
+        return None
+
+    theta = grid[i] + h * (y0 - y2) / (2 * second_difference)
+    return theta, -second_difference / h ** 2
+
+
+class ThetaEstimator:
+    """Base class for pluggable theta estimators."""
+
+    name = None
+
+    def __init__(self, bounds=DEFAULT_BOUNDS, points=81):
+        self.bounds = tuple(float(x) for x in bounds)
+        self.grid = np.linspace(self.bounds[0], self.bounds[1], int(points))
+        self.fallback = None
+
+    def estimate(self, bank, responses, initial_theta=0.0):
+        raise NotImplementedError
+
+    def estimate_session(self, likelihood, initial_theta=0.0):
+        """
+        Estimate from a SessionLikelihood, warm-started from initial_theta
+        (the session's current theta). The default runs estimate() on the
+        session's answered items; grid estimators override this to use
+        the running grid log-likelihood.
+        """
+        return self.estimate(likelihood.bank(), likelihood.responses(), initial_theta)
+
+    def estimate_from_grid(self, log_likelihood):
+        """
+        Estimate from a log-likelihood already evaluated on self.grid.
+
+        The default is the grid MLE; patterns without an interior maximum
+        go to the fallback estimator.
+        """
+        peak = grid_peak(self.grid, np.asarray(log_likelihood))
+        if peak is None:
+            return self.fallback.estimate_from_grid(log_likelihood)
+
+        theta, info = peak
+        return self._result(theta, 1 / np.sqrt(info), True)
+
+    @staticmethod
+    def _result(theta, se, converged):
+        return {"theta": float(theta), "se": float(se), "converged": bool(converged)}
+
+    @staticmethod
+    def _information_se(bank, theta, extra_information=0.0):
+        total_info = bank.test_information(theta) + extra_information
+        return 1 / np.sqrt(total_info) if total_info > 0 else 1.0
+
+
+# ---------- SCIPY BOUNDED MLE (LEGACY) ----------
+class BoundedMLEEstimator(ThetaEstimator):
+    """MLE via scipy's bounded scalar minimiser; kept as the reference path."""
+
+    name = 'bounded'
+
+    def __init__(self, bounds=DEFAULT_BOUNDS, points=81, fallback=None):
+        super().__init__(bounds, points)
+        self.fallback = fallback or EAPEstimator(bounds, points)
+
+    def estimate(self, bank, responses, initial_theta=0.0):
+        result = minimize_scalar(
+            lambda t: -bank.log_likelihood(t, responses),
+            bounds=self.bounds,
+            method="bounded"
+        )
+        theta_hat = result.x
+        return self._result(theta_hat, self._information_se(bank, theta_hat), result.success)
+
+
+# ---------- EAP ----------
+class EAPEstimator(ThetaEstimator):
+    """
+    Expected a posteriori estimate on a fixed quadrature grid.
+
+    The normal prior keeps the estimate finite for all-correct and
+    all-wrong patterns; the SE is the posterior standard deviation.
+    """
+
+    name = 'eap'
+
+    def __init__(self, bounds=DEFAULT_BOUNDS, points=81, prior_mean=0.0, prior_sd=1.0):
+        super().__init__(bounds, points)
+        self.prior_mean = float(prior_mean)
+        self.prior_sd = float(prior_sd)
+        self.log_prior = -0.5 * ((self.grid - self.prior_mean) / self.prior_sd) ** 2
+
+    def _posterior(self, log_likelihood):
+        log_posterior = log_likelihood + self.log_prior
+        weights = np.exp(log_posterior - log_posterior.max())
+        return weights / weights.sum()
+
+    def estimate(self, bank, responses, initial_theta=0.0):
+        return self.estimate_from_grid(bank.log_likelihood(self.grid, responses))
+
+    def estimate_session(self, likelihood, initial_theta=0.0):
+        return self.estimate_from_grid(likelihood.log_likelihood)
+
+    def estimate_from_grid(self, log_likelihood):
+        weights = self._posterior(np.asarray(log_likelihood))
+        theta_hat = (weights * self.grid).sum()
+        se = np.sqrt((weights * (self.grid - theta_hat) ** 2).sum())
+        return self._result(theta_hat, se, True)
+
+
+# ---------- MAP ----------
+class MAPEstimator(EAPEstimator):
+    """Posterior mode: grid search followed by Newton steps on the posterior."""
+
+    name = 'map'
+
+    def __init__(self, *args, max_iter=10, tol=1e-6, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_iter = max_iter
+        self.tol = tol
+
+    def estimate(self, bank, responses, initial_theta=0.0):
+        return self._refine(bank, responses, bank.log_likelihood(self.grid, responses))
+
+    def estimate_session(self, likelihood, initial_theta=0.0):
+        return self._refine(likelihood.bank(), likelihood.responses(), likelihood.log_likelihood)
+
+    def _refine(self, bank, responses, log_likelihood):
+        """Newton steps on the log-posterior from its grid maximum."""
+        log_posterior = np.asarray(log_likelihood) + self.log_prior
+        theta = self.grid[int(np.argmax(log_posterior))]
+        prior_precision = 1 / self.prior_sd ** 2
+        converged = False
+
+        for _ in range(self.max_iter):
+            gradient = bank.gradient(theta, responses) - (theta - self.prior_mean) * prior_precision
+            hessian = bank.hessian(theta, responses) - prior_precision
+            if hessian >= 0:
+                break
+
+            theta_new = np.clip(theta - gradient / hessian, *self.bounds)
+            if abs(theta_new - theta) < self.tol:
+                theta = theta_new
+                converged = True
+                break
+            theta = theta_new
+
+        se = self._information_se(bank, theta, extra_information=prior_precision)
+        return self._result(theta, se, converged)
+
+    def estimate_from_grid(self, log_likelihood):
+        peak = grid_peak(self.grid, np.asarray(log_likelihood) + self.log_prior)
+        if peak is None:
+            return super().estimate_from_grid(log_likelihood)
+
+        theta, info = peak
+        return self._result(theta, 1 / np.sqrt(info), True)
+
+
+# ---------- NEWTON-RAPHSON MLE ----------
+class NewtonRaphsonEstimator(ThetaEstimator):
+    """
+    MLE via Newton-Raphson with analytic 3PL derivatives.
+
+    Falls back to Fisher scoring where the 3PL log-likelihood is not
+    concave, and to the EAP estimator when no finite MLE exists
+    (all-correct / all-wrong patterns) or the iteration leaves the bounds.
+    """
+
+    name = 'newton'
+
+    def __init__(self, bounds=DEFAULT_BOUNDS, points=81, fallback=None,
+                 max_iter=25, tol=1e-6, max_step=1.0):
+        super().__init__(bounds, points)
+        self.fallback = fallback or EAPEstimator(bounds, points)
+        self.max_iter = max_iter
+        self.tol = tol
+        self.max_step = max_step
+
+    def estimate(self, bank, responses, initial_theta=0.0):
+        u = np.asarray(responses, dtype=bool)
+        if u.all() or not u.any():
+            return self.fallback.estimate(bank, u, initial_theta)
+
+        low, high = self.bounds
+        theta = float(np.clip(initial_theta, low, high))
+        converged = False
+
+        for _ in range(self.max_iter):
+            gradient = bank.gradient(theta, u)
+            hessian = bank.hessian(theta, u)
+
+            if hessian < 0:
+                step = -gradient / hessian
+            else:
+                info = bank.test_information(theta)
+                step = gradient / info if info > 0 else np.sign(gradient) * self.max_step
+
+            theta_new = float(np.clip(theta + np.clip(step, -self.max_step, self.max_step), low, high))
+            if abs(theta_new - theta) < self.tol:
+                theta = theta_new
+                converged = True
+                break
+            theta = theta_new
+
+        if not converged or theta in (low, high):
+            return self.fallback.estimate(bank, u, initial_theta)
+
+        return self._result(theta, self._information_se(bank, theta), converged)
+
+
+ESTIMATORS = {
+    BoundedMLEEstimator.name: BoundedMLEEstimator,
+    NewtonRaphsonEstimator.name: NewtonRaphsonEstimator,
+    EAPEstimator.name: EAPEstimator,
+    MAPEstimator.name: MAPEstimator,
+}
+
+_estimators = {}
+
+
+def build_estimator(name, bounds=DEFAULT_BOUNDS):
+    """Instantiate an estimator by name, using the IRT_* grid/prior settings."""
+    if name not in ESTIMATORS:
+        raise ValueError(f"Unknown IRT theta estimator: {name}")
+
+    grid_options = {
+        'points': getattr(settings, 'IRT_QUADRATURE_POINTS', 81),
+        'prior_mean': getattr(settings, 'IRT_PRIOR_MEAN', 0.0),
+        'prior_sd': getattr(settings, 'IRT_PRIOR_SD', 1.0),
+    }
+
+    if name in (EAPEstimator.name, MAPEstimator.name):
+        return ESTIMATORS[name](bounds, **grid_options)
+    return ESTIMATORS[name](
+        bounds, grid_options['points'],
+        fallback=EAPEstimator(bounds, **grid_options)
+    )
+
+
+def get_estimator(name=None, bounds=DEFAULT_BOUNDS):
+    """Return the shared estimator instance selected by IRT_THETA_ESTIMATOR."""
+    name = name or getattr(settings, 'IRT_THETA_ESTIMATOR', NewtonRaphsonEstimator.name)
+    key = (name, tuple(bounds))
+
+    if key not in _estimators:
+        _estimators[key] = build_estimator(name, bounds)
+
+    return _estimators[key]
@@ -0,0 +1,97 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+
+# (output column, AnswerLog values_list lookup, dtype)
+ANSWER_LOG_COLUMNS = [
+    ('answer_id', 'id', np.int64),
+    ('session_id', 'session_id', np.int64),
+    ('user_id', 'session__user_id', np.int64),
+    ('skill_id', 'question__skill_id', np.int64),
+    ('question_id', 'question_id', np.int64),
+    ('is_correct', 'is_correct', np.bool_),
+    ('user_answer', 'user_answer', np.int8),
+    ('theta_before', 'theta_before', np.float32),
+    ('theta_after', 'theta_after', np.float32),
+    ('se_before', 'se_before', np.float32),
+    ('se_after', 'se_after', np.float32),
+    ('time_taken_seconds', 'time_taken_seconds', np.int32),
+    ('answered_at', 'answered_at', 'datetime64[us]'),
+    ('discrimination_a', 'question__discrimination_a', np.float32),
+    ('difficulty_b', 'question__difficulty_b', np.float32),
+    ('guessing_c', 'question__guessing_c', np.float32),
+]
+
+FORMATS = ('npz', 'npy')
+
+
+def rows_to_columns(rows):
+    """Turn values_list rows (in ANSWER_LOG_COLUMNS order) into typed arrays."""
+    columns = {}
+    for i, (name, _, dtype) in enumerate(ANSWER_LOG_COLUMNS):
+        values = [row[i] for row in rows]
+        if name == 'time_taken_seconds':
+            values = [-1 if v is None else v for v in values]
+        elif name == 'answered_at':
+            values = [v.replace(tzinfo=None) for v in values]
+        columns[name] = np.array(values, dtype=dtype)
+    return columns
+
+
+class PartitionWriter:
+    """
+    Writes column chunks into date partitions:
+
+    - npz: <root>/date=YYYY-MM-DD/part-00000.npz (compressed)
+    - npy: <root>/date=YYYY-MM-DD/part-00000/<column>.npy (memory-mappable)
+
+    A partition is cleared the first time this writer touches it, so
+    re-exporting a date replaces it instead of appending duplicates.
+    """
+
+    def __init__(self, root, file_format='npz'):
+        if file_format not in FORMATS:
+            raise ValueError(f"Unknown export format: {file_format}")
+        self.root = Path(root)
+        self.file_format = file_format
+        self.parts = {}
+        self.rows_written = 0
+
+    def write(self, date, columns):
+        partition = self.root / f'date={date.isoformat()}'
+        if date not in self.parts:
+            shutil.rmtree(partition, ignore_errors=True)
+            partition.mkdir(parents=True)
+            self.parts[date] = 0
+
+        name = f'part-{self.parts[date]:05d}'
+        if self.file_format == 'npz':
+            np.savez_compressed(partition / f'{name}.npz', **columns)
+        else:
+            part_dir = partition / name
+            part_dir.mkdir()
+            for column, values in columns.items():
+                np.save(part_dir / f'{column}.npy', values)
+
+        self.parts[date] += 1
+        self.rows_written += len(columns['answer_id'])
+
+
+def iter_partitions(root, mmap=True):
+    """
+    Yield (date string, columns dict) for every exported part under root.
+    npy parts are memory-mapped when mmap is True.
+    """
+    for partition in sorted(Path(root).glob('date=*')):
+        date = partition.name.split('=', 1)[1]
+        for part in sorted(partition.glob('part-*')):
+            if part.suffix == '.npz':
+                with np.load(part) as data:
+                    yield date, {key: data[key] for key in data.files}
+            else:
+                yield date, {
+                    column.stem: np.load(column, mmap_mode='r' if mmap else None)
+                    for column in sorted(part.glob('*.npy'))
+                }
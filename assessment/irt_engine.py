@@ -1,89 +1,86 @@
-import numpy as np
-from scipy.optimize import minimize_scalar
+from . import item_bank
+from .estimators import get_estimator
+from .info_index import InformationIndex
+from .item_bank import ItemBank
+from .selection import BalancedSelector
 
 
 class IRTEngine:
     """Item Response Theory calculation engine using 3PL model."""
 
+    _balanced_selector = None
+
     # ---------- PROBABILITY ----------
     @staticmethod
     def probability(theta, a, b, c):
-        exponent = -a * (theta - b)
-        return c + (1 - c) / (1 + np.exp(exponent))
+        return item_bank.probability(theta, a, b, c)
 
     # ---------- INFORMATION ----------
     @staticmethod
     def information(theta, a, b, c):
-        p = IRTEngine.probability(theta, a, b, c)
-        q = 1 - p
-        return (a * 2 * p * q) / ((1 - c) * 2)
+        return item_bank.information(theta, a, b, c)
 
     # ---------- LOG LIKELIHOOD ----------
     @staticmethod
     def log_likelihood(theta, answer_pattern, questions):
-        ll = 0.0
-
-        for is_correct, q in zip(answer_pattern, questions):
-            p = IRTEngine.probability(
-                theta,
-                q.discrimination_a,
-                q.difficulty_b,
-                q.guessing_c
-            )
-
-            p = np.clip(p, 1e-10, 1 - 1e-10)
-
-            ll += np.log(p) if is_correct else np.log(1 - p)
-
-        return -ll
+        bank = ItemBank.from_questions(questions)
+        return -float(bank.log_likelihood(theta, answer_pattern))
 
     # ---------- THETA ESTIMATION ----------
     @classmethod
-    def estimate_theta(cls, answer_pattern, questions, bounds=(-4, 4)):
+    def estimate_theta(cls, answer_pattern, questions, bounds=(-4, 4),
+                       initial_theta=0.0, estimator=None):
+        """
+        Estimate theta with the estimator named by IRT_THETA_ESTIMATOR
+        (or ``estimator``), warm-started from initial_theta.
+        """
         if not answer_pattern:
             return {"theta": 0.0, "se": 1.0, "converged": False}
 
-        result = minimize_scalar(
-            lambda t: cls.log_likelihood(t, answer_pattern, questions),
-            bounds=bounds,
-            method="bounded"
-        )
-
-        theta_hat = result.x
+        bank = ItemBank.from_questions(questions)
 
-        total_info = sum(
-            cls.information(
-                theta_hat,
-                q.discrimination_a,
-                q.difficulty_b,
-                q.guessing_c
-            )
-            for q in questions
+        return get_estimator(estimator, bounds).estimate(
+            bank, answer_pattern, initial_theta
         )
 
-        se = 1 / np.sqrt(total_info) if total_info > 0 else 1.0
-
-        return {
-            "theta": theta_hat,
-            "se": se,
-            "converged": result.success
-        }
-
     # ---------- QUESTION SELECTION ----------
     @classmethod
-    def select_next_question(cls, current_theta, available_questions):
-        max_info = -1
-        best_question = None
-
-        for q in available_questions:
-            info = cls.information(
-                current_theta,
-                q.discrimination_a,
-                q.difficulty_b,
-                q.guessing_c
-            )
-            if info > max_info:
-                max_info = info
-                best_question = q
-
-        return best_question
\ No newline at end of file
+    def select_next_question(cls, current_theta, available_questions, answered_ids=()):
+        """
+        Pick the most informative item at current_theta.
+
+        Given an InformationIndex, items in answered_ids are skipped lazily
+        and the item id is returned; likewise for an ItemBank. Otherwise
+        the QuestionBank instance from available_questions is returned.
+        """
+        if isinstance(available_questions, InformationIndex):
+            return available_questions.best(current_theta, answered_ids)
+
+        is_queryset = hasattr(available_questions, 'values_list')
+        if not is_queryset and not isinstance(available_questions, ItemBank):
+            available_questions = list(available_questions)
+
+        bank = ItemBank.from_questions(available_questions)
+        best = bank.most_informative(current_theta)
+
+        if best is None:
+            return None
+        if isinstance(available_questions, ItemBank):
+            return int(bank.ids[best])
+        if is_queryset:
+            return available_questions.get(pk=int(bank.ids[best]))
+        return available_questions[best]
+
+    @classmethod
+    def select_next_question_balanced(cls, current_theta, available_questions, answered_ids=()):
+        """
+        Content-balanced, exposure-controlled selection configured by the
+        IRT_EXPOSURE_CONTROL / IRT_CONTENT_TARGETS settings. Takes an
+        ItemBank or InformationIndex and returns the chosen item id.
+        """
+        if cls._balanced_selector is None:
+            cls._balanced_selector = BalancedSelector.from_settings()
+
+        return cls._balanced_selector.select(
+            current_theta, available_questions, answered_ids
+        )
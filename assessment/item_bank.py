@@ -0,0 +1,168 @@
+import numpy as np
+
+
+# Keeps log() and divisions finite for items with p -> 0 or p -> 1.
+P_EPSILON = 1e-10
+
+
+# ---------- VECTORIZED 3PL PRIMITIVES ----------
+def probability(theta, a, b, c):
+    """3PL probability of a correct answer; broadcasts over theta and items."""
+    return c + (1 - c) / (1 + np.exp(-a * (theta - b)))
+
+
+def information(theta, a, b, c):
+    """3PL Fisher information: a^2 * (q / p) * ((p - c) / (1 - c))^2."""
+    p = np.clip(probability(theta, a, b, c), P_EPSILON, 1 - P_EPSILON)
+    q = 1 - p
+    return a ** 2 * (q / p) * ((p - c) / (1 - c)) ** 2
+
+
+class ItemBank:
+    """
+    Compact, array-backed item bank.
+
+    Holds parallel arrays (ids, a, b, c) so the IRT engine can evaluate
+    information, likelihood and gradient for every item in one pass
+    instead of looping over QuestionBank instances. Banks loaded from
+    the database also carry the exposure counters (times_used), content
+    area codes and the number of sessions those counters cover, which
+    the balanced selector uses.
+    """
+
+    __slots__ = ('ids', 'a', 'b', 'c', 'times_used', 'content', 'content_labels', 'sessions')
+
+    def __init__(self, ids, a, b, c, times_used=None, content=None,
+                 content_labels=('',), sessions=0):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.a = np.asarray(a, dtype=np.float64)
+        self.b = np.asarray(b, dtype=np.float64)
+        self.c = np.asarray(c, dtype=np.float64)
+        self.times_used = (
+            np.zeros(len(self.ids), dtype=np.int64) if times_used is None
+            else np.asarray(times_used, dtype=np.int64)
+        )
+        self.content = (
+            np.zeros(len(self.ids), dtype=np.int32) if content is None
+            else np.asarray(content, dtype=np.int32)
+        )
+        self.content_labels = tuple(content_labels)
+        self.sessions = sessions
+
+    # ---------- CONSTRUCTION ----------
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [])
+
+    @classmethod
+    def from_queryset(cls, queryset, sessions=0):
+        """Build from a QuestionBank queryset without instantiating models."""
+        rows = list(queryset.values_list(
+            'id', 'discrimination_a', 'difficulty_b', 'guessing_c',
+            'times_used', 'content_area'
+        ))
+        if not rows:
+            return cls.empty()
+
+        params = np.array([row[:5] for row in rows], dtype=np.float64)
+        labels, content = np.unique([row[5] for row in rows], return_inverse=True)
+
+        return cls(
+            params[:, 0], params[:, 1], params[:, 2], params[:, 3],
+            times_used=params[:, 4],
+            content=content,
+            content_labels=labels.tolist(),
+            sessions=sessions,
+        )
+
+    @classmethod
+    def from_questions(cls, questions):
+        """Build from an ItemBank, a QuestionBank queryset or a list of questions."""
+        if isinstance(questions, cls):
+            return questions
+        if hasattr(questions, 'values_list'):
+            return cls.from_queryset(questions)
+
+        questions = list(questions)
+        return cls(
+            [q.id for q in questions],
+            [q.discrimination_a for q in questions],
+            [q.difficulty_b for q in questions],
+            [q.guessing_c for q in questions],
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---------- SUBSETS ----------
+    def take(self, index):
+        """Return a new bank restricted to a boolean mask or index array."""
+        return ItemBank(
+            self.ids[index], self.a[index], self.b[index], self.c[index],
+            times_used=self.times_used[index],
+            content=self.content[index],
+            content_labels=self.content_labels,
+            sessions=self.sessions,
+        )
+
+    def positions(self, ids):
+        """Positions of the given ids in a bank whose ids are sorted."""
+        ids = np.fromiter(ids, dtype=np.int64)
+        if not len(self) or not len(ids):
+            return np.zeros(0, dtype=np.int64)
+
+        pos = np.minimum(np.searchsorted(self.ids, ids), len(self) - 1)
+        return pos[self.ids[pos] == ids]
+
+    def exclude_mask(self, ids):
+        """Boolean mask of items whose id is NOT in ``ids``."""
+        ids = np.fromiter(ids, dtype=np.int64)
+        if not len(ids):
+            return np.ones(len(self), dtype=bool)
+        return ~np.isin(self.ids, ids)
+
+    def exclude(self, ids):
+        return self.take(self.exclude_mask(ids))
+
+    # ---------- EVALUATION ----------
+    def _theta(self, theta):
+        # Scalar theta -> shape (n,), grid of k thetas -> shape (k, n)
+        theta = np.asarray(theta, dtype=np.float64)
+        return theta[..., np.newaxis] if theta.ndim else theta
+
+    def probability(self, theta):
+        return probability(self._theta(theta), self.a, self.b, self.c)
+
+    def information(self, theta):
+        return information(self._theta(theta), self.a, self.b, self.c)
+
+    def test_information(self, theta):
+        return self.information(theta).sum(axis=-1)
+
+    def log_likelihood(self, theta, responses):
+        """Log-likelihood of a response pattern aligned with the items."""
+        u = np.asarray(responses, dtype=bool)
+        p = np.clip(self.probability(theta), P_EPSILON, 1 - P_EPSILON)
+        return np.where(u, np.log(p), np.log(1 - p)).sum(axis=-1)
+
+    def gradient(self, theta, responses):
+        """First derivative of the log-likelihood with respect to theta."""
+        u = np.asarray(responses, dtype=np.float64)
+        p = np.clip(self.probability(theta), P_EPSILON, 1 - P_EPSILON)
+        return (self.a * (u - p) * (p - self.c) / (p * (1 - self.c))).sum(axis=-1)
+
+    def hessian(self, theta, responses):
+        """Second derivative of the log-likelihood with respect to theta."""
+        u = np.asarray(responses, dtype=np.float64)
+        p = np.clip(self.probability(theta), P_EPSILON, 1 - P_EPSILON)
+        p_star = (p - self.c) / (1 - self.c)
+        return (
+            self.a ** 2 * p_star * (1 - p_star)
+            * ((u / p - 1) - u * (1 - self.c) * p_star / p ** 2)
+        ).sum(axis=-1)
+
+    def most_informative(self, theta):
+        """Position of the most informative item at theta, or None if empty."""
+        if not len(self):
+            return None
+        return int(np.argmax(self.information(theta)))
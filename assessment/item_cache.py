@@ -0,0 +1,89 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .info_index import InformationIndex
+from .item_bank import ItemBank
+from .models import DiagnosticSession, QuestionBank
+
+
+VERSION_KEY = 'irt:item_bank_version:{skill_id}'
+
+
+class ItemBankCache:
+    """
+    Per-process cache of ItemBank arrays keyed by skill id.
+
+    Each worker loads a skill's item parameters once and reuses them
+    across sessions. A version stamp in the shared cache is compared on
+    every read, so an invalidation in one process (new questions,
+    recalibration) makes every worker reload on its next request.
+    Banks are also reloaded after IRT_ITEM_BANK_MAX_AGE seconds so the
+    exposure counters used for selection do not drift too far.
+    """
+
+    _banks = {}
+    _indexes = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(skill_id):
+        return VERSION_KEY.format(skill_id=skill_id)
+
+    @classmethod
+    def get(cls, skill_id):
+        """Return the ItemBank for a skill, loading it if stale or missing."""
+        version = cache.get(cls._version_key(skill_id))
+        entry = cls._banks.get(skill_id)
+
+        max_age = getattr(settings, 'IRT_ITEM_BANK_MAX_AGE', 300)
+
+        if (
+            entry is not None
+            and entry[0] == version
+            and time.monotonic() - entry[1] < max_age
+        ):
+            return entry[2]
+
+        bank = ItemBank.from_queryset(
+            QuestionBank.objects.filter(skill_id=skill_id).order_by('id'),
+            sessions=DiagnosticSession.objects.filter(skill_id=skill_id).count()
+        )
+
+        with cls._lock:
+            cls._banks[skill_id] = (version, time.monotonic(), bank)
+            cls._indexes.pop(skill_id, None)
+
+        return bank
+
+    @classmethod
+    def get_index(cls, skill_id):
+        """Return the InformationIndex for a skill's current bank."""
+        bank = cls.get(skill_id)
+        index = cls._indexes.get(skill_id)
+
+        if index is None or index.bank is not bank:
+            index = InformationIndex(bank)
+            with cls._lock:
+                cls._indexes[skill_id] = index
+
+        return index
+
+    @classmethod
+    def invalidate(cls, skill_id):
+        """Drop the cached bank for a skill in this and every other worker."""
+        cache.set(cls._version_key(skill_id), uuid.uuid4().hex, timeout=None)
+
+        with cls._lock:
+            cls._banks.pop(skill_id, None)
+            cls._indexes.pop(skill_id, None)
+
+    @classmethod
+    def clear(cls):
+        """Drop every bank held by this process."""
+        with cls._lock:
+            cls._banks.clear()
+            cls._indexes.clear()
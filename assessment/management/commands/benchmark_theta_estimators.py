@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from assessment.estimators import ESTIMATORS, build_estimator
+from assessment.item_bank import ItemBank
+
+
+class Command(BaseCommand):
+    help = 'Benchmark theta estimators against the scipy bounded MLE path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--examinees', type=int, default=500)
+        parser.add_argument('--answers', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n_examinees = options['examinees']
+        n_answers = options['answers']
+
+        # Simulated administered items and responses per examinee
+        true_theta = rng.normal(0.0, 1.0, n_examinees)
+        patterns = []
+        for theta in true_theta:
+            bank = ItemBank(
+                np.arange(n_answers),
+                rng.uniform(0.8, 2.0, n_answers),
+                rng.uniform(-2.0, 2.0, n_answers),
+                np.full(n_answers, 0.25),
+            )
+            responses = rng.random(n_answers) < bank.probability(theta)
+            patterns.append((bank, responses))
+
+        reference = interior = None
+
+        for name in ESTIMATORS:
+            estimator = build_estimator(name)
+
+            start = time.perf_counter()
+            thetas = np.array([
+                estimator.estimate(bank, responses)['theta']
+                for bank, responses in patterns
+            ])
+            elapsed = time.perf_counter() - start
+
+            if name == 'bounded':
+                # Patterns without an interior MLE (all correct, all wrong or
+                # below chance) end on a bound here; the others use EAP there
+                reference = thetas
+                low, high = estimator.bounds
+                interior = (thetas > low + 1e-3) & (thetas < high - 1e-3)
+                self.stdout.write(
+                    f'{int((~interior).sum())} of {n_examinees} patterns have no interior MLE'
+                )
+
+            rmse = np.sqrt(np.mean((thetas - true_theta) ** 2))
+            line = (
+                f'{name:>8}: {elapsed / n_examinees * 1000:.3f} ms/estimate, '
+                f'RMSE vs true theta {rmse:.3f}'
+            )
+            if reference is not None and name != 'bounded':
+                diff = np.abs(thetas - reference)[interior]
+                line += f', |diff| vs bounded (interior MLE) mean {diff.mean():.4f} max {diff.max():.4f}'
+
+            self.stdout.write(line)
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import F
+
+from assessment.counters import QuestionUsageBuffer
+from assessment.models import QuestionBank
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark QuestionBank counter updates with many concurrent submitters '
+        'on one item (increments its times_used; run against a scratch database)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('question_id', type=int)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--submissions', type=int, default=200,
+                            help='Answers submitted per thread')
+
+    def handle(self, *args, **options):
+        question_id = options['question_id']
+        if not QuestionBank.objects.filter(pk=question_id).exists():
+            raise CommandError(f'QuestionBank {question_id} does not exist')
+
+        buffer = QuestionUsageBuffer(flush_interval=0.05)
+
+        def read_modify_write():
+            question = QuestionBank.objects.get(pk=question_id)
+            question.times_used += 1
+            question.save()
+
+        def atomic_update():
+            QuestionBank.objects.filter(pk=question_id).update(
+                times_used=F('times_used') + 1
+            )
+
+        def buffered():
+            buffer.add(question_id, False)
+            buffer.maybe_flush()
+
+        strategies = [
+            ('read-modify-write', read_modify_write),
+            ('F() update', atomic_update),
+            ('buffered', buffered),
+        ]
+
+        for name, submit in strategies:
+            before = self._times_used(question_id)
+            elapsed, errors = self._run(submit, options['threads'], options['submissions'])
+            buffer.flush()
+
+            expected = options['threads'] * options['submissions']
+            applied = self._times_used(question_id) - before
+
+            self.stdout.write(
+                f'{name:>18}: {expected / elapsed:8.0f} answers/s, '
+                f'{expected - errors - applied} lost updates, {errors} errors'
+            )
+
+    @staticmethod
+    def _times_used(question_id):
+        return QuestionBank.objects.values_list('times_used', flat=True).get(pk=question_id)
+
+    @staticmethod
+    def _run(submit, threads, submissions):
+        barrier = threading.Barrier(threads)
+        errors = []
+
+        def worker():
+            barrier.wait()
+            try:
+                for _ in range(submissions):
+                    try:
+                        submit()
+                    except Exception as exc:
+                        errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        return time.perf_counter() - start, len(errors)
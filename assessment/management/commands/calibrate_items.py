@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assessment.calibration import MMLCalibrator
+
+
+class Command(BaseCommand):
+    help = 'Calibrate 3PL item parameters from AnswerLog (marginal maximum likelihood)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skill', type=int, action='append', dest='skill_ids',
+                            help='Limit to a skill id (repeatable)')
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--max-iter', type=int)
+        parser.add_argument('--min-responses', type=int)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Fit but do not write parameters back')
+
+    def handle(self, *args, **options):
+        overrides = {
+            key: options[key]
+            for key in ('chunk_size', 'max_iter', 'min_responses')
+            if options[key] is not None
+        }
+        calibrator = MMLCalibrator.from_settings(**overrides)
+
+        start = time.perf_counter()
+        summary = calibrator.run(skill_ids=options['skill_ids'], dry_run=options['dry_run'])
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Calibrated {summary['calibrated_items']}/{summary['items']} items "
+                f"in {summary['iterations']} EM iterations ({elapsed:.1f}s); "
+                f"{summary['updated']} items "
+                f"{'would change' if options['dry_run'] else 'updated'}"
+            )
+        )
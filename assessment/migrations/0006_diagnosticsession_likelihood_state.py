@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0005_delete_cfuquiz'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagnosticsession',
+            name='likelihood_state',
+            field=models.JSONField(blank=True, default=dict, help_text='Running log-likelihood on the theta quadrature grid'),
+        ),
+    ]
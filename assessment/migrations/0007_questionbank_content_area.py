@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessment', '0006_diagnosticsession_likelihood_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionbank',
+            name='content_area',
+            field=models.CharField(blank=True, help_text='Sub-skill / topic used for content balancing', max_length=100),
+        ),
+    ]
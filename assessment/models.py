@@ -30,6 +30,11 @@ class DiagnosticSession(models.Model):
     current_theta = models.FloatField(default=0.0)
     current_se = models.FloatField(default=1.0)
     question_count = models.PositiveIntegerField(default=0)
+    likelihood_state = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Running log-likelihood on the theta quadrature grid'
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -79,6 +84,12 @@ class QuestionBank(models.Model):
       guessing_c = models.FloatField(default=0.25, 
           validators=[MinValueValidator(0.0), MaxValueValidator(1.0)])
       
+      content_area = models.CharField(
+          max_length=100,
+          blank=True,
+          help_text='Sub-skill / topic used for content balancing'
+      )
+      
       # Quality Metrics
       times_used = models.IntegerField(default=0)
       times_correct = models.IntegerField(default=0)
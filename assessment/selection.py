@@ -0,0 +1,113 @@
+import numpy as np
+from django.conf import settings
+
+from .info_index import InformationIndex
+from .item_bank import information
+
+
+class BalancedSelector:
+    """
+    Content-balanced, exposure-controlled next-item selection.
+
+    Every step is a vectorized pass over the bank arrays:
+
+    1. Content balancing: restrict to the content area furthest below its
+       target share of the test so far (IRT_CONTENT_TARGETS, uniform over
+       the bank's areas by default).
+    2. Exposure control, driven by the QuestionBank.times_used counters:
+       - 'sympson_hetter': item i survives with probability
+         min(1, r_max / r_i), where r_i = times_used / sessions;
+       - 'randomesque': pick uniformly among the k most informative items;
+       - 'none': plain maximum information.
+    """
+
+    METHODS = ('none', 'randomesque', 'sympson_hetter')
+
+    def __init__(self, method='randomesque', randomesque_k=5,
+                 max_exposure_rate=0.25, content_targets=None, rng=None):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown exposure control method: {method}")
+
+        self.method = method
+        self.randomesque_k = max(1, int(randomesque_k))
+        self.max_exposure_rate = float(max_exposure_rate)
+        self.content_targets = content_targets or {}
+        self.rng = rng or np.random.default_rng()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            method=getattr(settings, 'IRT_EXPOSURE_CONTROL', 'randomesque'),
+            randomesque_k=getattr(settings, 'IRT_RANDOMESQUE_K', 5),
+            max_exposure_rate=getattr(settings, 'IRT_MAX_EXPOSURE_RATE', 0.25),
+            content_targets=getattr(settings, 'IRT_CONTENT_TARGETS', {}),
+        )
+
+    # ---------- CONTENT BALANCING ----------
+    def content_mask(self, bank, eligible, answered_positions):
+        """Restrict eligible items to the most under-represented content area."""
+        n_areas = len(bank.content_labels)
+        if n_areas < 2:
+            return eligible
+
+        targets = np.array([
+            self.content_targets.get(label, 1.0) for label in bank.content_labels
+        ], dtype=np.float64)
+
+        # Areas with nothing left to give cannot be chosen
+        available = np.bincount(bank.content[eligible], minlength=n_areas) > 0
+        targets = np.where(available, targets, 0.0)
+        if targets.sum() <= 0:
+            return eligible
+        targets /= targets.sum()
+
+        administered = np.bincount(bank.content[answered_positions], minlength=n_areas)
+        deficit = targets * (len(answered_positions) + 1) - administered
+        deficit[~available] = -np.inf
+
+        return eligible & (bank.content == int(np.argmax(deficit)))
+
+    # ---------- EXPOSURE CONTROL ----------
+    def exposure_mask(self, bank, eligible):
+        """Sympson-Hetter style filter from observed exposure rates."""
+        if bank.sessions <= 0:
+            return eligible
+
+        rates = bank.times_used / bank.sessions
+        with np.errstate(divide='ignore'):
+            keep_probability = np.minimum(1.0, self.max_exposure_rate / rates)
+
+        passed = eligible & (self.rng.random(len(bank)) < keep_probability)
+        return passed if passed.any() else eligible
+
+    # ---------- SELECTION ----------
+    def select(self, theta, available, answered_ids=()):
+        """Return the id of the next item, or None when the bank is exhausted."""
+        index = available if isinstance(available, InformationIndex) else None
+        bank = index.bank if index is not None else available
+
+        answered_ids = list(answered_ids)
+        answered_positions = bank.positions(answered_ids)
+
+        eligible = np.ones(len(bank), dtype=bool)
+        eligible[answered_positions] = False
+        if not eligible.any():
+            return None
+
+        mask = self.content_mask(bank, eligible, answered_positions)
+        if self.method == 'sympson_hetter':
+            mask = self.exposure_mask(bank, mask)
+
+        k = self.randomesque_k if self.method == 'randomesque' else 1
+
+        # Unconstrained randomesque/max-info can use the index directly
+        if index is not None and mask is eligible:
+            candidates = index.top(theta, k, answered_ids)
+        else:
+            candidates = np.flatnonzero(mask)
+            info = information(theta, bank.a[candidates], bank.b[candidates], bank.c[candidates])
+            if len(candidates) > k:
+                top = np.argpartition(-info, k - 1)[:k]
+                candidates = candidates[top]
+
+        return int(bank.ids[self.rng.choice(candidates)])
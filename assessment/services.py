@@ -1,6 +1,20 @@
-from .models import DiagnosticSession, QuestionBank, AnswerLog
-from .irt_engine import IRTEngine
+import numpy as np
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, FloatField, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import DiagnosticSession, QuestionBank, AnswerLog, SkillGap
+from .irt_engine import IRTEngine
+from .estimators import get_estimator
+from .session_state import SessionLikelihood
+from .item_cache import ItemBankCache
+from .counters import record_question_usage
+from .cohort import CohortGapMatrix
+  
+# Theta assumed for skills the user has never been assessed on
+UNASSESSED_THETA = -2.0
   
 class AssessmentService:
       """Service layer for diagnostic assessments."""
@@ -28,123 +42,220 @@ class AssessmentService:
               'question_id', flat=True
           )
           
-          # Get available questions for this skill
-          available_questions = QuestionBank.objects.filter(
-              skill=session.skill
-          ).exclude(
-              id__in=answered_question_ids
-          )
+          # Information index over this skill's cached item parameters;
+          # answered items are skipped lazily during selection
+          index = ItemBankCache.get_index(session.skill_id)
           
           # Select next question
-          next_question = IRTEngine.select_next_question_balanced(
+          next_question_id = IRTEngine.select_next_question_balanced(
               session.current_theta,
-              available_questions,
-              session.question_count
+              index,
+              answered_ids=answered_question_ids
           )
           
-          return next_question
-      
-@staticmethod
-def submit_answer(session, question, user_answer):
-      """Submit answer and update theta estimate."""
-      is_correct = (user_answer == question.correct_answer)
-      
-      # Get all answers including this one
-      all_answers = list(session.answers.select_related('question'))
-      answer_pattern = [a.is_correct for a in all_answers] + [is_correct]
-      all_questions = [a.question for a in all_answers] + [question]
-      
-      # Estimate new theta
-      theta_before = session.current_theta
-      se_before = session.current_se
-      
-      estimation = IRTEngine.estimate_theta(answer_pattern, all_questions)
-      theta_after = estimation['theta']
-      se_after = estimation['se']
-      
-      # Log the answer
-      answer_log = AnswerLog.objects.create(
-          session=session,
-          question=question,
-          user_answer=user_answer,
-          is_correct=is_correct,
-          theta_before=theta_before,
-          theta_after=theta_after,
-          se_before=se_before,
-          se_after=se_after
-      )
-      
-      # Update session
-      session.current_theta = theta_after
-      session.current_se = se_after
-      session.question_count += 1
-      
-      if session.should_terminate:
-          session.status = 'converged' if session.has_converged else 'completed'
-          session.completed_at = timezone.now()
-      
-      session.save()
-      
-      # Update question stats
-      question.times_used += 1
-      if is_correct:
-          question.times_correct += 1
-      question.save()
-      
-      return answer_log
-
-@staticmethod
-def calculate_skill_gaps(user, target_occupation):
-      """Calculate skill gaps for user targeting specific occupation."""
-      from skills.models import OccupationSkill
-      from users.models import UserProficiency
-      
-      # Get required skills for occupation
-      required_skills = OccupationSkill.objects.filter(
-          occupation=target_occupation
-      ).select_related('skill')
-      
-      gaps = []
+          if next_question_id is None:
+              return None
+          
+          return QuestionBank.objects.get(pk=next_question_id)
       
-      for occ_skill in required_skills:
-          # Get user's current proficiency
-          try:
-              proficiency = UserProficiency.objects.get(
-                  user=user,
-                  skill=occ_skill.skill
+      @staticmethod
+      def submit_answer(session, question, user_answer):
+          """
+          Submit answer and update theta estimate.
+          
+          Runs in one transaction with the session row locked, so parallel
+          submissions for the same session cannot interleave. The path is
+          SELECT ... FOR UPDATE, INSERT of the answer log, an UPDATE of the
+          changed session fields and, with the default 'atomic'
+          IRT_USAGE_COUNTER_MODE, the counter UPDATE: four statements ('buffered'
+          drops the last). A session whose stored state is out of step adds
+          one SELECT to replay its answers.
+          """
+          is_correct = (user_answer == question.correct_answer)
+          estimator = get_estimator()
+          
+          with transaction.atomic():
+              locked = DiagnosticSession.objects.select_for_update().get(
+                  pk=session.pk
+              )
+              
+              # Running likelihood on the quadrature grid; replaying every
+              # answer is only needed when the stored state is out of step
+              likelihood = SessionLikelihood.from_session(locked, estimator.grid)
+              if likelihood is None:
+                  likelihood = SessionLikelihood.replay(
+                      estimator.grid, locked.answers.select_related('question')
+                  )
+              likelihood.add_response(question, is_correct)
+              
+              # Estimate new theta
+              theta_before = locked.current_theta
+              se_before = locked.current_se
+              
+              # Exact estimate on the stored item parameters, warm-started
+              # from the current theta (EAP reads the grid directly)
+              estimation = estimator.estimate_session(
+                  likelihood, initial_theta=theta_before
+              )
+              theta_after = estimation['theta']
+              se_after = estimation['se']
+              
+              # Log the answer
+              answer_log = AnswerLog.objects.create(
+                  session=locked,
+                  question=question,
+                  user_answer=user_answer,
+                  is_correct=is_correct,
+                  theta_before=theta_before,
+                  theta_after=theta_after,
+                  se_before=se_before,
+                  se_after=se_after
               )
-              current_theta = proficiency.theta
-          except UserProficiency.DoesNotExist:
-              current_theta = -2.0  # Assume very low if not assessed
-          
-          # Calculate gap
-          required_theta = occ_skill.required_proficiency_theta
-          gap = required_theta - current_theta
-          
-          if gap > 0:  # Only gaps, not excesses
-              # Calculate criticality coefficient
-              importance = occ_skill.importance
-              prerequisite_count = occ_skill.skill.prerequisites.count()
-              dependent_count = occ_skill.skill.required_for.count()
               
-              criticality = importance * (1 + 0.1 * prerequisite_count + 
-                                         0.1 * dependent_count)
+              # Update session, writing only the fields that changed
+              locked.current_theta = theta_after
+              locked.current_se = se_after
+              locked.question_count += 1
+              locked.likelihood_state = likelihood.to_json()
+              update_fields = [
+                  'current_theta', 'current_se', 'question_count',
+                  'likelihood_state', 'last_activity'
+              ]
               
-              priority = gap * criticality
+              if locked.should_terminate:
+                  locked.status = 'converged' if locked.has_converged else 'completed'
+                  locked.completed_at = timezone.now()
+                  update_fields += ['status', 'completed_at']
               
-              skill_gap = SkillGap.objects.update_or_create(
+              locked.save(update_fields=update_fields)
+              
+              # Update question stats without read-modify-write
+              record_question_usage(question.id, is_correct)
+          
+          # Keep the caller's instance in step with the committed row
+          for field in update_fields:
+              setattr(session, field, getattr(locked, field))
+          
+          return answer_log
+      
+      @staticmethod
+      def occupation_requirements(target_occupation):
+          """
+          Required skills for an occupation as parallel NumPy arrays,
+          with the criticality coefficient of each skill:
+          importance * SkillGraphMetrics.criticality_factor. A skill whose
+          metrics have not been computed yet gets the mean factor over all
+          skills (1.0 while there are none), so it neither jumps ahead of
+          nor falls behind skills of average criticality.
+          """
+          from skills.models import OccupationSkill, SkillGraphMetrics
+          
+          mean_factor = SkillGraphMetrics.objects.annotate(
+              grouping=Value(1)
+          ).values('grouping').annotate(
+              mean=Avg('criticality_factor')
+          ).values('mean')
+          
+          required_skills = list(
+              OccupationSkill.objects.filter(
+                  occupation=target_occupation
+              ).select_related('skill').annotate(
+                  criticality_factor=Coalesce(
+                      'skill__graph_metrics__criticality_factor',
+                      Subquery(mean_factor, output_field=FloatField()),
+                      Value(1.0),
+                  )
+              ).order_by('skill_id')
+          )
+          
+          importance = np.array([o.importance for o in required_skills], dtype=float)
+          criticality_factor = np.array(
+              [o.criticality_factor for o in required_skills], dtype=float
+          )
+          
+          return {
+              'skills': [o.skill for o in required_skills],
+              'skill_ids': np.array([o.skill_id for o in required_skills], dtype=np.int64),
+              'required_theta': np.array(
+                  [o.required_proficiency_theta for o in required_skills], dtype=float
+              ),
+              'criticality': importance * criticality_factor,
+          }
+      
+      @staticmethod
+      def calculate_skill_gaps(user, target_occupation):
+          """
+          Calculate skill gaps for user targeting specific occupation.
+          
+          Set-based: one query for the occupation's skills (with their
+          precomputed SkillGraphMetrics.criticality_factor), one for the
+          user's proficiencies, one bulk upsert of the SkillGap rows and
+          one read back of the saved rows. Returns the saved gaps ordered
+          by priority.
+          """
+          from users.models import UserProficiency
+          
+          requirements = AssessmentService.occupation_requirements(target_occupation)
+          skill_ids = requirements['skill_ids']
+          
+          proficiencies = dict(
+              UserProficiency.objects.filter(
+                  user=user, skill_id__in=skill_ids.tolist()
+              ).values_list('skill_id', 'theta')
+          )
+          current_theta = np.array(
+              [proficiencies.get(skill_id, UNASSESSED_THETA) for skill_id in skill_ids.tolist()],
+              dtype=float
+          )
+          
+          gap = requirements['required_theta'] - current_theta
+          priority = gap * requirements['criticality']
+          
+          # Only gaps, not excesses, highest priority first
+          gap_index = np.flatnonzero(gap > 0)
+          gap_index = gap_index[np.argsort(-priority[gap_index], kind='stable')]
+          
+          gaps = [
+              SkillGap(
                   user=user,
                   occupation=target_occupation,
-                  skill=occ_skill.skill,
-                  defaults={
-                      'current_level': current_theta,
-                      'required_level': required_theta,
-                      'gap_score': gap,
-                      'criticality_coefficient': criticality,
-                      'priority_score': priority
-                  }
-              )[0]
-              
-              gaps.append(skill_gap)
+                  skill=requirements['skills'][i],
+                  current_level=float(current_theta[i]),
+                  required_level=float(requirements['required_theta'][i]),
+                  gap_score=float(gap[i]),
+                  criticality_coefficient=float(requirements['criticality'][i]),
+                  priority_score=float(priority[i])
+              )
+              for i in gap_index.tolist()
+          ]
+          
+          SkillGap.objects.bulk_create(
+              gaps,
+              update_conflicts=True,
+              unique_fields=['user', 'occupation', 'skill'],
+              update_fields=[
+                  'current_level', 'required_level', 'gap_score',
+                  'criticality_coefficient', 'priority_score', 'updated_at'
+              ]
+          )
+          
+          # An upsert does not set primary keys on the objects (Django 4.2),
+          # so return the stored rows
+          return list(
+              SkillGap.objects.filter(
+                  user=user,
+                  occupation=target_occupation,
+                  skill_id__in=[gap.skill_id for gap in gaps]
+              ).select_related('skill').order_by('-priority_score', 'skill_id')
+          )
       
-      return gaps
+      @staticmethod
+      def calculate_cohort_skill_gaps(target_occupation, users=None, persist=False):
+          """
+          Gap and priority matrices for a whole cohort targeting an
+          occupation; optionally upserts every user's SkillGap rows.
+          """
+          matrix = CohortGapMatrix.build(target_occupation, users)
+          if persist:
+              matrix.persist()
+          return matrix
@@ -0,0 +1,84 @@
+import numpy as np
+
+from .item_bank import P_EPSILON, ItemBank, probability
+
+
+class SessionLikelihood:
+    """
+    Running state of a session's responses: the log-likelihood on the
+    quadrature grid and the parameters and outcome of every answered item.
+
+    Stored on DiagnosticSession.likelihood_state so each answer is an
+    O(grid) update instead of a replay of every AnswerLog row. The item
+    list is what Newton-Raphson / MAP need for exact 3PL derivatives; it
+    holds at most IRT_MAX_QUESTIONS rows.
+    """
+
+    def __init__(self, grid, log_likelihood=None, items=None):
+        self.grid = grid
+        self.log_likelihood = (
+            np.zeros(len(grid)) if log_likelihood is None
+            else np.asarray(log_likelihood, dtype=np.float64)
+        )
+        # [question_id, a, b, c, is_correct] per answer, in answer order
+        self.items = [list(item) for item in items or ()]
+
+    @property
+    def answers(self):
+        return len(self.items)
+
+    @classmethod
+    def from_session(cls, session, grid):
+        """
+        Load the stored state, or None if it is missing, was built on a
+        different grid, or is out of step with the session's answer count.
+        """
+        state = session.likelihood_state or {}
+        values = state.get('log_likelihood')
+        items = state.get('items')
+
+        if values is None and session.question_count == 0:
+            return cls(grid)
+
+        if (
+            values is None
+            or items is None
+            or len(values) != len(grid)
+            or state.get('bounds') != [grid[0], grid[-1]]
+            or len(items) != session.question_count
+        ):
+            return None
+
+        return cls(grid, values, items)
+
+    @classmethod
+    def replay(cls, grid, answers):
+        """Rebuild the state from AnswerLog rows (with their questions)."""
+        state = cls(grid)
+        for answer in answers:
+            state.add_response(answer.question, answer.is_correct)
+        return state
+
+    def add_response(self, question, is_correct):
+        a, b, c = question.discrimination_a, question.difficulty_b, question.guessing_c
+        p = np.clip(probability(self.grid, a, b, c), P_EPSILON, 1 - P_EPSILON)
+        self.log_likelihood += np.log(p) if is_correct else np.log(1 - p)
+        self.items.append([question.id, a, b, c, bool(is_correct)])
+
+    def bank(self):
+        """ItemBank of the answered items, aligned with responses()."""
+        if not self.items:
+            return ItemBank.empty()
+        ids, a, b, c, _ = zip(*self.items)
+        return ItemBank(ids, a, b, c)
+
+    def responses(self):
+        return np.array([item[4] for item in self.items], dtype=bool)
+
+    def to_json(self):
+        return {
+            'bounds': [float(self.grid[0]), float(self.grid[-1])],
+            'answers': self.answers,
+            'log_likelihood': self.log_likelihood.tolist(),
+            'items': self.items,
+        }
@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .item_cache import ItemBankCache
+from .models import QuestionBank
+
+
+# Saves that touch none of these fields leave the cached item parameters valid.
+IRT_PARAMETER_FIELDS = {
+    'skill', 'difficulty_b', 'discrimination_a', 'guessing_c', 'content_area'
+}
+
+
+@receiver(post_save, sender=QuestionBank)
+def invalidate_item_bank_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None:
+        if not IRT_PARAMETER_FIELDS.intersection(update_fields):
+            return
+
+    skill_id = instance.skill_id
+    transaction.on_commit(lambda: ItemBankCache.invalidate(skill_id))
+
+
+@receiver(post_delete, sender=QuestionBank)
+def invalidate_item_bank_on_delete(sender, instance, **kwargs):
+    skill_id = instance.skill_id
+    transaction.on_commit(lambda: ItemBankCache.invalidate(skill_id))
@@ -0,0 +1,17 @@
+from celery import shared_task
+from celery.signals import worker_process_shutdown
+
+from .calibration import MMLCalibrator
+from .counters import usage_buffer
+
+
+@shared_task
+def calibrate_item_bank_task(skill_ids=None):
+    """Re-estimate 3PL parameters from AnswerLog and write back changes."""
+    return MMLCalibrator.from_settings().run(skill_ids=skill_ids)
+
+
+@worker_process_shutdown.connect
+def flush_question_usage(**kwargs):
+    # Recycled prefork children exit without running atexit hooks
+    usage_buffer.flush()
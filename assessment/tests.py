@@ -0,0 +1,969 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from scipy.integrate import quad
+
+from assessment.calibration import MMLCalibrator
+from assessment.cohort import CohortGapMatrix
+from assessment.counters import QuestionUsageBuffer
+from assessment.estimators import build_estimator, get_estimator
+from assessment.exports import (
+    ANSWER_LOG_COLUMNS, PartitionWriter, iter_partitions, rows_to_columns,
+)
+from assessment.info_index import InformationIndex
+from assessment.irt_engine import IRTEngine
+from assessment.item_bank import ItemBank
+from assessment.item_cache import VERSION_KEY, ItemBankCache
+from assessment.models import AnswerLog, DiagnosticSession, QuestionBank, SkillGap
+from assessment.selection import BalancedSelector
+from assessment.services import UNASSESSED_THETA, AssessmentService
+from assessment.session_state import SessionLikelihood
+from learning.models import StudyPlan
+from skills.models import Occupation, OccupationSkill, Skill, SkillGraphMetrics
+from users.models import UserProficiency
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def simulated_bank(rng, n, c=0.25):
+    return ItemBank(
+        np.arange(1, n + 1),
+        rng.uniform(0.8, 2.0, n),
+        rng.uniform(-2.0, 2.0, n),
+        np.full(n, c),
+    )
+
+
+def make_user(username='learner'):
+    return get_user_model().objects.create_user(username=username, password='x')
+
+
+def make_skill(label='Python'):
+    return Skill.objects.create(preferred_label=label, skill_type='skill')
+
+
+def make_questions(skill, rng, n, content_areas=('',)):
+    return QuestionBank.objects.bulk_create([
+        QuestionBank(
+            skill=skill,
+            question_text=f'Q{i}',
+            options=['a', 'b', 'c', 'd'],
+            correct_answer=0,
+            discrimination_a=rng.uniform(0.8, 2.0),
+            difficulty_b=rng.uniform(-2.0, 2.0),
+            guessing_c=0.2,
+            content_area=content_areas[i % len(content_areas)],
+        )
+        for i in range(n)
+    ])
+
+
+class ItemBankTests(SimpleTestCase):
+    """Vectorised 3PL values against hand-computed and per-item ones."""
+
+    def setUp(self):
+        self.bank = ItemBank([1, 2, 3], [1.5, 1.0, 0.8], [0.0, 1.0, -1.0], [0.2, 0.0, 0.25])
+
+    @staticmethod
+    def per_item(theta, a, b, c):
+        # One item at a time, written out from the 3PL definitions
+        p = c + (1 - c) / (1 + np.exp(-a * (theta - b)))
+        dp = a * (1 - c) * np.exp(-a * (theta - b)) / (1 + np.exp(-a * (theta - b))) ** 2
+        return p, dp ** 2 / (p * (1 - p))
+
+    def test_hand_computed_values(self):
+        # theta = b: p = c + (1 - c) / 2; info = a^2 (q/p) ((p - c)/(1 - c))^2
+        self.assertAlmostEqual(self.bank.probability(0.0)[0], 0.6)
+        self.assertAlmostEqual(self.bank.information(0.0)[0], 2.25 * (0.4 / 0.6) * 0.25)
+        # 2PL item (c = 0) at theta = b: info = a^2 / 4
+        self.assertAlmostEqual(self.bank.information(1.0)[1], 0.25)
+
+    def test_matches_per_item_fisher_information(self):
+        for theta in (-2.5, -0.3, 0.0, 1.2, 3.0):
+            p = self.bank.probability(theta)
+            info = self.bank.information(theta)
+            for i in range(len(self.bank)):
+                expected_p, expected_info = self.per_item(
+                    theta, self.bank.a[i], self.bank.b[i], self.bank.c[i]
+                )
+                self.assertAlmostEqual(p[i], expected_p)
+                self.assertAlmostEqual(info[i], expected_info)
+                self.assertAlmostEqual(
+                    IRTEngine.information(theta, self.bank.a[i], self.bank.b[i], self.bank.c[i]),
+                    expected_info,
+                )
+
+    def test_grid_evaluation_matches_scalar(self):
+        grid = np.linspace(-3, 3, 7)
+        info = self.bank.information(grid)
+        self.assertEqual(info.shape, (7, 3))
+        for row, theta in zip(info, grid):
+            np.testing.assert_allclose(row, self.bank.information(theta))
+        np.testing.assert_allclose(self.bank.test_information(grid), info.sum(axis=1))
+
+    def test_derivatives_match_finite_differences(self):
+        responses = [True, False, True]
+        h = 1e-5
+        for theta in (-1.0, 0.4, 2.0):
+            ll = lambda t: self.bank.log_likelihood(t, responses)
+            gradient = lambda t: self.bank.gradient(t, responses)
+            self.assertAlmostEqual(
+                self.bank.gradient(theta, responses), (ll(theta + h) - ll(theta - h)) / (2 * h), places=5
+            )
+            self.assertAlmostEqual(
+                self.bank.hessian(theta, responses),
+                (gradient(theta + h) - gradient(theta - h)) / (2 * h), places=5
+            )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ItemBankCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        ItemBankCache.clear()
+        self.addCleanup(ItemBankCache.clear)
+        # bulk_create: no signals, so the cache starts without a version stamp
+        self.skill = make_skill()
+        self.questions = make_questions(self.skill, np.random.default_rng(0), 5)
+
+    def version(self):
+        return cache.get(VERSION_KEY.format(skill_id=self.skill.id))
+
+    def test_bank_is_loaded_once(self):
+        with self.assertNumQueries(2):
+            bank = ItemBankCache.get(self.skill.id)
+        with self.assertNumQueries(0):
+            self.assertIs(ItemBankCache.get(self.skill.id), bank)
+        self.assertEqual(bank.ids.tolist(), sorted(q.id for q in self.questions))
+
+    def test_parameter_edit_bumps_the_version(self):
+        ItemBankCache.get(self.skill.id)
+        question = self.questions[0]
+        question.difficulty_b = 1.75
+        with self.captureOnCommitCallbacks(execute=True):
+            question.save()
+
+        self.assertIsNotNone(self.version())
+        bank = ItemBankCache.get(self.skill.id)
+        self.assertEqual(bank.b[bank.positions([question.id])].tolist(), [1.75])
+
+    def test_counter_only_save_keeps_the_cache(self):
+        bank = ItemBankCache.get(self.skill.id)
+        question = self.questions[0]
+        question.times_used += 1
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            question.save(update_fields=['times_used', 'times_correct'])
+
+        self.assertEqual(callbacks, [])
+        self.assertIsNone(self.version())
+        with self.assertNumQueries(0):
+            self.assertIs(ItemBankCache.get(self.skill.id), bank)
+
+    def test_another_workers_stamp_forces_a_reload(self):
+        bank = ItemBankCache.get(self.skill.id)
+        cache.set(VERSION_KEY.format(skill_id=self.skill.id), 'other-worker')
+        with self.assertNumQueries(2):
+            self.assertIsNot(ItemBankCache.get(self.skill.id), bank)
+
+    def test_delete_drops_the_item(self):
+        ItemBankCache.get(self.skill.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.questions[0].delete()
+        self.assertNotIn(self.questions[0].id, ItemBankCache.get(self.skill.id).ids)
+
+    def test_stale_bank_is_reloaded_after_max_age(self):
+        bank = ItemBankCache.get(self.skill.id)
+        with override_settings(IRT_ITEM_BANK_MAX_AGE=0):
+            self.assertIsNot(ItemBankCache.get(self.skill.id), bank)
+
+
+class ThetaEstimatorTests(SimpleTestCase):
+    """Estimators against the scipy bounded MLE reference path."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+        self.reference = build_estimator('bounded')
+
+    def mixed_patterns(self, count=50, n=20):
+        """Simulated patterns whose MLE lies strictly inside the bounds."""
+        patterns = []
+        while len(patterns) < count:
+            bank = simulated_bank(self.rng, n)
+            responses = self.rng.random(n) < bank.probability(self.rng.normal())
+            theta = self.reference.estimate(bank, responses)['theta']
+            if -3.9 < theta < 3.9:
+                patterns.append((bank, responses, theta))
+        return patterns
+
+    def test_newton_matches_bounded_mle(self):
+        newton = build_estimator('newton')
+        for bank, responses, expected in self.mixed_patterns():
+            result = newton.estimate(bank, responses)
+            self.assertTrue(result['converged'])
+            self.assertAlmostEqual(result['theta'], expected, places=3)
+            self.assertAlmostEqual(
+                result['se'], self.reference.estimate(bank, responses)['se'], places=2
+            )
+
+    def test_newton_warm_start_reaches_same_estimate(self):
+        newton = build_estimator('newton')
+        for bank, responses, expected in self.mixed_patterns(count=20):
+            for start in (expected - 1.0, expected + 0.1, 3.5):
+                result = newton.estimate(bank, responses, initial_theta=start)
+                self.assertAlmostEqual(result['theta'], expected, places=3)
+
+    def test_grid_estimate_matches_bounded_mle(self):
+        newton = build_estimator('newton')
+        for bank, responses, expected in self.mixed_patterns():
+            result = newton.estimate_from_grid(bank.log_likelihood(newton.grid, responses))
+            self.assertAlmostEqual(result['theta'], expected, delta=0.02)
+
+    def test_eap_matches_numerical_posterior_mean(self):
+        eap = build_estimator('eap')
+        low, high = eap.bounds
+        for bank, responses, _ in self.mixed_patterns(count=10):
+            def posterior(t):
+                return np.exp(bank.log_likelihood(t, responses) - 0.5 * t ** 2)
+
+            norm = quad(posterior, low, high, points=[0.0])[0]
+            mean = quad(lambda t: t * posterior(t), low, high, points=[0.0])[0] / norm
+            self.assertAlmostEqual(eap.estimate(bank, responses)['theta'], mean, places=2)
+
+    def test_map_maximizes_log_posterior(self):
+        map_estimator = build_estimator('map')
+        for bank, responses, _ in self.mixed_patterns(count=20):
+            theta = map_estimator.estimate(bank, responses)['theta']
+            for t in (theta - 0.01, theta + 0.01):
+                self.assertGreater(
+                    bank.log_likelihood(theta, responses) - 0.5 * theta ** 2,
+                    bank.log_likelihood(t, responses) - 0.5 * t ** 2,
+                )
+
+    def test_all_correct_and_all_wrong_patterns(self):
+        bank = simulated_bank(self.rng, 15)
+        low, high = self.reference.bounds
+
+        for responses, sign in ((np.ones(15, bool), 1), (np.zeros(15, bool), -1)):
+            # The bounded search runs into the bound: no finite MLE exists
+            bounded = self.reference.estimate(bank, responses)['theta']
+            self.assertAlmostEqual(bounded, high if sign > 0 else low, places=2)
+
+            eap = build_estimator('eap').estimate(bank, responses)
+            for name in ('newton', 'eap', 'map'):
+                result = build_estimator(name).estimate(bank, responses)
+                self.assertTrue(np.isfinite(result['theta']) and np.isfinite(result['se']))
+                self.assertLess(abs(result['theta']), abs(bounded) - 1.0)
+                self.assertGreater(sign * result['theta'], 0.5)
+                self.assertGreater(result['se'], 0)
+
+            # Newton hands these patterns to its EAP fallback
+            self.assertEqual(build_estimator('newton').estimate(bank, responses), eap)
+
+    def test_unknown_estimator(self):
+        with self.assertRaises(ValueError):
+            build_estimator('nope')
+
+
+@override_settings(CACHES=LOCMEM_CACHES, IRT_THETA_ESTIMATOR='newton', IRT_MAX_QUESTIONS=30)
+class SessionLikelihoodTests(TestCase):
+    """The running session state against a full replay of AnswerLog."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(3)
+        self.skill = make_skill()
+        self.questions = make_questions(self.skill, self.rng, 12)
+        self.session = AssessmentService.start_session(make_user(), self.skill)
+
+    def answer(self, questions, pattern):
+        for question, correct in zip(questions, pattern):
+            AssessmentService.submit_answer(self.session, question, 0 if correct else 1)
+        self.session.refresh_from_db()
+
+    def replayed(self):
+        return SessionLikelihood.replay(
+            get_estimator().grid, self.session.answers.select_related('question').order_by('id')
+        )
+
+    def test_incremental_state_equals_full_replay(self):
+        self.answer(self.questions[:8], [1, 0, 1, 1, 0, 1, 0, 0])
+
+        stored = SessionLikelihood.from_session(self.session, get_estimator().grid)
+        replayed = self.replayed()
+
+        self.assertEqual(stored.answers, 8)
+        np.testing.assert_allclose(stored.log_likelihood, replayed.log_likelihood)
+        self.assertEqual(stored.items, replayed.items)
+
+    def test_theta_is_the_exact_mle_of_the_answers(self):
+        pattern = [1, 0, 1, 1, 0, 1, 0, 0, 1, 0]
+        self.answer(self.questions[:10], pattern)
+
+        replayed = self.replayed()
+        expected = build_estimator('bounded').estimate(replayed.bank(), replayed.responses())
+        self.assertAlmostEqual(self.session.current_theta, expected['theta'], places=3)
+
+        last = self.session.answers.order_by('-id').first()
+        self.assertEqual(last.theta_after, self.session.current_theta)
+
+    def test_newton_starts_from_current_theta(self):
+        self.answer(self.questions[:4], [1, 0, 1, 0])
+        estimator = get_estimator()
+        seen = []
+        original = estimator.estimate
+
+        def spy(bank, responses, initial_theta=0.0):
+            seen.append(initial_theta)
+            return original(bank, responses, initial_theta)
+
+        estimator.estimate = spy
+        try:
+            theta_before = self.session.current_theta
+            self.answer(self.questions[4:5], [1])
+        finally:
+            del estimator.estimate
+
+        self.assertEqual(seen, [theta_before])
+
+    def test_out_of_step_state_is_rebuilt_by_replay(self):
+        self.answer(self.questions[:5], [1, 1, 0, 1, 0])
+
+        # Pre-item-list state format, and a state missing an answer
+        state = self.session.likelihood_state
+        for stale in (
+            {'bounds': state['bounds'], 'answers': 5, 'log_likelihood': state['log_likelihood']},
+            {**state, 'items': state['items'][:-1]},
+        ):
+            DiagnosticSession.objects.filter(pk=self.session.pk).update(likelihood_state=stale)
+            self.session.refresh_from_db()
+            self.assertIsNone(SessionLikelihood.from_session(self.session, get_estimator().grid))
+
+        self.answer(self.questions[5:6], [1])
+        stored = SessionLikelihood.from_session(self.session, get_estimator().grid)
+        np.testing.assert_allclose(stored.log_likelihood, self.replayed().log_likelihood)
+        self.assertEqual(stored.answers, 6)
+
+
+class InformationIndexTests(SimpleTestCase):
+    """Indexed selection against a brute-force scan of the bank."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(11)
+        self.bank = simulated_bank(self.rng, 300)
+        self.index = InformationIndex(self.bank)
+
+    def brute_force(self, theta, exclude_ids):
+        available = self.bank.exclude(exclude_ids)
+        return int(available.ids[available.most_informative(theta)])
+
+    def test_best_matches_brute_force(self):
+        for theta in np.linspace(-3.5, 3.5, 29):
+            answered = self.rng.choice(self.bank.ids, 20, replace=False).tolist()
+            self.assertEqual(self.index.best(theta, answered), self.brute_force(theta, answered))
+
+    def test_answered_items_are_never_selected(self):
+        theta = 0.3
+        answered = []
+        for _ in range(40):
+            best = IRTEngine.select_next_question(theta, self.index, answered_ids=answered)
+            self.assertNotIn(best, answered)
+            answered.append(best)
+        self.assertEqual(len(set(answered)), 40)
+
+    def test_exhausted_bank(self):
+        small = InformationIndex(self.bank.take(np.arange(3)))
+        self.assertIsNone(small.best(0.0, self.bank.ids[:3].tolist()))
+        self.assertIsNone(InformationIndex(ItemBank.empty()).best(0.0))
+
+
+class BalancedSelectorTests(SimpleTestCase):
+    """Content balancing, exposure control and exclusion in BalancedSelector."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(5)
+        n = 120
+        self.bank = ItemBank(
+            np.arange(1, n + 1),
+            self.rng.uniform(0.8, 2.0, n),
+            self.rng.uniform(-2.0, 2.0, n),
+            np.full(n, 0.2),
+            content=np.arange(n) % 3,
+            content_labels=('algebra', 'geometry', 'statistics'),
+        )
+
+    def selector(self, **kwargs):
+        return BalancedSelector(rng=np.random.default_rng(0), **kwargs)
+
+    def area(self, item_id):
+        return self.bank.content_labels[self.bank.content[item_id - 1]]
+
+    def test_never_selects_answered_items(self):
+        for method in BalancedSelector.METHODS:
+            selector = self.selector(method=method)
+            answered = []
+            for _ in range(len(self.bank)):
+                item = selector.select(0.0, InformationIndex(self.bank), answered)
+                self.assertNotIn(item, answered)
+                answered.append(item)
+            self.assertIsNone(selector.select(0.0, self.bank, answered))
+
+    def test_content_areas_follow_targets(self):
+        selector = self.selector(
+            method='none', content_targets={'algebra': 2.0, 'geometry': 1.0, 'statistics': 1.0}
+        )
+        answered = []
+        for _ in range(40):
+            answered.append(selector.select(0.5, self.bank, answered))
+
+        counts = {label: 0 for label in self.bank.content_labels}
+        for item in answered:
+            counts[self.area(item)] += 1
+        self.assertEqual(counts, {'algebra': 20, 'geometry': 10, 'statistics': 10})
+
+    def test_randomesque_picks_among_top_k(self):
+        selector = self.selector(method='randomesque', randomesque_k=5)
+        bank = self.bank.take(self.bank.content == 0)
+        top = set(bank.ids[np.argsort(-bank.information(0.0))[:5]].tolist())
+
+        picks = {selector.select(0.0, bank) for _ in range(200)}
+        self.assertTrue(picks <= top)
+        self.assertGreater(len(picks), 1)
+
+    def test_sympson_hetter_holds_back_overexposed_items(self):
+        bank = self.bank.take(self.bank.content == 0)
+        best = int(bank.ids[bank.most_informative(0.0)])
+
+        # The best item was used in every session; its keep probability is 0.25
+        bank.times_used[:] = 0
+        bank.times_used[bank.ids == best] = 100
+        bank.sessions = 100
+
+        selector = self.selector(method='sympson_hetter', max_exposure_rate=0.25)
+        picks = [selector.select(0.0, bank) for _ in range(400)]
+        self.assertAlmostEqual(picks.count(best) / len(picks), 0.25, delta=0.06)
+
+        plain = self.selector(method='none')
+        self.assertEqual({plain.select(0.0, bank) for _ in range(20)}, {best})
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            BalancedSelector(method='nope')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CalibrationTests(TestCase):
+    """MML/EM recovers 3PL parameters from simulated responses."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = np.random.default_rng(2024)
+        cls.skill = make_skill()
+        cls.true_a = rng.uniform(0.8, 2.0, 12)
+        cls.true_b = np.linspace(-1.5, 1.5, 12)
+        cls.true_c = np.full(12, 0.2)
+
+        # Items start from uninformative parameters
+        cls.questions = QuestionBank.objects.bulk_create([
+            QuestionBank(
+                skill=cls.skill, question_text=f'Q{i}', correct_answer=0,
+                discrimination_a=1.0, difficulty_b=0.0, guessing_c=0.2,
+            )
+            for i in range(12)
+        ])
+        # One item that too few examinees saw to be calibrated
+        cls.sparse = QuestionBank.objects.create(
+            skill=cls.skill, question_text='rare', correct_answer=0,
+            discrimination_a=1.0, difficulty_b=0.0, guessing_c=0.2,
+        )
+
+        user = make_user()
+        thetas = rng.normal(0.0, 1.0, 3000)
+        sessions = DiagnosticSession.objects.bulk_create([
+            DiagnosticSession(user=user, skill=cls.skill) for _ in thetas
+        ])
+        bank = ItemBank(np.arange(12), cls.true_a, cls.true_b, cls.true_c)
+        correct = rng.random((len(thetas), 12)) < bank.probability(thetas)
+
+        logs = [
+            AnswerLog(
+                session=session, question=question, user_answer=0,
+                is_correct=bool(correct[s, i]),
+                theta_before=0.0, theta_after=0.0, se_before=1.0, se_after=1.0,
+            )
+            for s, session in enumerate(sessions)
+            for i, question in enumerate(cls.questions)
+        ]
+        logs += [
+            AnswerLog(
+                session=session, question=cls.sparse, user_answer=0, is_correct=True,
+                theta_before=0.0, theta_after=0.0, se_before=1.0, se_after=1.0,
+            )
+            for session in sessions[:10]
+        ]
+        AnswerLog.objects.bulk_create(logs, batch_size=5000)
+
+    def test_recovers_item_parameters(self):
+        calibrator = MMLCalibrator(chunk_size=5000, max_iter=50, min_responses=50)
+        bank = ItemBank.from_queryset(QuestionBank.objects.order_by('id'))
+        fitted, summary = calibrator.fit(bank, AnswerLog.objects.all())
+
+        self.assertEqual(summary['calibrated_items'], 12)
+        a, b, c = fitted.a[:12], fitted.b[:12], fitted.c[:12]
+        self.assertLess(np.sqrt(np.mean((b - self.true_b) ** 2)), 0.25)
+        self.assertLess(np.sqrt(np.mean((a - self.true_a) ** 2)), 0.35)
+        self.assertGreater(np.corrcoef(a, self.true_a)[0, 1], 0.8)
+        self.assertLess(np.abs(c - self.true_c).max(), 0.15)
+
+    def test_chunking_does_not_change_the_fit(self):
+        bank = ItemBank.from_queryset(QuestionBank.objects.order_by('id'))
+        one_chunk, _ = MMLCalibrator(chunk_size=100000, max_iter=3).fit(bank, AnswerLog.objects.all())
+        many_chunks, _ = MMLCalibrator(chunk_size=997, max_iter=3).fit(bank, AnswerLog.objects.all())
+        np.testing.assert_allclose(one_chunk.b, many_chunks.b, atol=1e-6)
+
+    def test_run_writes_back_calibrated_items_only(self):
+        summary = MMLCalibrator(chunk_size=5000, max_iter=10).run(skill_ids=[self.skill.id])
+
+        self.assertEqual(summary['updated'], 12)
+        self.sparse.refresh_from_db()
+        self.assertEqual(
+            (self.sparse.discrimination_a, self.sparse.difficulty_b), (1.0, 0.0)
+        )
+        b = np.array(
+            QuestionBank.objects.filter(pk__in=[q.pk for q in self.questions])
+            .order_by('id').values_list('difficulty_b', flat=True)
+        )
+        self.assertGreater(np.corrcoef(b, self.true_b)[0, 1], 0.95)
+
+    def test_uncalibrated_item_keeps_out_of_range_guessing(self):
+        # A legacy c above C_BOUNDS must not be clipped on an item that is not fitted
+        QuestionBank.objects.filter(pk=self.sparse.pk).update(guessing_c=0.6)
+        bank = ItemBank.from_queryset(QuestionBank.objects.order_by('id'))
+        calibrator = MMLCalibrator(chunk_size=5000, max_iter=3)
+
+        fitted, _ = calibrator.fit(bank, AnswerLog.objects.all())
+        sparse = bank.positions([self.sparse.pk])
+        self.assertEqual(fitted.c[sparse].tolist(), [0.6])
+
+        summary = calibrator.run(skill_ids=[self.skill.id])
+        self.assertEqual(summary['updated'], 12)
+        self.sparse.refresh_from_db()
+        self.assertEqual(self.sparse.guessing_c, 0.6)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QuestionUsageBufferTests(TestCase):
+
+    def setUp(self):
+        self.skill = make_skill()
+        self.question, self.other = make_questions(self.skill, np.random.default_rng(0), 2)
+        self.buffer = QuestionUsageBuffer(flush_interval=3600)
+        # No timer thread: these tests flush by hand
+        self.buffer._thread, self.buffer._pid = object(), os.getpid()
+
+    def counters(self, question):
+        question.refresh_from_db()
+        return question.times_used, question.times_correct
+
+    def test_concurrent_adds_are_all_counted(self):
+        def submit():
+            for i in range(500):
+                self.buffer.add(self.question.id, i % 2 == 0)
+
+        threads = [threading.Thread(target=submit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.counters(self.question), (4000, 2000))
+
+    def test_failed_flush_keeps_counts(self):
+        self.buffer.add(self.question.id, True)
+        self.buffer.add(self.other.id, False)
+
+        with mock.patch.object(QuestionUsageBuffer, '_write', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.buffer.add(self.question.id, True)
+
+        self.assertEqual(self.buffer.pending(), {self.question.id: (2, 2), self.other.id: (1, 0)})
+        self.buffer.flush()
+        self.assertEqual(self.counters(self.question), (2, 2))
+        self.assertEqual(self.counters(self.other), (1, 0))
+        self.assertEqual(self.buffer.pending(), {})
+
+    def test_maybe_flush_logs_failures(self):
+        self.buffer.flush_interval = 0
+        self.buffer.add(self.question.id, True)
+
+        with mock.patch.object(QuestionUsageBuffer, '_write', side_effect=DatabaseError):
+            with self.assertLogs('assessment.counters', 'ERROR'):
+                self.assertEqual(self.buffer.maybe_flush(), 0)
+        self.assertEqual(self.buffer.pending(), {self.question.id: (1, 1)})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QuestionUsageTimerTests(TransactionTestCase):
+
+    def test_timer_flushes_without_further_answers(self):
+        # bulk_create: a committed Skill.save() would queue a graph refresh task
+        skill, = Skill.objects.bulk_create([Skill(preferred_label='Python', skill_type='skill')])
+        question, = make_questions(skill, np.random.default_rng(0), 1)
+        buffer = QuestionUsageBuffer(flush_interval=0.05)
+        buffer.add(question.id, True)
+        buffer.add(question.id, False)
+
+        for _ in range(100):
+            question.refresh_from_db()
+            if question.times_used:
+                break
+            time.sleep(0.02)
+        self.assertEqual((question.times_used, question.times_correct), (2, 1))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, IRT_MAX_QUESTIONS=30)
+class SubmitAnswerQueryTests(TestCase):
+    """Statement count and transaction scope of the answer path."""
+
+    def setUp(self):
+        self.skill = make_skill()
+        self.questions = make_questions(self.skill, np.random.default_rng(1), 5)
+        self.session = AssessmentService.start_session(make_user(), self.skill)
+        AssessmentService.submit_answer(self.session, self.questions[0], 0)
+
+    def submit(self, question):
+        """Run submit_answer; return its statements with the savepoint each ran under."""
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append((sql, tuple(connection.savepoint_ids)))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            AssessmentService.submit_answer(self.session, question, 0)
+        return statements
+
+    def assert_single_transaction(self, statements):
+        savepoint_sql = [sql for sql, _ in statements if 'SAVEPOINT' in sql]
+        self.assertEqual(len(savepoint_sql), 2)  # open and release of the one atomic block
+
+        work = [(sql, savepoints) for sql, savepoints in statements if 'SAVEPOINT' not in sql]
+        self.assertEqual(len({savepoints for _, savepoints in work}), 1)
+        self.assertTrue(work[0][1])
+        return [sql for sql, _ in work]
+
+    def test_atomic_counters(self):
+        with self.settings(IRT_USAGE_COUNTER_MODE='atomic'):
+            sql = self.assert_single_transaction(self.submit(self.questions[1]))
+
+        self.assertEqual(len(sql), 4)
+        self.assertTrue(sql[0].startswith('SELECT'))
+        self.assertTrue(sql[1].startswith('INSERT INTO "answer_logs"'))
+        self.assertTrue(sql[2].startswith('UPDATE "diagnostic_sessions"'))
+        self.assertTrue(sql[3].startswith('UPDATE "assessment_questionbank"'))
+
+        self.questions[1].refresh_from_db()
+        self.assertEqual((self.questions[1].times_used, self.questions[1].times_correct), (1, 1))
+
+    def test_buffered_counters(self):
+        with self.settings(IRT_USAGE_COUNTER_MODE='buffered'):
+            sql = self.assert_single_transaction(self.submit(self.questions[1]))
+
+        self.assertEqual(len(sql), 3)
+        self.assertFalse(any('assessment_questionbank' in statement for statement in sql))
+
+    def test_out_of_step_state_adds_one_replay_query(self):
+        DiagnosticSession.objects.filter(pk=self.session.pk).update(likelihood_state={})
+
+        with self.settings(IRT_USAGE_COUNTER_MODE='atomic'):
+            sql = self.assert_single_transaction(self.submit(self.questions[1]))
+
+        self.assertEqual(len(sql), 5)
+        self.assertIn('"answer_logs"', sql[1])
+
+    def test_session_update_writes_only_changed_fields(self):
+        with self.settings(IRT_USAGE_COUNTER_MODE='atomic'):
+            sql = self.submit(self.questions[1])
+
+        session_update = next(s for s, _ in sql if s.startswith('UPDATE "diagnostic_sessions"'))
+        self.assertNotIn('"user_id"', session_update)
+        self.assertNotIn('"started_at"', session_update)
+        self.assertEqual(self.session.question_count, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SkillGapTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user()
+
+    def occupation_with_skills(self, n, label='Data Analyst'):
+        occupation = Occupation.objects.create(preferred_label=label)
+        skills = Skill.objects.bulk_create([
+            Skill(preferred_label=f'{label} skill {i}', skill_type='skill') for i in range(n)
+        ])
+        OccupationSkill.objects.bulk_create([
+            OccupationSkill(
+                occupation=occupation, skill=skill,
+                importance=0.5 + (i % 5) / 10, required_proficiency_theta=0.5 + (i % 3) / 2,
+            )
+            for i, skill in enumerate(skills)
+        ])
+        # Every other skill assessed; the rest count as UNASSESSED_THETA
+        UserProficiency.objects.bulk_create([
+            UserProficiency(user=self.user, skill=skill, theta=-0.5 + i / n, standard_error=0.3)
+            for i, skill in enumerate(skills[::2])
+        ])
+        return occupation, skills
+
+    def test_query_count_does_not_grow_with_skills(self):
+        small, _ = self.occupation_with_skills(5, 'Small')
+        large, _ = self.occupation_with_skills(80, 'Large')
+
+        # Requirements, proficiencies, upsert, read back
+        with self.assertNumQueries(4):
+            AssessmentService.calculate_skill_gaps(self.user, small)
+        with self.assertNumQueries(4):
+            gaps = AssessmentService.calculate_skill_gaps(self.user, large)
+        with self.assertNumQueries(0):
+            [gap.skill.preferred_label for gap in gaps]
+
+    def test_gap_values_and_order(self):
+        occupation, skills = self.occupation_with_skills(12)
+        SkillGraphMetrics.objects.create(skill=skills[1], criticality_factor=2.0)
+        SkillGraphMetrics.objects.create(skill=skills[2], criticality_factor=1.2)
+
+        gaps = AssessmentService.calculate_skill_gaps(self.user, occupation)
+
+        proficiency = dict(UserProficiency.objects.values_list('skill_id', 'theta'))
+        requirements = {
+            o.skill_id: o for o in OccupationSkill.objects.filter(occupation=occupation)
+        }
+        expected = {}
+        for skill in skills:
+            requirement = requirements[skill.id]
+            current = proficiency.get(skill.id, UNASSESSED_THETA)
+            gap = requirement.required_proficiency_theta - current
+            if gap > 0:
+                # Skills without metrics get the mean factor
+                factor = {skills[1]: 2.0, skills[2]: 1.2}.get(skill, 1.6)
+                expected[skill.id] = gap * requirement.importance * factor
+
+        self.assertEqual({gap.skill_id for gap in gaps}, set(expected))
+        for gap in gaps:
+            self.assertIsNotNone(gap.pk)
+            self.assertAlmostEqual(gap.priority_score, expected[gap.skill_id])
+        self.assertEqual(
+            [gap.priority_score for gap in gaps],
+            sorted((gap.priority_score for gap in gaps), reverse=True),
+        )
+
+    def test_recalculation_updates_rows_in_place(self):
+        occupation, skills = self.occupation_with_skills(6)
+        first = AssessmentService.calculate_skill_gaps(self.user, occupation)
+
+        UserProficiency.objects.filter(user=self.user, skill=skills[0]).update(theta=0.0)
+        second = AssessmentService.calculate_skill_gaps(self.user, occupation)
+
+        self.assertEqual(SkillGap.objects.count(), len(first))
+        self.assertEqual({gap.pk for gap in first}, {gap.pk for gap in second})
+        updated = next(gap for gap in second if gap.skill_id == skills[0].id)
+        self.assertAlmostEqual(updated.current_level, 0.0)
+
+
+class AnswerLogExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        skill = make_skill()
+        cls.questions = make_questions(skill, np.random.default_rng(3), 3)
+        cls.session = DiagnosticSession.objects.create(user=make_user(), skill=skill)
+        # Three answers on one day, two on the next; one without a time
+        days = [datetime(2026, 3, 1, 9, i, tzinfo=dt_timezone.utc) for i in range(3)]
+        days += [datetime(2026, 3, 2, 9, i, tzinfo=dt_timezone.utc) for i in range(2)]
+        for i, answered_at in enumerate(days):
+            log = AnswerLog.objects.create(
+                session=cls.session, question=cls.questions[i % 3], user_answer=i % 4,
+                is_correct=bool(i % 2), theta_before=i / 10, theta_after=i / 10 + 0.1,
+                se_before=1.0, se_after=0.9, time_taken_seconds=None if i == 4 else 30 + i,
+            )
+            AnswerLog.objects.filter(pk=log.pk).update(answered_at=answered_at)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def read_back(self, root=None):
+        parts = list(iter_partitions(root or self.root))
+        columns = {
+            name: np.concatenate([part[name] for _, part in parts])
+            for name in parts[0][1]
+        }
+        return [date for date, _ in parts], columns
+
+    def test_columns_round_trip(self):
+        rows = list(AnswerLog.objects.order_by('id').values_list(
+            *[lookup for _, lookup, _ in ANSWER_LOG_COLUMNS]
+        ))
+        writer = PartitionWriter(self.root, 'npz')
+        writer.write(rows[0][12].date(), rows_to_columns(rows))
+
+        _, columns = self.read_back()
+        self.assertEqual(set(columns), {name for name, _, _ in ANSWER_LOG_COLUMNS})
+        for name, _, dtype in ANSWER_LOG_COLUMNS:
+            self.assertEqual(columns[name].dtype, np.dtype(dtype), name)
+        self.assertEqual(writer.rows_written, 5)
+        self.assertEqual(columns['user_id'].tolist(), [self.session.user_id] * 5)
+        self.assertEqual(columns['time_taken_seconds'].tolist(), [30, 31, 32, 33, -1])
+        np.testing.assert_allclose(
+            columns['difficulty_b'], [self.questions[i % 3].difficulty_b for i in range(5)], rtol=1e-6
+        )
+        self.assertEqual(str(columns['answered_at'][0]), '2026-03-01T09:00:00.000000')
+
+    def test_command_writes_date_partitions(self):
+        for file_format in ('npz', 'npy'):
+            out = StringIO()
+            call_command(
+                'export_answer_logs', output=str(self.root / file_format),
+                format=file_format, chunk_size=2, stdout=out,
+            )
+            self.assertIn('Exported 5 answers into 2 date partitions', out.getvalue())
+
+            dates, columns = self.read_back(self.root / file_format)
+            self.assertEqual(dates, ['2026-03-01', '2026-03-01', '2026-03-02'])
+            self.assertEqual(
+                columns['answer_id'].tolist(),
+                list(AnswerLog.objects.order_by('answered_at', 'id').values_list('id', flat=True)),
+            )
+            self.assertEqual(columns['is_correct'].tolist(), [False, True, False, True, False])
+
+    def test_command_date_filter_and_rerun_replace_partitions(self):
+        output = str(self.root)
+        call_command('export_answer_logs', output=output, stdout=StringIO())
+        call_command('export_answer_logs', output=output, since=date(2026, 3, 2), stdout=StringIO())
+
+        dates, columns = self.read_back()
+        # The rerun replaced 2026-03-02 and left 2026-03-01 alone
+        self.assertEqual(dates, ['2026-03-01', '2026-03-02'])
+        self.assertEqual(len(columns['answer_id']), 5)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CohortGapMatrixTests(TestCase):
+    """
+    Skills s0, s1, s2 require theta 1.0, 0.5, 0.0 with importance 1.0,
+    0.5, 1.0. Alice and Bob target the role by name, Carol through a
+    study plan and has no proficiencies; Dave targets another role.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.occupation = Occupation.objects.create(preferred_label='Data Analyst')
+        cls.skills = Skill.objects.bulk_create([
+            Skill(preferred_label=f's{i}', skill_type='skill') for i in range(3)
+        ])
+        OccupationSkill.objects.bulk_create([
+            OccupationSkill(occupation=cls.occupation, skill=skill,
+                            required_proficiency_theta=theta, importance=importance)
+            for skill, theta, importance in zip(cls.skills, [1.0, 0.5, 0.0], [1.0, 0.5, 1.0])
+        ])
+
+        User = get_user_model()
+        cls.alice = User.objects.create_user('alice', password='x', target_role='data analyst')
+        cls.bob = User.objects.create_user('bob', password='x', target_role='Data Analyst')
+        cls.carol = User.objects.create_user('carol', password='x')
+        User.objects.create_user('dave', password='x', target_role='Engineer')
+        StudyPlan.objects.create(user=cls.carol, target_occupation=cls.occupation)
+
+        s0, s1, s2 = cls.skills
+        UserProficiency.objects.bulk_create([
+            UserProficiency(user=cls.alice, skill=s0, theta=0.0, standard_error=0.3),
+            UserProficiency(user=cls.alice, skill=s1, theta=1.0, standard_error=0.3),
+            UserProficiency(user=cls.bob, skill=s0, theta=1.5, standard_error=0.3),
+            UserProficiency(user=cls.bob, skill=s1, theta=0.0, standard_error=0.3),
+            UserProficiency(user=cls.bob, skill=s2, theta=-1.0, standard_error=0.3),
+        ])
+
+    def setUp(self):
+        self.matrix = CohortGapMatrix.build(self.occupation)
+
+    def test_matrix_contents(self):
+        self.assertEqual(
+            self.matrix.user_ids.tolist(), [self.alice.id, self.bob.id, self.carol.id]
+        )
+        np.testing.assert_allclose(self.matrix.theta, [
+            [0.0, 1.0, UNASSESSED_THETA],
+            [1.5, 0.0, -1.0],
+            [UNASSESSED_THETA] * 3,
+        ])
+        np.testing.assert_allclose(self.matrix.gap, [
+            [1.0, -0.5, 2.0], [-0.5, 0.5, 1.0], [3.0, 2.5, 2.0],
+        ])
+        np.testing.assert_allclose(self.matrix.priority, [
+            [1.0, -0.25, 2.0], [-0.5, 0.25, 1.0], [3.0, 1.25, 2.0],
+        ])
+
+    def test_ranked_gaps_by_priority(self):
+        ranked = self.matrix.ranked_gaps()
+        labels = {
+            user_id: [(gap['skill'], gap['priority_score']) for gap in gaps]
+            for user_id, gaps in ranked.items()
+        }
+        self.assertEqual(labels, {
+            self.alice.id: [('s2', 2.0), ('s0', 1.0)],
+            self.bob.id: [('s2', 1.0), ('s1', 0.25)],
+            self.carol.id: [('s0', 3.0), ('s2', 2.0), ('s1', 1.25)],
+        })
+        self.assertEqual(
+            [len(gaps) for gaps in self.matrix.ranked_gaps(limit=1).values()], [1, 1, 1]
+        )
+
+    def test_cohort_statistics(self):
+        stats = self.matrix.cohort_statistics()
+        self.assertEqual([row['skill'] for row in stats], ['s2', 's0', 's1'])
+        s2, s0, _ = stats
+        self.assertEqual((s2['users_with_gap'], s2['total_priority']), (3, 5.0))
+        self.assertEqual(s0['users_with_gap'], 2)
+        self.assertAlmostEqual(s0['share_with_gap'], 2 / 3)
+        self.assertAlmostEqual(s0['mean_gap'], 4 / 3)
+        self.assertAlmostEqual(s0['median_gap'], 1.0)
+
+    def test_persist_matches_per_user_calculation(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.matrix.persist(), 7)
+
+        persisted = {
+            (gap.user_id, gap.skill_id): gap.priority_score
+            for gap in SkillGap.objects.filter(occupation=self.occupation)
+        }
+        self.assertEqual(len(persisted), 7)
+        for user in (self.alice, self.bob, self.carol):
+            for gap in AssessmentService.calculate_skill_gaps(user, self.occupation):
+                self.assertAlmostEqual(persisted[user.id, gap.skill_id], gap.priority_score)
+        # The per-user path upserted the same rows
+        self.assertEqual(SkillGap.objects.count(), 7)
+
+    def test_explicit_users_and_empty_cohort(self):
+        matrix = CohortGapMatrix.build(
+            self.occupation, get_user_model().objects.filter(pk=self.bob.pk)
+        )
+        self.assertEqual(matrix.user_ids.tolist(), [self.bob.id])
+
+        empty = CohortGapMatrix.build(self.occupation, get_user_model().objects.none())
+        self.assertEqual(empty.cohort_statistics(), [])
+        self.assertEqual(empty.persist(), 0)
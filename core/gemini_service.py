@@ -1,146 +1,151 @@
-from google import genai
-from django.conf import settings
+from .llm_cache import cache_key, response_cache
+from .llm_gateway import get_gateway, parse_json_response
 
-class GeminiService:
-    def __init__(self):
-        self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
 
-    def generate(self, prompt: str):
-        response = self.client.models.generate_content(
-            model="models/gemini-1.5-flash",  # ✅ THIS IS THE FIX
-            contents=prompt,
-        )
-        return response.text
-    
-import google.genai as genai
-import json
-import time
-from typing import Dict, List, Optional
-  
 class GeminiService:
-      """Service for interacting with Google Gemini API."""
-      
-      def __init__(self):
-          genai.configure(api_key=settings.GEMINI_API_KEY)
-      
-      def generate_with_lite(self, prompt: str, **kwargs) -> str:
-          """Generate content using Flash-Lite (cheapest, fastest)."""
-          model = genai.GenerativeModel(settings.GEMINI_MODEL_LITE)
-          response = model.generate_content(prompt, **kwargs)
-          return response.text
-      
-      def generate_with_flash(self, prompt: str, **kwargs) -> str:
-          """Generate content using Flash (balanced)."""
-          model = genai.GenerativeModel(settings.GEMINI_MODEL_FLASH)
-          response = model.generate_content(prompt, **kwargs)
-          return response.text
-      
-      def generate_with_pro(self, prompt: str, **kwargs) -> str:
-          """Generate content using Pro (most capable)."""
-          model = genai.GenerativeModel(settings.GEMINI_MODEL_PRO)
-          response = model.generate_content(prompt, **kwargs)
-          return response.text
-      
-def generate_with_retry(self, prompt: str, model_type='flash', 
-                         max_retries=3, **kwargs) -> str:
-      """Generate with automatic retry on failure."""
-      for attempt in range(max_retries):
-          try:
-              if model_type == 'lite':
-                  return self.generate_with_lite(prompt, **kwargs)
-              elif model_type == 'flash':
-                  return self.generate_with_flash(prompt, **kwargs)
-              elif model_type == 'pro':
-                  return self.generate_with_pro(prompt, **kwargs)
-          except Exception as e:
-              if attempt == max_retries - 1:
-                  raise
-              wait_time = 2 ** attempt  # Exponential backoff
-              time.sleep(wait_time)
-      
-      raise Exception("Failed after max retries")
-
-def parse_json_response(self, response_text: str) -> Dict:
-      """Parse JSON from Gemini response, handling code blocks."""
-      # Remove markdown code blocks if present
-      text = response_text.strip()
-      if text.startswith('```json'):
-          text = text[7:]  # Remove ```json
-      if text.startswith('```'):
-          text = text[3:]  # Remove ```
-      if text.endswith('```'):
-          text = text[:-3]  # Remove closing ```
-      
-      text = text.strip()
-      
-      try:
-          return json.loads(text)
-      except json.JSONDecodeError as e:
-          # Try to extract JSON from text
-          import re
-          json_match = re.search(r'\{.*\}', text, re.DOTALL)
-          if json_match:
-              return json.loads(json_match.group())
-          raise ValueError(f"Could not parse JSON: {e}")
-      
-
-      import json
-import time
-from django.conf import settings
-from google import genai
+    """
+    Wrapper around Google Gemini.
 
+    Holds no connection of its own: every call goes through the
+    process-wide LLMGateway, so constructing one per service is free.
+    The async methods run on the gateway's async client and never
+    occupy a worker thread while waiting on the API.
 
-class GeminiService:
-    """
-    Wrapper around Google Gemini (google.genai SDK)
+    Passing cache_as="<call site>" serves repeated requests from the LLM
+    response cache (core.llm_cache), keyed by model, normalized prompt
+    and generation params, with that call site's TTL.
     """
 
-    def __init__(self):
-        # ✅ CORRECT way for new SDK
-        self.client = genai.Client(
-            api_key=settings.GEMINI_API_KEY
-        )
+    def __init__(self, gateway=None, cache=None):
+        self.gateway = gateway or get_gateway()
+        self.cache = cache or response_cache
+
+    def _cache_key(self, prompt, model_type, model=None, system_prompt=None, **params):
+        model_name = model or self.gateway.model_for(model_type)
+        return cache_key(model_name, prompt, system_prompt, **params)
+
+    def generate(self, prompt: str) -> str:
+        return self.generate_with_retry(prompt, model_type="flash")
+
+    def generate_with_lite(self, prompt: str, **kwargs) -> str:
+        """Generate content using Flash-Lite (cheapest, fastest)."""
+        return self.generate_with_retry(prompt, model_type="lite", **kwargs)
+
+    def generate_with_flash(self, prompt: str, **kwargs) -> str:
+        """Generate content using Flash (balanced)."""
+        return self.generate_with_retry(prompt, model_type="flash", **kwargs)
+
+    def generate_with_pro(self, prompt: str, **kwargs) -> str:
+        """Generate content using Pro (most capable)."""
+        return self.generate_with_retry(prompt, model_type="pro", **kwargs)
 
     def generate_with_retry(
         self,
         prompt: str,
         model_type: str = "lite",
         retries: int = 3,
-        delay: int = 2
+        delay: int = 2,
+        cache_as: str = None,
+        **kwargs
+    ) -> str:
+        """Generate with retries on transport errors, 429 and 5xx."""
+        def call():
+            return self.gateway.generate(
+                prompt, model_type=model_type, retries=retries, delay=delay, **kwargs
+            )
+
+        if cache_as is None:
+            return call()
+        key = self._cache_key(prompt, model_type, **kwargs)
+        return self.cache.get_or_call(key, call, site=cache_as)
+
+    def generate_json(self, prompt: str, model_type: str = "lite", cache_as: str = None,
+                      on_miss=None, **kwargs) -> dict:
+        """
+        generate_with_retry + parse_json_response. Only replies that parse
+        are cached, so a malformed answer is retried on the next call.
+
+        on_miss(call), if given, runs in place of call() when the response
+        cache has no exact entry (e.g. to try a semantic cache before the
+        model); its result is cached the same way.
+        """
+        def call():
+            return self.parse_json_response(
+                self.gateway.generate(prompt, model_type=model_type, **kwargs)
+            )
+
+        def produce():
+            return call() if on_miss is None else on_miss(call)
+
+        if cache_as is None:
+            return produce()
+        key = self._cache_key(prompt, model_type, format="json", **kwargs)
+        return self.cache.get_or_call(key, produce, site=cache_as)
+
+    # ---------- ASYNC ----------
+    async def agenerate_with_retry(
+        self,
+        prompt: str,
+        model_type: str = "lite",
+        retries: int = 3,
+        delay: int = 2,
+        cache_as: str = None,
+        **kwargs
     ) -> str:
+        def call():
+            return self.gateway.agenerate(
+                prompt, model_type=model_type, retries=retries, delay=delay, **kwargs
+            )
+
+        if cache_as is None:
+            return await call()
+        key = self._cache_key(prompt, model_type, **kwargs)
+        return await self.cache.aget_or_call(key, call, site=cache_as)
+
+    async def agenerate_json(self, prompt: str, model_type: str = "lite", cache_as: str = None,
+                             **kwargs) -> dict:
+        def call():
+            return self.gateway.agenerate_json(prompt, model_type=model_type, **kwargs)
 
-        model_map = {
-            "lite": settings.GEMINI_MODEL_LITE,
-            "flash": settings.GEMINI_MODEL_FLASH,
-            "pro": settings.GEMINI_MODEL_PRO,
-        }
-
-        model_name = model_map.get(model_type)
-        if not model_name:
-            raise ValueError(f"Invalid model_type: {model_type}")
-
-        for attempt in range(retries):
-            try:
-                response = self.client.models.generate_content(
-                    model=model_name,
-                    contents=prompt
-                )
-                return response.text
-
-            except Exception as e:
-                if attempt == retries - 1:
-                    raise
-                time.sleep(delay)
+        if cache_as is None:
+            return await call()
+        key = self._cache_key(prompt, model_type, format="json", **kwargs)
+        return await self.cache.aget_or_call(key, call, site=cache_as)
+
+    async def generate_json_response(self, system_prompt: str, messages, model=None,
+                                     model_type: str = "pro") -> dict:
+        """
+        JSON verdict on a conversation, as used by the interview judges.
+        messages may be a string, dicts with role/speaker and
+        content/text, or InterviewTurn-like objects.
+        """
+        return await self.gateway.agenerate_json(
+            self.format_conversation(messages),
+            model_type=model_type,
+            model=model,
+            system_prompt=system_prompt,
+        )
+
+    @staticmethod
+    def format_conversation(messages) -> str:
+        if isinstance(messages, str):
+            return messages
+
+        lines = []
+        for message in messages:
+            if isinstance(message, dict):
+                speaker = message.get("speaker") or message.get("role") or "user"
+                text = message.get("text") or message.get("content") or message.get("text_content") or ""
+            else:
+                speaker = getattr(message, "speaker", "user")
+                text = getattr(message, "text_content", "")
+            label = "Interviewer" if speaker in ("interviewer", "model", "assistant") else "Candidate"
+            lines.append(f"{label}: {text}")
+        return "\n".join(lines)
 
     @staticmethod
     def parse_json_response(text: str) -> dict:
         """
-        Safely extract JSON from Gemini response
+        Safely extract JSON from Gemini response, handling code blocks
         """
-        try:
-            start = text.index("{")
-            end = text.rindex("}") + 1
-            return json.loads(text[start:end])
-        except Exception as e:
-            raise ValueError(f"Invalid JSON from Gemini: {e}")
-
+        return parse_json_response(text)
@@ -0,0 +1,250 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'llm:v1:'
+STATS_KEY = 'llm:stats:{site}:{outcome}'
+OUTCOMES = ('local_hit', 'shared_hit', 'miss')
+
+DEFAULT_TTLS = {
+    'default': 60 * 60,
+    'macro_plan': 6 * 60 * 60,
+    'lessons': 7 * 24 * 60 * 60,
+    'cfu_quiz': 7 * 24 * 60 * 60,
+}
+
+SPACE_RE = re.compile(r'[ \t]+')
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def normalize_prompt(text):
+    """Whitespace-insensitive form of a prompt; wording and case are kept."""
+    text = (text or '').replace('\r\n', '\n').strip()
+    text = '\n'.join(SPACE_RE.sub(' ', line).strip() for line in text.split('\n'))
+    return BLANK_LINES_RE.sub('\n\n', text)
+
+
+def cache_key(model_name, prompt, system_prompt=None, **params):
+    """Content address of one request: model, normalized prompts, generation params."""
+    payload = json.dumps(
+        [model_name, normalize_prompt(prompt), normalize_prompt(system_prompt), params],
+        sort_keys=True, default=str,
+    )
+    return KEY_PREFIX + hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe bounded mapping of key -> (expires_at, value)."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM responses keyed by cache_key().
+
+    Lookups try the per-process LRU first, then the shared Django cache
+    (LLM_CACHE_ALIAS, Redis in production); a shared hit is copied into the
+    LRU with the same expiry. Entries carry their absolute expiry so both
+    tiers age out together. The shared tier is best effort: if it is
+    unreachable the call simply goes to the model.
+
+    TTLs are per call site (LLM_CACHE_TTLS, seconds; 0 disables caching
+    for that site). Hits and misses are counted per site in this process;
+    the counts since the last push go to the shared cache (cache.incr) in
+    one batch at most every LLM_CACHE_STATS_PUSH_INTERVAL seconds, so a
+    local hit makes no network call. Shared counts therefore trail each
+    worker by up to one interval.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(getattr(settings, 'LLM_CACHE_LOCAL_MAXSIZE', 1024))
+        self.counts = Counter()
+        self._unpushed = Counter()
+        self._last_push = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'LLM_CACHE_ENABLED', True)
+
+    @property
+    def shared(self):
+        return caches[getattr(settings, 'LLM_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def ttl(site):
+        ttls = {**DEFAULT_TTLS, **getattr(settings, 'LLM_CACHE_TTLS', {})}
+        return ttls.get(site, ttls['default'])
+
+    @staticmethod
+    def push_interval():
+        return getattr(settings, 'LLM_CACHE_STATS_PUSH_INTERVAL', 10)
+
+    def _count(self, site, outcome):
+        with self._lock:
+            self.counts[site, outcome] += 1
+            self._unpushed[site, outcome] += 1
+            due = time.monotonic() - self._last_push >= self.push_interval()
+        if due:
+            self.push_stats()
+
+    def push_stats(self):
+        """Add the counts since the last push to the shared counters."""
+        with self._lock:
+            unpushed, self._unpushed = self._unpushed, Counter()
+            self._last_push = time.monotonic()
+
+        for (site, outcome), delta in unpushed.items():
+            key = STATS_KEY.format(site=site, outcome=outcome)
+            try:
+                self.shared.add(key, 0, timeout=None)
+                self.shared.incr(key, delta)
+            except Exception:
+                logger.debug("Could not update shared LLM cache counter %s", key, exc_info=True)
+                # Kept for the next push rather than dropped
+                with self._lock:
+                    self._unpushed[site, outcome] += delta
+
+    # ---------- LOOKUP ----------
+    def get(self, key, site='default'):
+        """Cached value, or None on a miss."""
+        entry = self.local.get(key)
+        if entry is not None:
+            self._count(site, 'local_hit')
+            return entry[1]
+
+        try:
+            entry = self.shared.get(key)
+        except Exception:
+            logger.warning("Shared LLM cache unavailable for get", exc_info=True)
+            entry = None
+
+        if entry is not None and entry[0] > time.time():
+            self.local.set(key, entry)
+            self._count(site, 'shared_hit')
+            return entry[1]
+
+        self._count(site, 'miss')
+        return None
+
+    def set(self, key, value, site='default'):
+        ttl = self.ttl(site)
+        if ttl <= 0:
+            return
+        entry = (time.time() + ttl, value)
+        self.local.set(key, entry)
+        try:
+            self.shared.set(key, entry, timeout=ttl)
+        except Exception:
+            logger.warning("Shared LLM cache unavailable for set", exc_info=True)
+
+    def get_or_call(self, key, call, site='default'):
+        """Cached value for key, or call() stored under it."""
+        if not self.enabled or self.ttl(site) <= 0:
+            return call()
+        value = self.get(key, site)
+        if value is None:
+            value = call()
+            self.set(key, value, site)
+        return value
+
+    async def aget_or_call(self, key, call, site='default'):
+        """get_or_call for coroutines; the shared tier runs off the event loop."""
+        from asgiref.sync import sync_to_async
+
+        if not self.enabled or self.ttl(site) <= 0:
+            return await call()
+        value = await sync_to_async(self.get)(key, site)
+        if value is None:
+            value = await call()
+            await sync_to_async(self.set)(key, value, site)
+        return value
+
+    # ---------- STATS ----------
+    def stats(self, shared=False):
+        """
+        {site: {local_hit, shared_hit, miss, hit_rate}} for this process or,
+        with shared=True, all workers (after pushing this process's counts).
+        """
+        if shared:
+            self.push_stats()
+        sites = set(DEFAULT_TTLS) | set(getattr(settings, 'LLM_CACHE_TTLS', {}))
+        sites |= {site for site, _ in self.counts}
+
+        report = {}
+        for site in sorted(sites):
+            if shared:
+                keys = {outcome: STATS_KEY.format(site=site, outcome=outcome) for outcome in OUTCOMES}
+                values = self.shared.get_many(list(keys.values()))
+                row = {outcome: values.get(key, 0) for outcome, key in keys.items()}
+            else:
+                row = {outcome: self.counts[site, outcome] for outcome in OUTCOMES}
+            total = sum(row.values())
+            if total:
+                row['hit_rate'] = (row['local_hit'] + row['shared_hit']) / total
+                report[site] = row
+        return report
+
+    def reset_stats(self):
+        with self._lock:
+            self.counts.clear()
+            self._unpushed.clear()
+        sites = set(DEFAULT_TTLS) | set(getattr(settings, 'LLM_CACHE_TTLS', {}))
+        self.shared.delete_many([
+            STATS_KEY.format(site=site, outcome=outcome) for site in sites for outcome in OUTCOMES
+        ])
+
+    def clear_local(self):
+        self.local.clear()
+
+    def _after_fork(self):
+        # The parent still holds, and will push, the counts it had not pushed
+        self._lock = threading.Lock()
+        self._unpushed = Counter()
+        self._last_push = time.monotonic()
+
+
+response_cache = LLMResponseCache()
+atexit.register(response_cache.push_stats)
+os.register_at_fork(after_in_child=response_cache._after_fork)
@@ -0,0 +1,347 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .single_flight import single_flight
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://generativelanguage.googleapis.com/v1beta'
+
+# Statuses worth another attempt; anything else in 4xx is the caller's fault
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """A Gemini request that failed for good (after retries, if retryable)."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_json_response(text):
+    """JSON object from a model reply, tolerating code fences and chatter."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```(?:json)?", "", text)
+        text = re.sub(r"```$", "", text).strip()
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        start = text.index("{")
+        end = text.rindex("}") + 1
+        return json.loads(text[start:end])
+    except Exception as e:
+        raise ValueError(f"Invalid JSON from Gemini: {e}")
+
+
+class _AsyncState:
+    """httpx client and tier semaphores belonging to one event loop."""
+
+    def __init__(self, client):
+        self.client = client
+        self.semaphores = {}
+
+
+class LLMGateway:
+    """
+    Process-wide Gemini REST client.
+
+    All calls share one requests.Session whose connection pool keeps
+    sockets to the API host alive, so a call after the first skips DNS,
+    TCP and TLS setup. The session is tied to the process that built it:
+    after a fork (Celery prefork workers) the child builds its own on first
+    use instead of writing to the parent's sockets.
+
+    The a-prefixed methods are the native async equivalents, on an
+    httpx.AsyncClient. Async clients and semaphores cannot cross event
+    loops, so each running loop gets its own. In-flight async requests are
+    capped per model tier by LLM_ASYNC_CONCURRENCY; callers over the cap
+    wait on the semaphore without holding a thread.
+
+    Use get_gateway() rather than constructing one per call.
+    """
+
+    def __init__(self, api_key=None, base_url=None, pool_maxsize=None, timeout=None):
+        self.api_key = api_key or settings.GEMINI_API_KEY
+        self.base_url = (base_url or getattr(settings, 'GEMINI_API_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        self.pool_maxsize = pool_maxsize or getattr(settings, 'LLM_HTTP_POOL_MAXSIZE', 10)
+        self.timeout = timeout or getattr(settings, 'LLM_HTTP_TIMEOUT', (5, 120))
+        self.concurrency = dict(getattr(
+            settings, 'LLM_ASYNC_CONCURRENCY', {'lite': 32, 'flash': 16, 'pro': 8}
+        ))
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._async = weakref.WeakKeyDictionary()
+
+    # ---------- TRANSPORT ----------
+    def _build_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'x-goog-api-key': self.api_key,
+            'Content-Type': 'application/json',
+        })
+        return session
+
+    @property
+    def session(self):
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    # An inherited session shares sockets with the parent; drop it unclosed
+                    self._session = self._build_session()
+                    self._pid = pid
+        return self._session
+
+    def close(self):
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+    def _async_state(self):
+        loop = asyncio.get_running_loop()
+        state = self._async.get(loop)
+        if state is None:
+            connect, read = self.timeout if isinstance(self.timeout, tuple) else (self.timeout,) * 2
+            pool_size = max(sum(self.concurrency.values()), 1)
+            state = self._async[loop] = _AsyncState(httpx.AsyncClient(
+                headers={'x-goog-api-key': self.api_key},
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            ))
+        return state
+
+    def semaphore(self, tier):
+        """The running loop's semaphore for a model tier (or explicit model name)."""
+        semaphores = self._async_state().semaphores
+        if tier not in semaphores:
+            limit = self.concurrency.get(tier, self.concurrency.get('default', 8))
+            semaphores[tier] = asyncio.Semaphore(limit)
+        return semaphores[tier]
+
+    async def aclose(self):
+        """Close the running loop's async client."""
+        state = self._async.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.client.aclose()
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+        self._async = weakref.WeakKeyDictionary()
+
+    # ---------- REQUESTS ----------
+    @staticmethod
+    def model_path(model_name):
+        return model_name if model_name.startswith('models/') else f'models/{model_name}'
+
+    def tier_for(self, model_name):
+        """Tier whose configured model is model_name; the model itself otherwise."""
+        for tier in ('lite', 'flash', 'pro'):
+            if self.model_path(self.model_for(tier)) == self.model_path(model_name):
+                return tier
+        return model_name
+
+    @staticmethod
+    def model_for(model_type):
+        model_map = {
+            'lite': settings.GEMINI_MODEL_LITE,
+            'flash': settings.GEMINI_MODEL_FLASH,
+            'pro': settings.GEMINI_MODEL_PRO,
+        }
+        try:
+            return model_map[model_type]
+        except KeyError:
+            raise ValueError(f"Invalid model_type: {model_type}")
+
+    def request_key(self, model_name, method, payload):
+        """Identity of a request, for coalescing identical in-flight calls."""
+        body = json.dumps(
+            [self.base_url, self.model_path(model_name), method, payload], sort_keys=True
+        )
+        return hashlib.blake2b(body.encode(), digest_size=20).hexdigest()
+
+    def post(self, model_name, method, payload, retries=3, delay=2):
+        """
+        POST {base}/{model}:{method}, retrying transport errors and 429/5xx.
+        Concurrent identical requests, here or in other workers, share one
+        upstream call (core.single_flight).
+        """
+        return single_flight.do(
+            self.request_key(model_name, method, payload),
+            lambda: self._post(model_name, method, payload, retries, delay),
+        )
+
+    def _post(self, model_name, method, payload, retries, delay):
+        url = f'{self.base_url}/{self.model_path(model_name)}:{method}'
+
+        for attempt in range(retries):
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = LLMError(f"{method} request to {model_name} failed: {e}")
+            else:
+                if response.ok:
+                    return response.json()
+                error = LLMError(
+                    f"{method} on {model_name} returned {response.status_code}: {response.text[:500]}",
+                    status=response.status_code,
+                )
+                if response.status_code not in RETRYABLE_STATUSES:
+                    raise error
+
+            if attempt == retries - 1:
+                raise error
+            logger.warning("%s (attempt %d of %d)", error, attempt + 1, retries)
+            time.sleep(delay)
+
+    async def apost(self, model_name, method, payload, retries=3, delay=2, tier=None):
+        """Async post(); each attempt holds a slot of the tier's semaphore."""
+        return await single_flight.ado(
+            self.request_key(model_name, method, payload),
+            lambda: self._apost(model_name, method, payload, retries, delay, tier),
+        )
+
+    async def _apost(self, model_name, method, payload, retries, delay, tier):
+        url = f'{self.base_url}/{self.model_path(model_name)}:{method}'
+        client = self._async_state().client
+        semaphore = self.semaphore(tier or self.tier_for(model_name))
+
+        for attempt in range(retries):
+            try:
+                async with semaphore:
+                    response = await client.post(url, json=payload)
+            except httpx.HTTPError as e:
+                error = LLMError(f"{method} request to {model_name} failed: {e!r}")
+            else:
+                if response.is_success:
+                    return response.json()
+                error = LLMError(
+                    f"{method} on {model_name} returned {response.status_code}: {response.text[:500]}",
+                    status=response.status_code,
+                )
+                if response.status_code not in RETRYABLE_STATUSES:
+                    raise error
+
+            if attempt == retries - 1:
+                raise error
+            logger.warning("%s (attempt %d of %d)", error, attempt + 1, retries)
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def generate_payload(prompt, system_prompt=None, **generation_config):
+        payload = {'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]}
+        if system_prompt:
+            payload['systemInstruction'] = {'parts': [{'text': system_prompt}]}
+        if generation_config:
+            payload['generationConfig'] = generation_config
+        return payload
+
+    @staticmethod
+    def response_text(data):
+        """Concatenated text parts of the first candidate."""
+        try:
+            parts = data['candidates'][0]['content']['parts']
+        except (KeyError, IndexError):
+            raise LLMError(f"Gemini returned no candidates: {str(data)[:500]}")
+        return ''.join(part.get('text', '') for part in parts)
+
+    def generate(self, prompt, model_type='lite', system_prompt=None, retries=3, delay=2,
+                 model=None, **generation_config):
+        """Text of one generateContent call; ``model`` overrides ``model_type``."""
+        model_name = model or self.model_for(model_type)
+        data = self.post(
+            model_name, 'generateContent',
+            self.generate_payload(prompt, system_prompt, **generation_config),
+            retries=retries, delay=delay,
+        )
+        return self.response_text(data)
+
+    async def agenerate(self, prompt, model_type='lite', system_prompt=None, retries=3, delay=2,
+                        model=None, **generation_config):
+        """Async generate(), bounded by the tier's semaphore."""
+        model_name = model or self.model_for(model_type)
+        data = await self.apost(
+            model_name, 'generateContent',
+            self.generate_payload(prompt, system_prompt, **generation_config),
+            retries=retries, delay=delay,
+            tier=None if model else model_type,
+        )
+        return self.response_text(data)
+
+    async def agenerate_json(self, prompt, model_type='lite', system_prompt=None, **kwargs):
+        """agenerate() in JSON mode, parsed."""
+        kwargs.setdefault('responseMimeType', 'application/json')
+        text = await self.agenerate(prompt, model_type=model_type, system_prompt=system_prompt, **kwargs)
+        return parse_json_response(text)
+
+    def embed(self, texts, model_name, retries=3, delay=2):
+        """One batchEmbedContents call; returns a list of vectors."""
+        model_path = self.model_path(model_name)
+        data = self.post(
+            model_name, 'batchEmbedContents',
+            {'requests': [
+                {'model': model_path, 'content': {'parts': [{'text': text}]}}
+                for text in texts
+            ]},
+            retries=retries, delay=delay,
+        )
+        return [embedding['values'] for embedding in data.get('embeddings', [])]
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """The process-wide LLMGateway, created on first use."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
+
+
+def reset_gateway():
+    """Close and forget the gateway, e.g. after changing its settings."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is not None:
+            _gateway.close()
+        _gateway = None
+
+
+def _reinit_after_fork():
+    global _gateway_lock
+    _gateway_lock = threading.Lock()
+    if _gateway is not None:
+        _gateway._after_fork()
+
+
+os.register_at_fork(after_in_child=_reinit_after_fork)
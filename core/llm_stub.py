@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection open between requests
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; Nagle would hold the body
+    # for the client's delayed ACK on a reused connection
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.counter_lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with self.server.counter_lock:
+            self.server.requests += 1
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        try:
+            if self.server.latency:
+                time.sleep(self.server.latency)
+        finally:
+            with self.server.counter_lock:
+                self.server.in_flight -= 1
+
+        payload = json.loads(body or b'{}')
+        if self.path.endswith(':batchEmbedContents'):
+            data = {'embeddings': [
+                {'values': [0.0] * 8} for _ in payload.get('requests', [])
+            ]}
+        else:
+            data = {'candidates': [
+                {'content': {'role': 'model', 'parts': [{'text': self.server.reply}]}}
+            ]}
+
+        encoded = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+
+class StubGeminiServer:
+    """
+    Local stand-in for the Gemini REST API (generateContent and
+    batchEmbedContents) for benchmarks and offline runs. Counts requests,
+    accepted connections and peak concurrent requests, so connection
+    reuse and concurrency limits are visible.
+
+        with StubGeminiServer(latency=0.005) as stub:
+            gateway = LLMGateway(api_key='stub', base_url=stub.base_url)
+    """
+
+    def __init__(self, latency=0.0, reply='{"ok": true}', host='127.0.0.1', port=0):
+        self.server = ThreadingHTTPServer((host, port), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.reply = reply
+        self.server.requests = 0
+        self.server.connections = 0
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.server.counter_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/v1beta'
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    @property
+    def connections(self):
+        return self.server.connections
+
+    @property
+    def max_in_flight(self):
+        return self.server.max_in_flight
+
+    def reset_counters(self):
+        with self.server.counter_lock:
+            self.server.requests = 0
+            self.server.connections = 0
+            self.server.max_in_flight = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
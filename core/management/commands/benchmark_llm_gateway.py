@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from core.llm_gateway import LLMGateway
+from core.llm_stub import StubGeminiServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare a client built per call with the pooled LLM gateway against '
+        'a local Gemini stub server'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--latency-ms', type=float, default=0.0,
+                            help='Simulated server time per request')
+
+    def handle(self, *args, **options):
+        if options['requests'] <= 0:
+            raise CommandError('--requests must be positive')
+
+        with StubGeminiServer(latency=options['latency_ms'] / 1000) as stub:
+            def per_call():
+                # What each GeminiService used to do: a fresh client per request
+                gateway = LLMGateway(api_key='stub', base_url=stub.base_url)
+                try:
+                    gateway.generate('ping', model='stub', retries=1)
+                finally:
+                    gateway.close()
+
+            pooled_gateway = LLMGateway(api_key='stub', base_url=stub.base_url)
+
+            def pooled():
+                pooled_gateway.generate('ping', model='stub', retries=1)
+
+            results = {}
+            for name, call in (('per-call client', per_call), ('pooled gateway', pooled)):
+                call()  # warm-up, so both runs start with imports and the pool ready
+                stub.reset_counters()
+                results[name] = self.measure(call, options['requests'], stub)
+            pooled_gateway.close()
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name}: mean {result['mean']:.3f}ms, p50 {result['p50']:.3f}ms, "
+                f"p95 {result['p95']:.3f}ms; {result['connections']} connections "
+                f"for {result['requests']} requests"
+            )
+
+        before, after = results['per-call client'], results['pooled gateway']
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Pooled gateway saves {before['mean'] - after['mean']:.3f}ms per request "
+                f"({before['mean'] / max(after['mean'], 1e-9):.1f}x faster mean)"
+            )
+        )
+
+    @staticmethod
+    def measure(call, n, stub):
+        timings = np.empty(n)
+        for i in range(n):
+            start = time.perf_counter()
+            call()
+            timings[i] = (time.perf_counter() - start) * 1000
+        return {
+            'mean': float(timings.mean()),
+            'p50': float(np.percentile(timings, 50)),
+            'p95': float(np.percentile(timings, 95)),
+            'requests': stub.requests,
+            'connections': stub.connections,
+        }
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from core.llm_cache import response_cache
+from core.single_flight import single_flight
+
+
+class Command(BaseCommand):
+    help = (
+        'Show LLM response cache hits and misses per call site, and calls '
+        'collapsed by single-flight, across all workers'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters afterwards')
+
+    def handle(self, *args, **options):
+        report = response_cache.stats(shared=True)
+        for site, row in report.items():
+            self.stdout.write(
+                f"{site}: {row['local_hit']} local hits, {row['shared_hit']} shared hits, "
+                f"{row['miss']} misses ({row['hit_rate']:.0%} hit rate)"
+            )
+
+        hits = sum(row['local_hit'] + row['shared_hit'] for row in report.values())
+        total = hits + sum(row['miss'] for row in report.values())
+        flights = single_flight.stats(shared=True)
+        collapsed = flights['collapsed_local'] + flights['collapsed_remote']
+        self.stdout.write(
+            f"single-flight: {flights['upstream']} upstream calls, {collapsed} collapsed "
+            f"({flights['collapsed_local']} in-process, {flights['collapsed_remote']} across workers)"
+        )
+
+        if options['reset']:
+            response_cache.reset_stats()
+            single_flight.reset_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f"{hits} of {total} cacheable LLM calls served from cache")
+        )
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 'llm:flight:{key}:lock'
+RESULT_KEY = 'llm:flight:{key}:result:{token}'
+STATS_KEY = 'llm:flight:stats:{outcome}'
+OUTCOMES = ('upstream', 'collapsed_local', 'collapsed_remote')
+
+
+class _Flight:
+    """One in-progress call that threads of this process can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    Within a process, the first caller for a key runs the call and every
+    concurrent caller with the same key waits for its result (threads on
+    an Event, coroutines on a Future of their event loop). Across
+    processes, the runner first takes a lock with cache.add in the shared
+    cache, storing a token of its own as the lock value. A worker that
+    finds the lock taken polls for the result published under the
+    holder's token, so a result left behind by an earlier flight of the
+    same key is never served to a later one. If the holder fails, or the
+    lock expires without a result, a waiter takes over. If the shared
+    cache is unreachable, or fails while a worker waits, calls only
+    coalesce within the process.
+
+    Counts upstream calls and calls collapsed locally or remotely, per
+    process and in the shared cache.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._async_flights = weakref.WeakKeyDictionary()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'LLM_SINGLE_FLIGHT_ENABLED', True)
+
+    @property
+    def shared(self):
+        alias = getattr(settings, 'LLM_SINGLE_FLIGHT_ALIAS', None) or getattr(settings, 'LLM_CACHE_ALIAS', 'default')
+        return caches[alias]
+
+    @staticmethod
+    def lock_timeout():
+        return getattr(settings, 'LLM_SINGLE_FLIGHT_LOCK_TIMEOUT', 150)
+
+    @staticmethod
+    def result_ttl():
+        return getattr(settings, 'LLM_SINGLE_FLIGHT_RESULT_TTL', 30)
+
+    @staticmethod
+    def poll_interval():
+        return getattr(settings, 'LLM_SINGLE_FLIGHT_POLL_INTERVAL', 0.1)
+
+    def _count(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+        key = STATS_KEY.format(outcome=outcome)
+        try:
+            self.shared.add(key, 0, timeout=None)
+            self.shared.incr(key)
+        except Exception:
+            logger.debug("Could not update shared single-flight counter %s", key, exc_info=True)
+
+    async def _acount(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+        key = STATS_KEY.format(outcome=outcome)
+        try:
+            await self.shared.aadd(key, 0, timeout=None)
+            await self.shared.aincr(key)
+        except Exception:
+            logger.debug("Could not update shared single-flight counter %s", key, exc_info=True)
+
+    # The result is wrapped so a None result is distinguishable from a miss.
+    # Publishing and releasing are best effort: waiters fall back to their
+    # own call when the lock expires without a result.
+    def _publish(self, result_key, result):
+        try:
+            self.shared.set(result_key, (result,), timeout=self.result_ttl())
+        except Exception:
+            logger.warning("Could not publish single-flight result", exc_info=True)
+
+    def _release(self, lock_key, token):
+        try:
+            if self.shared.get(lock_key) == token:
+                self.shared.delete(lock_key)
+        except Exception:
+            logger.warning("Could not release single-flight lock", exc_info=True)
+
+    async def _apublish(self, result_key, result):
+        try:
+            await self.shared.aset(result_key, (result,), timeout=self.result_ttl())
+        except Exception:
+            logger.warning("Could not publish single-flight result", exc_info=True)
+
+    async def _arelease(self, lock_key, token):
+        try:
+            if await self.shared.aget(lock_key) == token:
+                await self.shared.adelete(lock_key)
+        except Exception:
+            logger.warning("Could not release single-flight lock", exc_info=True)
+
+    # ---------- SYNC ----------
+    def do(self, key, call):
+        """call() once for all concurrent callers with the same key."""
+        if not self.enabled:
+            return call()
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            self._count('collapsed_local')
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._across_workers(key, call)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _across_workers(self, key, call):
+        lock_key = LOCK_KEY.format(key=key)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout()
+
+        while time.monotonic() < deadline:
+            try:
+                acquired = self.shared.add(lock_key, token, timeout=self.lock_timeout())
+                holder = None if acquired else self.shared.get(lock_key)
+            except Exception:
+                logger.warning("Single-flight lock unavailable; calling upstream", exc_info=True)
+                self._count('upstream')
+                return call()
+
+            if acquired:
+                self._count('upstream')
+                try:
+                    result = call()
+                except BaseException:
+                    self._release(lock_key, token)
+                    raise
+                self._publish(RESULT_KEY.format(key=key, token=token), result)
+                self._release(lock_key, token)
+                return result
+
+            if holder is None:
+                # Released between add and get; try to take it
+                continue
+
+            try:
+                found = self._wait(key, holder, deadline)
+            except Exception:
+                logger.warning("Single-flight wait failed; calling upstream", exc_info=True)
+                self._count('upstream')
+                return call()
+            if found is not None:
+                self._count('collapsed_remote')
+                return found[0]
+            # The holder failed without a result, or time ran out
+
+        logger.warning("Timed out waiting on another worker's LLM call; calling upstream")
+        self._count('upstream')
+        return call()
+
+    def _wait(self, key, holder, deadline):
+        """
+        Poll for the wrapped result of holder's flight; None once the lock
+        is released without one or the deadline passes.
+        """
+        lock_key = LOCK_KEY.format(key=key)
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval())
+            result_key = RESULT_KEY.format(key=key, token=holder)
+            values = self.shared.get_many([result_key, lock_key])
+            if result_key in values:
+                return values[result_key]
+            current = values.get(lock_key)
+            if current != holder:
+                # The holder may have published between the two reads
+                found = self.shared.get(result_key)
+                if found is not None or current is None:
+                    return found
+                # Another worker took over the expired lock; wait on it instead
+                holder = current
+        return None
+
+    # ---------- ASYNC ----------
+    async def ado(self, key, call):
+        """do() for coroutine functions; waiters never block the event loop."""
+        if not self.enabled:
+            return await call()
+
+        flights = self._async_flights.setdefault(asyncio.get_running_loop(), {})
+        flight = flights.get(key)
+        if flight is not None:
+            try:
+                result = await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # The leading coroutine was cancelled, not this one; run it ourselves
+                return await self.ado(key, call)
+            await self._acount('collapsed_local')
+            return result
+
+        flight = flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._aacross_workers(key, call)
+            flight.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # Retrieved here so an unobserved failure is not logged as never retrieved
+            flight.exception()
+            raise
+        finally:
+            flights.pop(key, None)
+
+    async def _aacross_workers(self, key, call):
+        lock_key = LOCK_KEY.format(key=key)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout()
+
+        while time.monotonic() < deadline:
+            try:
+                acquired = await self.shared.aadd(lock_key, token, timeout=self.lock_timeout())
+                holder = None if acquired else await self.shared.aget(lock_key)
+            except Exception:
+                logger.warning("Single-flight lock unavailable; calling upstream", exc_info=True)
+                await self._acount('upstream')
+                return await call()
+
+            if acquired:
+                await self._acount('upstream')
+                try:
+                    result = await call()
+                except BaseException:
+                    await self._arelease(lock_key, token)
+                    raise
+                await self._apublish(RESULT_KEY.format(key=key, token=token), result)
+                await self._arelease(lock_key, token)
+                return result
+
+            if holder is None:
+                continue
+
+            try:
+                found = await self._await(key, holder, deadline)
+            except Exception:
+                logger.warning("Single-flight wait failed; calling upstream", exc_info=True)
+                await self._acount('upstream')
+                return await call()
+            if found is not None:
+                await self._acount('collapsed_remote')
+                return found[0]
+
+        logger.warning("Timed out waiting on another worker's LLM call; calling upstream")
+        await self._acount('upstream')
+        return await call()
+
+    async def _await(self, key, holder, deadline):
+        lock_key = LOCK_KEY.format(key=key)
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval())
+            result_key = RESULT_KEY.format(key=key, token=holder)
+            values = await self.shared.aget_many([result_key, lock_key])
+            if result_key in values:
+                return values[result_key]
+            current = values.get(lock_key)
+            if current != holder:
+                found = await self.shared.aget(result_key)
+                if found is not None or current is None:
+                    return found
+                holder = current
+        return None
+
+    # ---------- STATS ----------
+    def stats(self, shared=False):
+        """{upstream, collapsed_local, collapsed_remote} for this process or all workers."""
+        if shared:
+            keys = {outcome: STATS_KEY.format(outcome=outcome) for outcome in OUTCOMES}
+            values = self.shared.get_many(list(keys.values()))
+            return {outcome: values.get(key, 0) for outcome, key in keys.items()}
+        return {outcome: self.counts[outcome] for outcome in OUTCOMES}
+
+    def reset_stats(self):
+        with self._lock:
+            self.counts.clear()
+        self.shared.delete_many([STATS_KEY.format(outcome=outcome) for outcome in OUTCOMES])
+
+
+single_flight = SingleFlight()
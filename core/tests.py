@@ -1,3 +1,381 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.llm_cache import LLMResponseCache, LRUCache, cache_key
+from core.llm_gateway import LLMGateway
+from core.single_flight import LOCK_KEY, RESULT_KEY, SingleFlight
+from core.llm_stub import StubGeminiServer
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LLMGatewayTests(SimpleTestCase):
+
+    def setUp(self):
+        self.stub = StubGeminiServer(reply='{"answer": 42}')
+        self.stub.start()
+        self.addCleanup(self.stub.stop)
+        self.gateway = LLMGateway(api_key='stub', base_url=self.stub.base_url)
+        self.addCleanup(self.gateway.close)
+
+    def test_pooled_calls_reuse_one_connection(self):
+        for i in range(20):
+            self.assertEqual(
+                self.gateway.generate(f'prompt {i}', model='stub', retries=1), '{"answer": 42}'
+            )
+        self.assertEqual(self.stub.requests, 20)
+        self.assertEqual(self.stub.connections, 1)
+
+    def test_client_per_call_opens_a_connection_each(self):
+        for i in range(5):
+            gateway = LLMGateway(api_key='stub', base_url=self.stub.base_url)
+            gateway.generate(f'prompt {i}', model='stub', retries=1)
+            gateway.close()
+        self.assertEqual(self.stub.connections, 5)
+
+    def test_embed_returns_one_vector_per_text(self):
+        vectors = self.gateway.embed(['a', 'b', 'c'], 'stub-embedding', retries=1)
+        self.assertEqual([len(vector) for vector in vectors], [8, 8, 8])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncGatewayTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.stub = StubGeminiServer(latency=0.05, reply='{"answer": 42}')
+        self.stub.start()
+        self.addCleanup(self.stub.stop)
+        self.gateway = LLMGateway(api_key='stub', base_url=self.stub.base_url)
+        self.gateway.concurrency = {'lite': 3, 'pro': 1, 'default': 2}
+
+    def run_async(self, coroutine_function):
+        async def run():
+            try:
+                return await coroutine_function()
+            finally:
+                await self.gateway.aclose()
+        return asyncio.run(run())
+
+    def test_agenerate_and_agenerate_json(self):
+        async def calls():
+            return (
+                await self.gateway.agenerate('a', model='stub', retries=1),
+                await self.gateway.agenerate_json('b', model='stub', retries=1),
+            )
+
+        self.assertEqual(self.run_async(calls), ('{"answer": 42}', {'answer': 42}))
+        self.assertEqual(self.stub.requests, 2)
+
+    def test_in_flight_requests_stay_under_each_tier_cap(self):
+        for tier, cap in (('lite', 3), ('pro', 1), ('stub-model', 2)):
+            self.stub.reset_counters()
+
+            async def burst():
+                # Distinct prompts, so single flight does not merge them
+                kwargs = {'model_type': tier} if tier in ('lite', 'pro') else {'model': tier}
+                return await asyncio.gather(*(
+                    self.gateway.agenerate(f'prompt {i}', retries=1, **kwargs) for i in range(8)
+                ))
+
+            self.assertEqual(len(self.run_async(burst)), 8)
+            self.assertEqual(self.stub.requests, 8)
+            self.assertEqual(self.stub.max_in_flight, cap, tier)
+
+    def test_tiers_do_not_share_slots(self):
+        async def burst():
+            return await asyncio.gather(*(
+                self.gateway.agenerate(f'{tier} prompt {i}', model_type=tier, retries=1)
+                for i in range(6) for tier in ('lite', 'pro')
+            ))
+
+        self.run_async(burst)
+        self.assertEqual(self.stub.max_in_flight, 4)
+
+    def test_client_and_semaphores_belong_to_one_loop(self):
+        async def state():
+            first = self.gateway._async_state()
+            self.assertIs(self.gateway._async_state(), first)
+            self.assertIs(self.gateway.semaphore('lite'), self.gateway.semaphore('lite'))
+            return first, self.gateway.semaphore('lite')
+
+        client_a, semaphore_a = self.run_async(state)
+        client_b, semaphore_b = self.run_async(state)
+        self.assertIsNot(client_a, client_b)
+        self.assertIsNot(semaphore_a, semaphore_b)
+        self.assertTrue(client_a.client.is_closed)
+
+    def test_backoff_releases_the_slot(self):
+        self.gateway.concurrency = {'lite': 1}
+        finished = []
+
+        async def calls():
+            client = self.gateway._async_state().client
+            post = client.post
+            failures = []
+
+            async def flaky(url, json):
+                if json['contents'][0]['parts'][0]['text'] == 'retried' and not failures:
+                    failures.append(url)
+                    raise httpx.ConnectError('connection refused')
+                return await post(url, json=json)
+
+            async def call(prompt):
+                await self.gateway.agenerate(prompt, model_type='lite', retries=2, delay=0.3)
+                finished.append(prompt)
+
+            with mock.patch.object(client, 'post', side_effect=flaky):
+                await asyncio.gather(call('retried'), call('waiting'))
+
+        with self.assertLogs('core.llm_gateway', 'WARNING'):
+            self.run_async(calls)
+        # The waiting call ran while the first one slept between attempts
+        self.assertEqual(finished, ['waiting', 'retried'])
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(maxsize=2)
+        lru.set('a', (float('inf'), 1))
+        lru.set('b', (float('inf'), 2))
+        lru.get('a')
+        lru.set('c', (float('inf'), 3))
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual([lru.get(key)[1] for key in ('a', 'c')], [1, 3])
+
+    def test_expired_entry_is_a_miss(self):
+        lru = LRUCache()
+        lru.set('a', (0, 1))
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(len(lru), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, LLM_CACHE_STATS_PUSH_INTERVAL=3600)
+class LLMResponseCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.cache = LLMResponseCache()
+        self.key = cache_key('gemini', 'Explain  SQL joins\r\n', temperature=0.2)
+
+    def test_key_ignores_whitespace_but_not_wording(self):
+        self.assertEqual(self.key, cache_key('gemini', ' Explain SQL joins', temperature=0.2))
+        self.assertNotEqual(self.key, cache_key('gemini', 'Explain SQL unions', temperature=0.2))
+        self.assertNotEqual(self.key, cache_key('gemini', 'Explain SQL joins', temperature=0.7))
+
+    def test_miss_then_local_hit_then_shared_hit(self):
+        calls = []
+        generate = lambda: calls.append(1) or {'text': 'joins'}
+
+        self.assertEqual(self.cache.get_or_call(self.key, generate, 'lessons'), {'text': 'joins'})
+        self.assertEqual(self.cache.get_or_call(self.key, generate, 'lessons'), {'text': 'joins'})
+        # Another worker: empty LRU, same shared cache
+        other = LLMResponseCache()
+        self.assertEqual(other.get_or_call(self.key, generate, 'lessons'), {'text': 'joins'})
+        self.assertEqual(other.get(self.key, 'lessons'), {'text': 'joins'})
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats()['lessons'], {
+            'local_hit': 1, 'shared_hit': 0, 'miss': 1, 'hit_rate': 0.5,
+        })
+        self.assertEqual(other.stats()['lessons'], {
+            'local_hit': 1, 'shared_hit': 1, 'miss': 0, 'hit_rate': 1.0,
+        })
+
+    def test_local_hits_make_no_shared_cache_calls(self):
+        self.cache.set(self.key, 'joins', 'lessons')
+        shared = caches['default']
+        with mock.patch.object(shared, 'get') as get, mock.patch.object(shared, 'incr') as incr, \
+                mock.patch.object(shared, 'add') as add:
+            for _ in range(50):
+                self.assertEqual(self.cache.get(self.key, 'lessons'), 'joins')
+        self.assertEqual((get.call_count, add.call_count, incr.call_count), (0, 0, 0))
+
+    def test_counts_reach_the_shared_cache_in_one_push(self):
+        self.cache.set(self.key, 'joins', 'lessons')
+        for _ in range(5):
+            self.cache.get(self.key, 'lessons')
+        self.cache.get('llm:v1:missing', 'lessons')
+        self.assertEqual(LLMResponseCache().stats(shared=True), {})
+
+        shared = caches['default']
+        with mock.patch.object(shared, 'incr', wraps=shared.incr) as incr:
+            report = self.cache.stats(shared=True)
+        self.assertEqual(incr.call_count, 2)
+        self.assertEqual(report['lessons'], {
+            'local_hit': 5, 'shared_hit': 0, 'miss': 1, 'hit_rate': 5 / 6,
+        })
+
+        with override_settings(LLM_CACHE_STATS_PUSH_INTERVAL=0):
+            self.cache.get(self.key, 'lessons')
+        self.assertEqual(LLMResponseCache().stats(shared=True)['lessons']['local_hit'], 6)
+
+    def test_failed_push_keeps_counts(self):
+        self.cache.get(self.key, 'lessons')
+        with mock.patch.object(caches['default'], 'incr', side_effect=ConnectionError):
+            self.cache.push_stats()
+        self.assertEqual(self.cache.stats(shared=True)['lessons']['miss'], 1)
+
+    def test_shared_outage_falls_back_to_the_call(self):
+        shared = caches['default']
+        with mock.patch.object(shared, 'get', side_effect=ConnectionError), \
+                mock.patch.object(shared, 'set', side_effect=ConnectionError), \
+                self.assertLogs('core.llm_cache', 'WARNING'):
+            self.assertEqual(self.cache.get_or_call(self.key, lambda: 'joins', 'lessons'), 'joins')
+            self.assertEqual(self.cache.get(self.key, 'lessons'), 'joins')
+
+    def test_zero_ttl_disables_a_site(self):
+        calls = []
+        with override_settings(LLM_CACHE_TTLS={'lessons': 0}):
+            for _ in range(2):
+                self.cache.get_or_call(self.key, lambda: calls.append(1) or 'joins', 'lessons')
+        self.assertEqual(len(calls), 2)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    LLM_SINGLE_FLIGHT_POLL_INTERVAL=0.01,
+    LLM_SINGLE_FLIGHT_LOCK_TIMEOUT=5,
+)
+class SingleFlightTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.flight = SingleFlight()
+        self.calls = 0
+
+    def slow_call(self, result='reply', delay=0.1):
+        def call():
+            self.calls += 1
+            time.sleep(delay)
+            return result
+        return call
+
+    def run_in_thread(self, call, key='k'):
+        """Start flight.do(key, call) in a thread; returns a dict filled on exit."""
+        outcome = {}
+
+        def run():
+            try:
+                outcome['result'] = self.flight.do(key, call)
+            except Exception as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(thread.join)
+        outcome['thread'] = thread
+        return outcome
+
+    def hold_lock(self, token, key='k'):
+        """Pretend another worker is running the call for key."""
+        caches['default'].set(LOCK_KEY.format(key=key), token)
+
+    def publish(self, token, result, key='k'):
+        caches['default'].set(RESULT_KEY.format(key=key, token=token), (result,))
+
+    def test_concurrent_threads_share_one_call(self):
+        start = threading.Barrier(8)
+        results = []
+
+        def run():
+            start.wait()
+            results.append(self.flight.do('k', self.slow_call()))
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['reply'] * 8)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flight.stats(), {
+            'upstream': 1, 'collapsed_local': 7, 'collapsed_remote': 0,
+        })
+        self.assertIsNone(caches['default'].get(LOCK_KEY.format(key='k')))
+
+    def test_error_reaches_local_waiters_and_releases_the_lock(self):
+        def fail():
+            self.calls += 1
+            time.sleep(0.1)
+            raise ValueError('upstream failed')
+
+        outcomes = [self.run_in_thread(fail) for _ in range(3)]
+        for outcome in outcomes:
+            outcome['thread'].join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(o['error'], ValueError) for o in outcomes))
+        self.assertIsNone(caches['default'].get(LOCK_KEY.format(key='k')))
+
+    def test_waits_for_the_result_of_the_current_holder(self):
+        # An earlier flight's result is still within its TTL
+        self.publish('earlier', 'stale reply')
+        self.hold_lock('current')
+        outcome = self.run_in_thread(self.slow_call())
+
+        time.sleep(0.05)
+        self.publish('current', 'fresh reply')
+        caches['default'].delete(LOCK_KEY.format(key='k'))
+        outcome['thread'].join()
+
+        self.assertEqual(outcome['result'], 'fresh reply')
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(self.flight.stats()['collapsed_remote'], 1)
+
+    def test_later_flight_does_not_reuse_an_earlier_result(self):
+        self.publish('earlier', 'stale reply')
+        self.assertEqual(self.flight.do('k', self.slow_call('fresh reply', 0)), 'fresh reply')
+        self.assertEqual(self.calls, 1)
+
+    def test_takes_over_when_the_holder_gives_up(self):
+        self.hold_lock('other')
+        outcome = self.run_in_thread(self.slow_call())
+        time.sleep(0.05)
+        caches['default'].delete(LOCK_KEY.format(key='k'))
+        outcome['thread'].join()
+
+        self.assertEqual(outcome['result'], 'reply')
+        self.assertEqual(self.calls, 1)
+
+    def test_cache_failure_while_waiting_falls_back_to_the_call(self):
+        self.hold_lock('other')
+        with mock.patch.object(caches['default'], 'get_many', side_effect=ConnectionError), \
+                self.assertLogs('core.single_flight', 'WARNING'):
+            self.assertEqual(self.flight.do('k', self.slow_call(delay=0)), 'reply')
+        self.assertEqual(self.calls, 1)
+
+    def test_async_calls_share_one_call(self):
+        async def call():
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return 'reply'
+
+        async def run():
+            return await asyncio.gather(*(self.flight.ado('k', call) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(run()), ['reply'] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flight.stats()['collapsed_local'], 4)
+
+    def test_async_cache_failure_while_waiting_falls_back_to_the_call(self):
+        self.hold_lock('other')
+
+        async def call():
+            self.calls += 1
+            return 'reply'
+
+        with mock.patch.object(caches['default'], 'aget_many', side_effect=ConnectionError), \
+                self.assertLogs('core.single_flight', 'WARNING'):
+            self.assertEqual(asyncio.run(self.flight.ado('k', call)), 'reply')
+        self.assertEqual(self.calls, 1)
@@ -47,7 +47,8 @@ class InterviewConsumer(AsyncJsonWebsocketConsumer):
         service = InterviewService()
         
         session = await self.get_session()
-        question = await database_sync_to_async(service.generate_first_question)(session)
+        # Native async LLM call: no executor thread is held during the round trip
+        question = await service.agenerate_first_question(session)
         
         # Generate TTS audio
         audio_url = await database_sync_to_async(service.generate_tts_audio)(question)
@@ -70,9 +71,7 @@ class InterviewConsumer(AsyncJsonWebsocketConsumer):
         session = await self.get_session()
         conversation_history = await self.get_conversation_history()
         
-        question = await database_sync_to_async(service.generate_follow_up_question)(
-            session, conversation_history
-        )
+        question = await service.agenerate_follow_up_question(session, conversation_history)
         
         audio_url = await database_sync_to_async(service.generate_tts_audio)(question)
         await self.save_interview_turn('interviewer', question, audio_url)
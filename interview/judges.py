@@ -1,3 +1,5 @@
+import asyncio
+
 from core.gemini_service import GeminiService
 
 class BaseJudge:
@@ -8,8 +10,8 @@ class BaseJudge:
     MODEL = "gemini-1.5-pro"
     SCORE_RANGE = (0.0, 1.0)
 
-    def __init__(self):
-        self.llm = GeminiService()
+    def __init__(self, llm=None):
+        self.llm = llm or GeminiService()
 
     async def judge(self, conversation):
         raise NotImplementedError("Judge must implement judge()")
@@ -116,15 +118,18 @@ class InterviewJudgePanel:
     Runs all judges and aggregates result
     """
 
-    def __init__(self):
-        self.technical = TechnicalJudge()
-        self.behavioral = BehavioralJudge()
-        self.structural = StructuralJudge()
+    def __init__(self, llm=None):
+        self.technical = TechnicalJudge(llm)
+        self.behavioral = BehavioralJudge(llm)
+        self.structural = StructuralJudge(llm)
 
     async def evaluate(self, conversation):
-        tech = await self.technical.judge(conversation)
-        beh = await self.behavioral.judge(conversation)
-        struct = await self.structural.judge(conversation)
+        # Independent verdicts, so the three calls run concurrently
+        tech, beh, struct = await asyncio.gather(
+            self.technical.judge(conversation),
+            self.behavioral.judge(conversation),
+            self.structural.judge(conversation),
+        )
 
         overall_score = round(
             (tech["score"] + beh["score"] + struct["score"]) / 3, 2
@@ -1,3 +1,10 @@
+import uuid
+
+from channels.db import database_sync_to_async
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from google.cloud import texttospeech
+
 from core.gemini_service import GeminiService
 from .models import ConversationSession, InterviewTurn
 
@@ -5,9 +12,8 @@ class InterviewService:
     def __init__(self):
         self.gemini = GeminiService()
     
-    def generate_first_question(self, session):
-        """Generate opening question based on job description."""
-        prompt = f"""You are conducting a job interview.
+    def first_question_prompt(self, session):
+        return f"""You are conducting a job interview.
 
 **Role**: {session.occupation.preferred_label if session.occupation else 'General'}
 **Job Description**: {session.job_description or 'Standard interview'}
@@ -21,19 +27,27 @@ Generate an opening ice-breaker question that:
 
 Respond with ONLY the question text, no preamble.
 """
-        
+
+    def generate_first_question(self, session):
+        """Generate opening question based on job description."""
+        prompt = self.first_question_prompt(session)
         question = self.gemini.generate_with_retry(prompt, model_type='flash')
         return question.strip()
+
+    async def agenerate_first_question(self, session):
+        """generate_first_question for async consumers; only the prompt needs the ORM."""
+        prompt = await database_sync_to_async(self.first_question_prompt)(session)
+        question = await self.gemini.agenerate_with_retry(prompt, model_type='flash')
+        return question.strip()
     
-    def generate_follow_up_question(self, session, conversation_history):
-        """Generate contextual follow-up question."""
+    def follow_up_prompt(self, session, conversation_history):
         # Format history
         history_text = "\n".join([
             f"{'Interviewer' if turn.speaker == 'interviewer' else 'Candidate'}: {turn.text_content}"
             for turn in conversation_history[-6:]  # Last 3 exchanges
         ])
         
-        prompt = f"""You are conducting a job interview.
+        return f"""You are conducting a job interview.
 
 **Role**: {session.occupation.preferred_label if session.occupation else 'General'}
 **Question #{session.current_question_number + 1}** of {session.target_question_count}
@@ -56,19 +70,18 @@ Question types to mix:
 
 Respond with ONLY the question, no preamble.
 """
-        
+
+    def generate_follow_up_question(self, session, conversation_history):
+        """Generate contextual follow-up question."""
+        prompt = self.follow_up_prompt(session, conversation_history)
         question = self.gemini.generate_with_retry(prompt, model_type='flash')
         return question.strip()
-    
 
-from google.cloud import texttospeech
-import base64
-from django.core.files.base import ContentFile
-from django.core.files.storage import default_storage
+    async def agenerate_follow_up_question(self, session, conversation_history):
+        prompt = await database_sync_to_async(self.follow_up_prompt)(session, conversation_history)
+        question = await self.gemini.agenerate_with_retry(prompt, model_type='flash')
+        return question.strip()
 
-class InterviewService:
-    # ... previous methods ...
-    
     def generate_tts_audio(self, text):
         """Generate audio for interviewer question using Google Cloud TTS."""
         try:
@@ -1,52 +1,50 @@
+import asyncio
+
 from celery import shared_task
 from .models import ConversationSession, InterviewEvaluation
-from .judges import TechnicalJudge, BehavioralJudge, StructuralJudge
+from .judges import InterviewJudgePanel
 from core.gemini_service import GeminiService
 
 @shared_task
 def evaluate_interview_task(session_id):
     """Celery task for three-judge evaluation."""
     session = ConversationSession.objects.get(id=session_id)
-    turns = session.turns.all()
+    conversation = [
+        {'speaker': turn.speaker, 'text': turn.text_content}
+        for turn in session.turns.order_by('turn_number')
+    ]
     
     gemini = GeminiService()
     
-    # Three judges evaluate independently
-    tech_judge = TechnicalJudge(gemini)
-    tech_eval = tech_judge.evaluate(session, turns)
-    
-    behav_judge = BehavioralJudge(gemini)
-    behav_eval = behav_judge.evaluate(session, turns)
+    async def run_panel():
+        try:
+            # Three judges evaluate independently (and concurrently)
+            return await InterviewJudgePanel(gemini).evaluate(conversation)
+        finally:
+            # The async client belongs to this short-lived event loop
+            await gemini.gateway.aclose()
     
-    struct_judge = StructuralJudge(gemini)
-    struct_eval = struct_judge.evaluate(session, turns)
+    panel = asyncio.run(run_panel())
     
     # Weighted aggregate score
     overall_score = (
-        tech_eval['score'] * 0.40 +
-        behav_eval['score'] * 0.35 +
-        struct_eval['score'] * 0.25
-    )
-    
-    # Combine improvement areas
-    improvement_areas = (
-        tech_eval.get('weaknesses', []) +
-        behav_eval.get('weaknesses', []) +
-        struct_eval.get('weaknesses', [])
+        panel['technical_score'] * 0.40 +
+        panel['behavioral_score'] * 0.35 +
+        panel['structural_score'] * 0.25
     )
     
     # Create evaluation record
     InterviewEvaluation.objects.create(
         session=session,
-        technical_score=tech_eval['score'],
-        behavioral_score=behav_eval['score'],
-        structural_score=struct_eval['score'],
+        technical_score=panel['technical_score'],
+        behavioral_score=panel['behavioral_score'],
+        structural_score=panel['structural_score'],
         overall_score=overall_score,
-        technical_feedback=tech_eval,
-        behavioral_feedback=behav_eval,
-        structural_feedback=struct_eval,
+        technical_feedback=panel['technical_feedback'],
+        behavioral_feedback=panel['behavioral_feedback'],
+        structural_feedback=panel['structural_feedback'],
         overall_feedback=f"Overall interview performance: {overall_score * 100:.1f}%",
-        improvement_areas=improvement_areas[:5]  # Top 5
+        improvement_areas=panel['improvement_areas'][:5]  # Top 5
     )
     
     session.status = 'evaluated'
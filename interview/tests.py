@@ -0,0 +1,83 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.gemini_service import GeminiService
+from core.llm_gateway import LLMGateway
+from core.llm_stub import StubGeminiServer
+from interview.judges import InterviewJudgePanel
+from interview.models import ConversationSession, InterviewEvaluation, InterviewTurn
+from interview.tasks import evaluate_interview_task
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+VERDICT = {
+    'score': 0.6,
+    'feedback': {'weaknesses': ['depth'], 'concerns': ['pace'], 'needs_improvement': ['order']},
+}
+
+CONVERSATION = [
+    {'speaker': 'interviewer', 'text': 'What is an index?'},
+    {'speaker': 'candidate', 'text': 'A structure that speeds up lookups.'},
+]
+
+
+class StubbedGatewayMixin:
+    """Judges talk to a local Gemini stub that answers every call with VERDICT."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.stub = StubGeminiServer(latency=0.1, reply=json.dumps(VERDICT))
+        self.stub.start()
+        self.addCleanup(self.stub.stop)
+        self.gateway = LLMGateway(api_key='stub', base_url=self.stub.base_url)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class InterviewJudgePanelTests(StubbedGatewayMixin, SimpleTestCase):
+
+    def test_judges_run_concurrently(self):
+        async def evaluate():
+            try:
+                return await InterviewJudgePanel(GeminiService(self.gateway)).evaluate(CONVERSATION)
+            finally:
+                await self.gateway.aclose()
+
+        panel = asyncio.run(evaluate())
+
+        self.assertEqual(self.stub.requests, 3)
+        self.assertEqual(self.stub.max_in_flight, 3)
+        self.assertEqual(panel['overall_score'], 0.6)
+        self.assertEqual(panel['technical_feedback'], VERDICT['feedback'])
+        self.assertEqual(panel['improvement_areas'], ['depth', 'pace', 'order'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EvaluateInterviewTaskTests(StubbedGatewayMixin, TestCase):
+
+    def test_task_stores_the_weighted_evaluation(self):
+        user = get_user_model().objects.create_user(username='candidate', password='x')
+        session = ConversationSession.objects.create(user=user, status='completed')
+        InterviewTurn.objects.bulk_create([
+            InterviewTurn(session=session, turn_number=i, speaker=turn['speaker'],
+                          text_content=turn['text'])
+            for i, turn in enumerate(CONVERSATION, start=1)
+        ])
+
+        with mock.patch('interview.tasks.GeminiService', return_value=GeminiService(self.gateway)), \
+                mock.patch.object(self.gateway, 'aclose', wraps=self.gateway.aclose) as aclose:
+            evaluate_interview_task(session.id)
+
+        evaluation = InterviewEvaluation.objects.get(session=session)
+        self.assertAlmostEqual(evaluation.overall_score, 0.6)
+        self.assertEqual(evaluation.improvement_areas, ['depth', 'pace', 'order'])
+        self.assertEqual(self.stub.max_in_flight, 3)
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'evaluated')
+        # The async client is closed inside the task's own event loop
+        aclose.assert_awaited_once()
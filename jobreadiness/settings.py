@@ -124,6 +124,27 @@ STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ==============================
+# CACHE
+# ==============================
+# Per-process LocMem unless REDIS_URL is set. Cross-worker invalidation
+# (item banks, graph and embedding indexes) and the shared LLM cache tier
+# need a shared backend, so set REDIS_URL in multi-worker deployments.
+REDIS_URL = env('REDIS_URL', default=None)
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # ==============================
 # CELERY
 # ==============================
@@ -149,6 +170,53 @@ GEMINI_MODEL_LITE = "models/gemini-pro"
 GEMINI_MODEL_FLASH = "models/gemini-pro"
 GEMINI_MODEL_PRO = "models/gemini-pro"
 
+# One pooled keep-alive HTTP session per process (core.llm_gateway)
+GEMINI_API_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+LLM_HTTP_POOL_MAXSIZE = 10
+LLM_HTTP_TIMEOUT = (5, 120)  # (connect, read) seconds
+# Cap on in-flight async requests per model tier and event loop; an explicit
+# model outside these tiers uses 'default'
+LLM_ASYNC_CONCURRENCY = {'lite': 32, 'flash': 16, 'pro': 8, 'default': 8}
+
+# LLM response cache (core.llm_cache): per-process LRU in front of the
+# LLM_CACHE_ALIAS cache. TTLs in seconds per call site; 0 disables a site
+LLM_CACHE_ENABLED = True
+LLM_CACHE_ALIAS = 'default'
+LLM_CACHE_LOCAL_MAXSIZE = 1024
+# Seconds between pushes of a worker's hit/miss counts to the shared cache
+LLM_CACHE_STATS_PUSH_INTERVAL = 10
+LLM_CACHE_TTLS = {
+    'default': 60 * 60,
+    'macro_plan': 6 * 60 * 60,
+    'lessons': 7 * 24 * 60 * 60,
+    'cfu_quiz': 7 * 24 * 60 * 60,
+}
+
+# Single-flight: identical in-flight LLM requests share one upstream call,
+# across workers through a cache.add lock (core.single_flight). The lock
+# outlives the read timeout; the shared result only needs to reach waiters
+LLM_SINGLE_FLIGHT_ENABLED = True
+LLM_SINGLE_FLIGHT_ALIAS = None  # defaults to LLM_CACHE_ALIAS
+LLM_SINGLE_FLIGHT_LOCK_TIMEOUT = 150
+LLM_SINGLE_FLIGHT_RESULT_TTL = 30
+LLM_SINGLE_FLIGHT_POLL_INTERVAL = 0.1
+
+# Reorder generated study-plan modules so prerequisite skills come first
+# (skills.graph.SkillGraph.order); off keeps the model's "order"
+LEARNING_ORDER_MODULES_BY_PREREQUISITES = False
+
+# Semantic cache for lesson / CFU generation (learning.semantic_cache), opt-in.
+# Backend defaults to SKILL_EMBEDDING_BACKEND
+LEARNING_SEMANTIC_CACHE_ENABLED = False
+LEARNING_SEMANTIC_CACHE_BACKEND = None
+LEARNING_SEMANTIC_CACHE_THRESHOLD = 0.92
+# USD per million (input, output) tokens, for the cost-saved report
+LLM_TOKEN_PRICES = {
+    'lite': (0.075, 0.30),
+    'flash': (0.30, 2.50),
+    'pro': (1.25, 10.00),
+}
+
 # =========================
 # IRT Configuration
 # =========================
@@ -156,3 +224,56 @@ GEMINI_MODEL_PRO = "models/gemini-pro"
 IRT_CONVERGENCE_THRESHOLD = 0.3
 IRT_MAX_QUESTIONS = 30
 
+# newton | eap | map | bounded (legacy scipy path)
+IRT_THETA_ESTIMATOR = 'newton'
+IRT_QUADRATURE_POINTS = 81
+IRT_PRIOR_MEAN = 0.0
+IRT_PRIOR_SD = 1.0
+
+# Item selection: none | randomesque | sympson_hetter
+IRT_EXPOSURE_CONTROL = 'randomesque'
+IRT_RANDOMESQUE_K = 5
+IRT_MAX_EXPOSURE_RATE = 0.25
+# Relative weight per QuestionBank.content_area; unlisted areas weigh 1.0
+IRT_CONTENT_TARGETS = {}
+# Seconds before a worker reloads a cached item bank (refreshes times_used)
+IRT_ITEM_BANK_MAX_AGE = 300
+
+# Batch MML calibration (assessment.calibration.MMLCalibrator options)
+IRT_CALIBRATION = {
+    'chunk_size': 50000,
+    'max_iter': 20,
+    'min_responses': 50,
+}
+
+# QuestionBank usage counters: atomic (F() update per answer) | buffered
+# (per-process, flushed every IRT_USAGE_FLUSH_INTERVAL seconds; a killed
+# process loses what it had not flushed)
+IRT_USAGE_COUNTER_MODE = 'atomic'
+IRT_USAGE_FLUSH_INTERVAL = 5.0
+
+# Skill criticality factor (skills.graph_metrics): 1 + direct * (direct
+# prerequisites + dependents) + transitive * (indirect ones) + centrality * n * PageRank
+SKILL_CRITICALITY_WEIGHTS = {
+    'direct': 0.1,
+    'transitive': 0.0,
+    'centrality': 0.0,
+}
+
+# Skill embedding index (skills.embedding_index): SkillEmbedding.model_name
+# to search, and where the memory-mappable sidecar files are kept
+SKILL_EMBEDDING_MODEL = 'text-embedding-004'
+SKILL_EMBEDDING_INDEX_DIR = BASE_DIR / 'indexes' / 'skill_embeddings'
+# Embedding backend for the skill pipeline: gemini | hashing (local, offline)
+SKILL_EMBEDDING_BACKEND = 'gemini'
+SKILL_EMBEDDING_BATCH_SIZE = 100
+SKILL_EMBEDDING_CONCURRENCY = 4
+
+# Skill-name resolution for LLM output (skills.resolver)
+SKILL_RESOLVER_MIN_SCORE = 0.5
+# Fall back to the embedding index for names no label matches. Off by
+# default: each plan generation with an unmatched name makes one
+# embedding call to SKILL_EMBEDDING_BACKEND (a Gemini request here), and
+# a worker's first fallback loads the whole embedding index
+SKILL_RESOLVER_EMBEDDING_FALLBACK = False
+SKILL_RESOLVER_MIN_SIMILARITY = 0.75
@@ -5,5 +5,6 @@ from django.urls import path, include
 urlpatterns = [
        path("admin/", admin.site.urls),
        path("api/", include("users.urls")),
+       path("api/", include("skills.urls")),
    ]
 
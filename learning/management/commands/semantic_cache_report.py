@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from learning.semantic_cache import cost_report
+
+
+class Command(BaseCommand):
+    help = 'Report reuse and estimated cost saved by the lesson / CFU semantic cache'
+
+    def handle(self, *args, **options):
+        report = cost_report()
+        for kind, row in report.items():
+            self.stdout.write(
+                f"{kind}: {row['entries']} stored generations, {row['hits']} reuses, "
+                f"${row['saved_usd']:.4f} saved"
+            )
+
+        hits = sum(row['hits'] for row in report.values())
+        saved = sum(row['saved_usd'] for row in report.values())
+        self.stdout.write(
+            self.style.SUCCESS(f"{hits} generations served from the semantic cache, ${saved:.4f} saved")
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0004_cfuattempt_alter_learningmodule_order_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SemanticCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('lessons', 'Module lessons'), ('cfu_quiz', 'CFU quiz')], max_length=20)),
+                ('key_text', models.TextField(help_text='Prompt fields that were embedded')),
+                ('embedding_model', models.CharField(max_length=100)),
+                ('vector', models.JSONField(default=list)),
+                ('response', models.JSONField(default=dict)),
+                ('estimated_cost', models.FloatField(default=0.0, help_text='Estimated USD of one generation')),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'semantic_cache_entries',
+                'indexes': [models.Index(fields=['kind', 'embedding_model'], name='semantic_ca_kind_2c4b0e_idx')],
+            },
+        ),
+    ]
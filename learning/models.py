@@ -226,3 +226,37 @@ class Remediation(models.Model):
 
     class Meta:
         db_table = 'remediations'
+
+
+# -----------------------------
+# Semantic generation cache
+# -----------------------------
+class SemanticCacheEntry(models.Model):
+    """A past lesson / CFU generation, reusable for near-identical inputs."""
+
+    KIND_CHOICES = [
+        ('lessons', 'Module lessons'),
+        ('cfu_quiz', 'CFU quiz'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    key_text = models.TextField(help_text='Prompt fields that were embedded')
+    embedding_model = models.CharField(max_length=100)
+    vector = models.JSONField(default=list)
+    response = models.JSONField(default=dict)
+
+    # Cost accounting
+    estimated_cost = models.FloatField(default=0.0, help_text='Estimated USD of one generation')
+    hits = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'semantic_cache_entries'
+        indexes = [
+            models.Index(fields=['kind', 'embedding_model']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.key_text[:50]}"
@@ -0,0 +1,217 @@
+import json
+import logging
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from skills.embedding_index import EmbeddingIndex
+from skills.embeddings import get_embedder
+from .models import SemanticCacheEntry
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'learning:semantic_cache_version:{kind}:{model_name}'
+
+# USD per million (input, output) tokens, used only for the savings report
+DEFAULT_TOKEN_PRICES = {
+    'lite': (0.075, 0.30),
+    'flash': (0.30, 2.50),
+    'pro': (1.25, 10.00),
+}
+CHARS_PER_TOKEN = 4
+
+
+def estimate_cost(model_type, prompt, response_text):
+    """Rough USD cost of one generation from prompt and reply length."""
+    prices = {**DEFAULT_TOKEN_PRICES, **getattr(settings, 'LLM_TOKEN_PRICES', {})}
+    input_price, output_price = prices.get(model_type, prices['lite'])
+    return (
+        len(prompt) / CHARS_PER_TOKEN * input_price
+        + len(response_text) / CHARS_PER_TOKEN * output_price
+    ) / 1_000_000
+
+
+class SemanticIndexCache:
+    """
+    Per-process EmbeddingIndex over SemanticCacheEntry vectors, one per
+    (kind, embedding model), versioned like EmbeddingIndexCache. The
+    version is a counter: adding an entry bumps it with one atomic incr.
+    If the bump lands right after the version this process loaded, the
+    entry is added to the local index in place. Otherwise another process
+    added an entry in between, and the local index is dropped and reloads.
+    Other processes see the new version and reload.
+    """
+
+    _indexes = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(kind, model_name):
+        return VERSION_KEY.format(kind=kind, model_name=model_name)
+
+    @staticmethod
+    def load(kind, model_name):
+        rows = SemanticCacheEntry.objects.filter(
+            kind=kind, embedding_model=model_name
+        ).values_list('id', 'vector')
+        ids, vectors = [], []
+        for entry_id, vector in rows.iterator(chunk_size=2000):
+            if vector:
+                ids.append(entry_id)
+                vectors.append(vector)
+        return EmbeddingIndex(
+            ids, np.asarray(vectors, dtype=np.float32) if vectors else None, model_name=model_name
+        )
+
+    @classmethod
+    def _entry(cls, kind, model_name):
+        version = cache.get(cls._version_key(kind, model_name))
+        entry = cls._indexes.get((kind, model_name))
+        if entry is not None and entry[0] == version:
+            return entry
+
+        entry = (version, cls.load(kind, model_name))
+        with cls._lock:
+            cls._indexes[kind, model_name] = entry
+        return entry
+
+    @classmethod
+    def get(cls, kind, model_name):
+        return cls._entry(kind, model_name)[1]
+
+    @classmethod
+    def add(cls, kind, model_name, entry_id, vector):
+        version, index = cls._entry(kind, model_name)
+        key = cls._version_key(kind, model_name)
+        cache.add(key, 0, timeout=None)
+        bumped = cache.incr(key)
+
+        with cls._lock:
+            if bumped == (version or 0) + 1:
+                index.add([entry_id], np.atleast_2d(vector))
+                cls._indexes[kind, model_name] = (bumped, index)
+            else:
+                cls._indexes.pop((kind, model_name), None)
+
+    @classmethod
+    def search(cls, kind, model_name, vector):
+        """(entry_id, score) of the nearest stored generation, or (None, 0.0)."""
+        index = cls.get(kind, model_name)
+        with cls._lock:
+            ids, scores = index.search(np.atleast_2d(vector), k=1)
+        if not ids.shape[1]:
+            return None, 0.0
+        return int(ids[0, 0]), float(scores[0, 0])
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._indexes.clear()
+
+
+class SemanticCache:
+    """
+    Reuses a past generation when a new request's key fields (module
+    title and description, lesson title and objectives) embed within
+    LEARNING_SEMANTIC_CACHE_THRESHOLD cosine similarity of a stored one.
+
+    Opt-in through LEARNING_SEMANTIC_CACHE_ENABLED. Each entry records an
+    estimated generation cost and its hit count, so cost_report() can sum
+    what reuse has saved. A failing embedding backend only disables the
+    cache for that call.
+    """
+
+    def __init__(self, kind, embedder=None, threshold=None):
+        self.kind = kind
+        self.embedder = embedder
+        self.threshold = threshold or getattr(settings, 'LEARNING_SEMANTIC_CACHE_THRESHOLD', 0.92)
+
+    @staticmethod
+    def enabled():
+        return getattr(settings, 'LEARNING_SEMANTIC_CACHE_ENABLED', False)
+
+    def _embedder(self):
+        if self.embedder is None:
+            self.embedder = get_embedder(getattr(settings, 'LEARNING_SEMANTIC_CACHE_BACKEND', None))
+        return self.embedder
+
+    def lookup(self, key_text):
+        """(entry or None, similarity, query vector)."""
+        embedder = self._embedder()
+        vector = embedder.embed([key_text])[0]
+        entry_id, score = SemanticIndexCache.search(self.kind, embedder.model_name, vector)
+        if entry_id is None or score < self.threshold:
+            return None, score, vector
+
+        updated = SemanticCacheEntry.objects.filter(pk=entry_id).update(
+            hits=F('hits') + 1, last_hit_at=timezone.now()
+        )
+        if not updated:
+            # Deleted since this process loaded its index
+            SemanticIndexCache.clear()
+            return None, score, vector
+        return SemanticCacheEntry.objects.get(pk=entry_id), score, vector
+
+    def store(self, key_text, vector, response, estimated_cost=0.0):
+        model_name = self._embedder().model_name
+        entry = SemanticCacheEntry.objects.create(
+            kind=self.kind,
+            key_text=key_text,
+            embedding_model=model_name,
+            vector=np.asarray(vector, dtype=np.float32).tolist(),
+            response=response,
+            estimated_cost=estimated_cost,
+        )
+        SemanticIndexCache.add(self.kind, model_name, entry.id, vector)
+        return entry
+
+    def get_or_generate(self, key_text, generate, prompt, model_type='lite'):
+        """
+        Stored response for a similar key_text, or generate() stored under
+        this one. Returns (response, hit).
+        """
+        if not self.enabled():
+            return generate(), False
+
+        try:
+            entry, score, vector = self.lookup(key_text)
+        except Exception:
+            logger.exception("Semantic cache lookup failed for %s", self.kind)
+            return generate(), False
+
+        if entry is not None:
+            logger.info("Semantic cache hit for %s (similarity %.3f)", self.kind, score)
+            return entry.response, True
+
+        response = generate()
+        try:
+            self.store(
+                key_text, vector, response,
+                estimated_cost=estimate_cost(model_type, prompt, json.dumps(response)),
+            )
+        except Exception:
+            logger.exception("Could not store semantic cache entry for %s", self.kind)
+        return response, False
+
+
+def cost_report():
+    """{kind: {entries, hits, saved_usd}} over all stored generations."""
+    rows = SemanticCacheEntry.objects.values('kind').annotate(
+        entries=Count('id'),
+        total_hits=Sum('hits'),
+        saved_usd=Sum(Cast('hits', FloatField()) * F('estimated_cost')),
+    ).order_by('kind')
+    return {
+        row['kind']: {
+            'entries': row['entries'],
+            'hits': row['total_hits'] or 0,
+            'saved_usd': row['saved_usd'] or 0.0,
+        }
+        for row in rows
+    }
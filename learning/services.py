@@ -1,4 +1,5 @@
 import json
+from django.conf import settings
 from django.db import transaction
 
 from core.gemini_service import GeminiService
@@ -10,7 +11,9 @@ from .models import (
     Remediation
 )
 from assessment.services import AssessmentService
-from skills.models import Skill
+from skills.graph import SkillGraphCache
+from skills.resolver import resolve_skills
+from .semantic_cache import SemanticCache
 
 
 class StudyPlanService:
@@ -90,25 +93,36 @@ Return ONLY valid JSON.
             study_plan.generation_prompt = prompt
             study_plan.save()
 
-            response = self.gemini.generate_with_retry(
-                prompt, model_type="pro"
+            data = self.gemini.generate_json(
+                prompt, model_type="pro", cache_as="macro_plan"
             )
-            data = self.gemini.parse_json_response(response)
 
             modules = data.get("modules", [])
+            skills = resolve_skills(
+                [m.get("primary_skill", "") for m in modules]
+            )
+            orders = [m["order"] for m in modules]
 
-            for m in modules:
-                skill = Skill.objects.filter(
-                    preferred_label__icontains=m.get("primary_skill", "")
-                ).first()
+            # Opt-in: modules on a skill's prerequisites come before that
+            # skill's module, overriding the model's order
+            if getattr(settings, 'LEARNING_ORDER_MODULES_BY_PREREQUISITES', False):
+                ranked = sorted(
+                    range(len(modules)), key=lambda i: modules[i].get("order", 0)
+                )
+                ranked = [ranked[k] for k in SkillGraphCache.get().order(
+                    [skills[i].id if skills[i] else None for i in ranked]
+                )]
+                for order, i in enumerate(ranked, start=1):
+                    orders[i] = order
 
+            for m, skill, order in zip(modules, skills, orders):
                 LearningModule.objects.create(
                     study_plan=study_plan,
                     title=m["title"],
                     description=m["description"],
                     primary_skill=skill,
                     estimated_hours=m["estimated_hours"],
-                    order=m["order"]
+                    order=order
                 )
 
             study_plan.status = "ready"
@@ -147,10 +161,15 @@ Return ONLY valid JSON.
     def generate_lessons_for_module(self, module):
         prompt = self.create_lesson_prompt(module)
 
-        response = self.gemini.generate_with_retry(
-            prompt, model_type="lite"
+        # The exact response cache is checked first; the key text is only
+        # embedded for the semantic cache when that misses
+        data = self.gemini.generate_json(
+            prompt, model_type="lite", cache_as="lessons",
+            on_miss=lambda call: SemanticCache("lessons").get_or_generate(
+                f"{module.title}\n{module.description}", call,
+                prompt=prompt, model_type="lite",
+            )[0],
         )
-        data = self.gemini.parse_json_response(response)
 
         created = []
 
@@ -210,10 +229,14 @@ Rules:
     def generate_cfu_quiz(self, lesson):
         prompt = self.create_cfu_quiz_prompt(lesson)
 
-        response = self.gemini.generate_with_retry(
-            prompt, model_type="lite"
+        objectives = "\n".join(lesson.learning_objectives or [])
+        data = self.gemini.generate_json(
+            prompt, model_type="lite", cache_as="cfu_quiz",
+            on_miss=lambda call: SemanticCache("cfu_quiz").get_or_generate(
+                f"{lesson.title}\n{objectives}", call,
+                prompt=prompt, model_type="lite",
+            )[0],
         )
-        data = self.gemini.parse_json_response(response)
 
         questions = data.get("questions", [])
 
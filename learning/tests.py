@@ -0,0 +1,149 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from core.gemini_service import GeminiService
+from core.llm_cache import LLMResponseCache
+from learning.models import LearningModule, SemanticCacheEntry, StudyPlan
+from learning.semantic_cache import SemanticIndexCache
+from learning.services import StudyPlanService
+from skills.embeddings import HashingEmbedder
+from skills.models import Occupation
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+LESSONS = {'lessons': [{
+    'title': 'Joins', 'content': 'INNER and OUTER joins', 'learning_objectives': ['Join tables'],
+    'estimated_minutes': 30, 'order': 1,
+}]}
+
+
+class FakeGateway:
+    """Counts generate() calls and answers every prompt with LESSONS."""
+
+    def __init__(self):
+        self.calls = 0
+
+    @staticmethod
+    def model_for(model_type):
+        return f'stub-{model_type}'
+
+    def generate(self, prompt, model_type='lite', **kwargs):
+        self.calls += 1
+        return json.dumps(LESSONS)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    LEARNING_SEMANTIC_CACHE_ENABLED=True,
+    LEARNING_SEMANTIC_CACHE_BACKEND='hashing',
+)
+class LessonGenerationCacheTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        SemanticIndexCache.clear()
+        self.addCleanup(SemanticIndexCache.clear)
+        self.gateway = FakeGateway()
+        self.service = StudyPlanService()
+        self.service.gemini = GeminiService(gateway=self.gateway, cache=LLMResponseCache())
+
+        user = get_user_model().objects.create_user(username='learner', password='x')
+        occupation = Occupation.objects.create(preferred_label='Data Analyst')
+        self.plan = StudyPlan.objects.create(user=user, target_occupation=occupation)
+
+    def module(self, order, description='Querying tables with SQL'):
+        return LearningModule.objects.create(
+            study_plan=self.plan, title='Intro to SQL', description=description, order=order
+        )
+
+    def test_exact_hit_skips_the_embedding(self):
+        with mock.patch.object(HashingEmbedder, 'embed', autospec=True,
+                               side_effect=HashingEmbedder.embed) as embed:
+            self.service.generate_lessons_for_module(self.module(1))
+            self.assertEqual((self.gateway.calls, embed.call_count), (1, 1))
+
+            # Same prompt: served by the exact response cache
+            lessons = self.service.generate_lessons_for_module(self.module(2))
+            self.assertEqual((self.gateway.calls, embed.call_count), (1, 1))
+
+        self.assertEqual([lesson.title for lesson in lessons], ['Joins'])
+        self.assertEqual(SemanticCacheEntry.objects.get().hits, 0)
+
+    def test_exact_miss_falls_back_to_the_semantic_cache(self):
+        self.service.generate_lessons_for_module(self.module(1))
+
+        # A different prompt whose key text embeds to the same vector
+        with mock.patch.object(HashingEmbedder, 'embed', autospec=True,
+                               side_effect=HashingEmbedder.embed) as embed:
+            lessons = self.service.generate_lessons_for_module(
+                self.module(2, description='Querying tables with SQL.')
+            )
+        self.assertEqual((self.gateway.calls, embed.call_count), (1, 1))
+        self.assertEqual([lesson.title for lesson in lessons], ['Joins'])
+        self.assertEqual(SemanticCacheEntry.objects.get().hits, 1)
+
+    def test_semantic_cache_off_still_uses_the_exact_cache(self):
+        with override_settings(LEARNING_SEMANTIC_CACHE_ENABLED=False), \
+                mock.patch.object(HashingEmbedder, 'embed') as embed:
+            self.service.generate_lessons_for_module(self.module(1))
+            self.service.generate_lessons_for_module(self.module(2))
+        self.assertEqual((self.gateway.calls, embed.call_count), (1, 0))
+        self.assertFalse(SemanticCacheEntry.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SemanticIndexCacheTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        SemanticIndexCache.clear()
+        self.addCleanup(SemanticIndexCache.clear)
+
+    def worker(self):
+        """Run as a separate process: its own per-process indexes, the same shared cache."""
+        return mock.patch.object(SemanticIndexCache, '_indexes', {})
+
+    def store(self, key_text, vector):
+        entry = SemanticCacheEntry.objects.create(
+            kind='lessons', key_text=key_text, embedding_model='m', vector=vector
+        )
+        SemanticIndexCache.add('lessons', 'm', entry.id, vector)
+        return entry
+
+    def test_add_keeps_the_local_index_current(self):
+        SemanticIndexCache.get('lessons', 'm')
+        entry = self.store('a', [1.0, 0.0])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(SemanticIndexCache.search('lessons', 'm', [1.0, 0.1])[0], entry.id)
+
+    def test_concurrent_adds_lose_no_entry(self):
+        shared = caches['default']
+        get = shared.get
+        interleaved = []
+
+        def get_then_another_worker_stores(*args, **kwargs):
+            # Another worker stores its entry right after this add reads the version
+            value = get(*args, **kwargs)
+            if not interleaved:
+                interleaved.append(None)
+                with self.worker():
+                    interleaved.append(self.store('a', [1.0, 0.0]))
+            return value
+
+        with self.worker():
+            SemanticIndexCache.get('lessons', 'm')
+            with mock.patch.object(shared, 'get', side_effect=get_then_another_worker_stores):
+                second = self.store('b', [0.0, 1.0])
+            first = interleaved[1]
+
+            self.assertEqual(SemanticIndexCache.search('lessons', 'm', [1.0, 0.0])[0], first.id)
+            self.assertEqual(len(SemanticIndexCache.get('lessons', 'm')), 2)
+
+        with self.worker():
+            self.assertEqual(SemanticIndexCache.search('lessons', 'm', [0.0, 1.0])[0], second.id)
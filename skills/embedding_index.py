@@ -0,0 +1,325 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import SkillEmbedding
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'skills:embedding_index_version:{model_name}'
+DEFAULT_EMBEDDING_MODEL = 'text-embedding-004'
+
+
+def new_version():
+    """Version stamp that sorts by creation time: '<ns>-<random>'."""
+    return f'{time.time_ns():020d}-{uuid.uuid4().hex[:8]}'
+
+
+def version_order(version):
+    """Creation time of a version stamp; 0 for stamps without one."""
+    try:
+        return int(version.split('-', 1)[0])
+    except ValueError:
+        return 0
+
+
+def normalize(vectors):
+    """Unit-length float32 rows; zero rows stay zero."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+class EmbeddingIndex:
+    """
+    Exact cosine nearest-neighbour index over skill embeddings.
+
+    Vectors live L2-normalized in one contiguous float32 matrix, so a
+    batch of queries is a single matrix product followed by a top-k
+    argpartition per query. Rows are kept in insertion order with spare
+    capacity for adds; removing a row moves the last row into its place.
+
+    The matrix can be saved to a sidecar directory (vectors.npy, ids.npy,
+    meta.json) and loaded back memory-mapped, so every worker shares the
+    same pages. A memory-mapped index is copied into memory on its first
+    add or remove.
+    """
+
+    def __init__(self, ids, vectors, model_name=DEFAULT_EMBEDDING_MODEL, dim=None):
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids):
+            vectors = normalize(vectors)
+            dim = vectors.shape[1]
+        else:
+            vectors = np.zeros((0, dim or 0), dtype=np.float32)
+
+        self.model_name = model_name
+        self.dim = int(dim or 0)
+        self._ids = ids
+        self._matrix = vectors
+        self._size = len(ids)
+        self._rows = {skill_id: row for row, skill_id in enumerate(ids.tolist())}
+
+    # ---------- CONSTRUCTION ----------
+    @classmethod
+    def from_database(cls, model_name=DEFAULT_EMBEDDING_MODEL, chunk_size=2000):
+        """Stream SkillEmbedding rows of one model into the matrix."""
+        ids, vectors = [], []
+        rows = SkillEmbedding.objects.filter(model_name=model_name).order_by(
+            'skill_id'
+        ).values_list('skill_id', 'vector').iterator(chunk_size=chunk_size)
+
+        for skill_id, vector in rows:
+            if vector:
+                ids.append(skill_id)
+                vectors.append(np.asarray(vector, dtype=np.float32))
+
+        dims = {len(vector) for vector in vectors}
+        if len(dims) > 1:
+            raise ValueError(f'{model_name} embeddings have mixed dimensions: {sorted(dims)}')
+
+        return cls(ids, np.stack(vectors) if vectors else None, model_name=model_name)
+
+    def save(self, directory):
+        """Write the sidecar files (vectors.npy, ids.npy, meta.json)."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / 'vectors.npy', self.matrix)
+        np.save(directory / 'ids.npy', self.ids)
+        (directory / 'meta.json').write_text(json.dumps({
+            'model_name': self.model_name,
+            'dim': self.dim,
+            'size': len(self),
+        }))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Index from a sidecar directory, memory-mapped by default."""
+        directory = Path(directory)
+        meta = json.loads((directory / 'meta.json').read_text())
+
+        index = cls.__new__(cls)
+        index.model_name = meta['model_name']
+        index.dim = meta['dim']
+        index._ids = np.load(directory / 'ids.npy')
+        index._matrix = np.load(directory / 'vectors.npy', mmap_mode='r' if mmap else None)
+        index._size = len(index._ids)
+        index._rows = {skill_id: row for row, skill_id in enumerate(index._ids.tolist())}
+
+        if len(index._matrix) != meta['size'] or len(index._ids) != meta['size']:
+            raise ValueError(f'Embedding sidecar at {directory} is incomplete')
+        return index
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, skill_id):
+        return skill_id in self._rows
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    @property
+    def matrix(self):
+        return self._matrix[:self._size]
+
+    def vector(self, skill_id):
+        return np.array(self._matrix[self._rows[skill_id]])
+
+    # ---------- UPDATES ----------
+    def _reserve(self, extra):
+        needed = self._size + extra
+        writable = isinstance(self._matrix, np.ndarray) and not isinstance(self._matrix, np.memmap)
+        if writable and needed <= len(self._matrix):
+            return
+
+        capacity = max(needed, 2 * len(self._matrix), 16)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def add(self, ids, vectors):
+        """Insert or replace the vectors of the given skills."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        vectors = normalize(vectors)
+        if not self.dim:
+            # An empty index learns its dimension from the first add
+            self.dim = vectors.shape[1]
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f'Expected {len(ids)} vectors of dimension {self.dim}, got {vectors.shape}')
+
+        self._reserve(len(ids))
+        for skill_id, vector in zip(ids.tolist(), vectors):
+            row = self._rows.get(skill_id)
+            if row is None:
+                row = self._size
+                self._rows[skill_id] = row
+                self._ids[row] = skill_id
+                self._size += 1
+            self._matrix[row] = vector
+
+    def remove(self, ids):
+        """Drop the given skills; unknown ids are ignored."""
+        self._reserve(0)
+        for skill_id in np.asarray(ids, dtype=np.int64).tolist():
+            row = self._rows.pop(skill_id, None)
+            if row is None:
+                continue
+
+            last = self._size - 1
+            if row != last:
+                moved = int(self._ids[last])
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved
+                self._rows[moved] = row
+            self._size = last
+
+    # ---------- SEARCH ----------
+    def search(self, queries, k=10, exclude_ids=(), batch_size=256):
+        """
+        Top-k cosine neighbours for each query vector.
+
+        Returns (ids, scores), both shaped (queries, min(k, len(index))),
+        best match first.
+        """
+        queries = normalize(queries)
+        k = min(k, len(self))
+        if not k:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        excluded = [self._rows[skill_id] for skill_id in exclude_ids if skill_id in self._rows]
+        matrix = self.matrix
+        top_ids = np.empty((len(queries), k), dtype=np.int64)
+        top_scores = np.empty((len(queries), k), dtype=np.float32)
+
+        for start in range(0, len(queries), batch_size):
+            scores = queries[start:start + batch_size] @ matrix.T
+            if excluded:
+                scores[:, excluded] = -np.inf
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_score = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_score, axis=1, kind='stable')
+
+            top_ids[start:start + batch_size] = self.ids[np.take_along_axis(top, order, axis=1)]
+            top_scores[start:start + batch_size] = np.take_along_axis(top_score, order, axis=1)
+
+        return top_ids, top_scores
+
+
+class EmbeddingIndexCache:
+    """
+    Per-process EmbeddingIndex per embedding model, reloaded when the
+    version stamp in the shared cache changes (same scheme as
+    SkillGraphCache).
+
+    With SKILL_EMBEDDING_INDEX_DIR set, each version is published once as
+    a sidecar under <dir>/<model>/<version>/ and memory-mapped by every
+    other worker. Sidecars are written to a temporary directory and
+    renamed into place, so a reader never maps a half-written file.
+    Version stamps sort by creation time, and publishing a version prunes
+    only older ones, so a worker that publishes late never removes a
+    newer sidecar. A sidecar that disappears or fails to load under a
+    reader is replaced by a load from the database.
+    """
+
+    _indexes = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _model_name(model_name):
+        return model_name or getattr(settings, 'SKILL_EMBEDDING_MODEL', DEFAULT_EMBEDDING_MODEL)
+
+    @staticmethod
+    def _version_key(model_name):
+        return VERSION_KEY.format(model_name=model_name)
+
+    @staticmethod
+    def _sidecar_root(model_name):
+        root = getattr(settings, 'SKILL_EMBEDDING_INDEX_DIR', None)
+        return Path(root) / model_name.replace('/', '_') if root else None
+
+    @classmethod
+    def _version(cls, model_name):
+        key = cls._version_key(model_name)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, new_version(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def _publish(cls, index, root, version):
+        tmp = root / f'.{version}.{uuid.uuid4().hex}'
+        index.save(tmp)
+        try:
+            os.replace(tmp, root / version)
+        except OSError:
+            # Another worker published this version first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        # Mapped files stay readable after unlink, so older versions can go
+        for path in root.iterdir():
+            if not path.name.startswith('.') and version_order(path.name) < version_order(version):
+                shutil.rmtree(path, ignore_errors=True)
+
+    @classmethod
+    def get(cls, model_name=None):
+        """Return the index for an embedding model, loading it if stale."""
+        model_name = cls._model_name(model_name)
+        version = cls._version(model_name)
+
+        entry = cls._indexes.get(model_name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        root = cls._sidecar_root(model_name)
+        index = None
+        if root is not None and (root / version / 'meta.json').exists():
+            try:
+                index = EmbeddingIndex.load(root / version)
+            except (OSError, ValueError):
+                # Pruned or replaced between the check and the load
+                logger.warning("Could not load embedding sidecar %s; reading the database",
+                               root / version, exc_info=True)
+                index = EmbeddingIndex.from_database(model_name)
+
+        if index is None:
+            index = EmbeddingIndex.from_database(model_name)
+            if root is not None:
+                root.mkdir(parents=True, exist_ok=True)
+                cls._publish(index, root, version)
+
+        with cls._lock:
+            cls._indexes[model_name] = (version, index)
+        return index
+
+    @classmethod
+    def invalidate(cls, model_name=None):
+        """Make every worker reload the model's index on its next read."""
+        model_name = cls._model_name(model_name)
+        cache.set(cls._version_key(model_name), new_version(), timeout=None)
+        with cls._lock:
+            cls._indexes.pop(model_name, None)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._indexes.clear()
@@ -0,0 +1,229 @@
+import hashlib
+import logging
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .embedding_index import EmbeddingIndexCache, normalize
+from .models import Skill, SkillEmbedding
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Longest skill text sent to a provider
+MAX_TEXT_LENGTH = 2000
+
+
+# ---------- BACKENDS ----------
+class EmbeddingBackend:
+    """
+    Turns a batch of texts into an (n, dim) float32 matrix.
+
+    model_name is what gets stored in SkillEmbedding.model_name, so two
+    backends must not share one. max_batch_size is the provider's limit
+    on texts per request.
+    """
+
+    model_name = None
+    max_batch_size = 100
+
+    def embed(self, texts):
+        raise NotImplementedError
+
+
+class HashingEmbedder(EmbeddingBackend):
+    """
+    Deterministic local embedder: signed feature hashing of word tokens
+    and character trigrams. No network or model download, so offline
+    runs and tests get stable vectors where shared words and spellings
+    land close together.
+    """
+
+    max_batch_size = 1000
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.model_name = f'hashing-v1-{dim}'
+
+    def _features(self, text):
+        text = text.lower()
+        for token in TOKEN_RE.findall(text):
+            yield f'w:{token}'
+            padded = f' {token} '
+            for i in range(len(padded) - 2):
+                yield f'c:{padded[i:i + 3]}'
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little')
+                vectors[row, value % self.dim] += 1.0 if value >> 63 else -1.0
+        return normalize(vectors)
+
+
+class GeminiEmbedder(EmbeddingBackend):
+    """Gemini batchEmbedContents through the shared LLM gateway."""
+
+    max_batch_size = 100
+
+    def __init__(self, model_name=None, retries=3, delay=2):
+        from core.llm_gateway import get_gateway
+
+        self.model_name = model_name or getattr(settings, 'SKILL_EMBEDDING_MODEL', 'text-embedding-004')
+        self.gateway = get_gateway()
+        self.retries = retries
+        self.delay = delay
+
+    def embed(self, texts):
+        vectors = self.gateway.embed(
+            list(texts), self.model_name, retries=self.retries, delay=self.delay
+        )
+        return np.array(vectors, dtype=np.float32)
+
+
+EMBEDDING_BACKENDS = {
+    'hashing': HashingEmbedder,
+    'gemini': GeminiEmbedder,
+}
+
+
+def get_embedder(name=None):
+    """Embedding backend named by SKILL_EMBEDDING_BACKEND unless given."""
+    name = name or getattr(settings, 'SKILL_EMBEDDING_BACKEND', 'gemini')
+    try:
+        return EMBEDDING_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown embedding backend: {name}")
+
+
+def skill_text(label, alternative_labels, description):
+    """The text embedded for a skill."""
+    parts = [label]
+    if alternative_labels:
+        parts.append('Also: ' + ', '.join(alternative_labels))
+    if description:
+        parts.append(description)
+    return '. '.join(parts)[:MAX_TEXT_LENGTH]
+
+
+# ---------- PIPELINE ----------
+class EmbeddingPipeline:
+    """
+    Embeds skills whose SkillEmbedding is missing, was made by another
+    model, or predates the skill's last change.
+
+    Skills are loaded in provider-sized batches; up to ``concurrency``
+    provider calls run in worker threads while the calling thread writes
+    finished batches with one bulk_create and one bulk_update each.
+    """
+
+    def __init__(self, embedder=None, batch_size=None, concurrency=None):
+        self.embedder = embedder or get_embedder()
+        self.batch_size = min(
+            batch_size or getattr(settings, 'SKILL_EMBEDDING_BATCH_SIZE', 100),
+            self.embedder.max_batch_size,
+        )
+        self.concurrency = max(1, concurrency or getattr(settings, 'SKILL_EMBEDDING_CONCURRENCY', 4))
+
+    def stale_skills(self, skill_ids=None, force=False):
+        skills = Skill.objects.all()
+        if skill_ids is not None:
+            skills = skills.filter(id__in=skill_ids)
+        if not force:
+            skills = skills.filter(
+                Q(embedding__isnull=True)
+                | ~Q(embedding__model_name=self.embedder.model_name)
+                | Q(embedding__created_at__lt=F('updated_at'))
+            )
+        return skills
+
+    def _batches(self, skills):
+        # Ids first, so no cursor stays open while batches are written
+        skill_ids = list(skills.order_by('id').values_list('id', flat=True))
+
+        for start in range(0, len(skill_ids), self.batch_size):
+            rows = Skill.objects.filter(
+                id__in=skill_ids[start:start + self.batch_size]
+            ).order_by('id').values_list('id', 'preferred_label', 'alternative_labels', 'description')
+            yield [
+                (skill_id, skill_text(label, alternative_labels, description))
+                for skill_id, label, alternative_labels, description in rows
+            ]
+
+    def _embed(self, batch):
+        start = time.perf_counter()
+        vectors = self.embedder.embed([text for _, text in batch])
+        return [skill_id for skill_id, _ in batch], vectors, time.perf_counter() - start
+
+    def _write(self, skill_ids, vectors):
+        now = timezone.now()
+        existing = dict(
+            SkillEmbedding.objects.filter(skill_id__in=skill_ids).values_list('skill_id', 'id')
+        )
+        created, updated = [], []
+        for skill_id, vector in zip(skill_ids, vectors.tolist()):
+            embedding = SkillEmbedding(
+                id=existing.get(skill_id),
+                skill_id=skill_id,
+                vector=vector,
+                model_name=self.embedder.model_name,
+                created_at=now,
+            )
+            (updated if embedding.id else created).append(embedding)
+
+        with transaction.atomic():
+            SkillEmbedding.objects.bulk_create(created)
+            SkillEmbedding.objects.bulk_update(updated, ['vector', 'model_name', 'created_at'])
+
+    def run(self, skill_ids=None, force=False):
+        """Embed every stale skill (optionally limited to skill_ids)."""
+        batches = self._batches(self.stale_skills(skill_ids, force))
+        summary = {'skills': 0, 'batches': 0, 'seconds': 0.0, 'batch_rates': []}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = set()
+            exhausted = False
+
+            while pending or not exhausted:
+                # Keep at most ``concurrency`` provider calls in flight
+                while not exhausted and len(pending) < self.concurrency:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                    else:
+                        pending.add(pool.submit(self._embed, batch))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ids, vectors, seconds = future.result()
+                    self._write(ids, vectors)
+
+                    rate = len(ids) / max(seconds, 1e-9)
+                    summary['skills'] += len(ids)
+                    summary['batches'] += 1
+                    summary['batch_rates'].append(rate)
+                    logger.info(
+                        "Embedded %d skills with %s in %.2fs (%.0f skills/s)",
+                        len(ids), self.embedder.model_name, seconds, rate
+                    )
+
+        # bulk writes skip the SkillEmbedding signals
+        if summary['skills']:
+            EmbeddingIndexCache.invalidate(self.embedder.model_name)
+
+        summary['seconds'] = time.perf_counter() - start
+        summary['model_name'] = self.embedder.model_name
+        return summary
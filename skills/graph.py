@@ -0,0 +1,237 @@
+import threading
+import uuid
+
+import numpy as np
+from django.core.cache import cache
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from .models import Skill
+
+
+VERSION_KEY = 'skills:graph_version'
+
+
+def _gather(indptr, indices, nodes):
+    """Concatenated CSR rows for the given node positions."""
+    starts, ends = indptr[nodes], indptr[nodes + 1]
+    lengths = ends - starts
+    if not lengths.sum():
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return indices[offsets + np.arange(lengths.sum())]
+
+
+class SkillGraph:
+    """
+    Compact prerequisite graph of the whole taxonomy.
+
+    Skills are addressed by position in the sorted ``ids`` array. Edges
+    are held twice in CSR form: ``prerequisites`` rows list the skills a
+    skill requires, ``dependents`` rows the skills that require it. The
+    topological levels (longest prerequisite chain below each skill) are
+    computed once on construction with a level-synchronous Kahn pass;
+    skills on or behind a cycle get level -1.
+    """
+
+    __slots__ = (
+        'ids', 'prerequisite_indptr', 'prerequisite_indices',
+        'dependent_indptr', 'dependent_indices', 'levels',
+    )
+
+    def __init__(self, ids, src, dst):
+        """src/dst are position arrays: skill src requires skill dst."""
+        self.ids = np.asarray(ids, dtype=np.int64)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        n = len(self.ids)
+
+        order = np.lexsort((dst, src))
+        self.prerequisite_indptr = np.r_[0, np.cumsum(np.bincount(src, minlength=n))]
+        self.prerequisite_indices = dst[order]
+
+        order = np.lexsort((src, dst))
+        self.dependent_indptr = np.r_[0, np.cumsum(np.bincount(dst, minlength=n))]
+        self.dependent_indices = src[order]
+
+        self.levels = self._topological_levels()
+
+    # ---------- CONSTRUCTION ----------
+    @classmethod
+    def from_edges(cls, ids, edges):
+        """Build from skill ids and (skill_id, prerequisite_id) pairs."""
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        return cls(ids, np.searchsorted(ids, edges[:, 0]), np.searchsorted(ids, edges[:, 1]))
+
+    @classmethod
+    def load(cls):
+        """Two queries: every skill id and every prerequisite edge."""
+        return cls.from_edges(
+            list(Skill.objects.values_list('id', flat=True)),
+            list(Skill.prerequisites.through.objects.values_list('from_skill_id', 'to_skill_id'))
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.prerequisite_indices)
+
+    def edges(self):
+        """(src, dst) position arrays: skill src requires skill dst."""
+        src = np.repeat(np.arange(len(self)), np.diff(self.prerequisite_indptr))
+        return src, self.prerequisite_indices
+
+    def positions(self, skill_ids):
+        """Positions of the given skill ids; unknown ids are dropped."""
+        skill_ids = np.fromiter(skill_ids, dtype=np.int64)
+        if not len(self) or not len(skill_ids):
+            return np.zeros(0, dtype=np.int64)
+
+        pos = np.minimum(np.searchsorted(self.ids, skill_ids), len(self) - 1)
+        return pos[self.ids[pos] == skill_ids]
+
+    # ---------- NEIGHBOURS ----------
+    def prerequisites(self, skill_id):
+        """Direct prerequisite ids of a skill."""
+        return self.ids[_gather(self.prerequisite_indptr, self.prerequisite_indices,
+                                self.positions([skill_id]))]
+
+    def dependents(self, skill_id):
+        """Ids of skills that directly require a skill."""
+        return self.ids[_gather(self.dependent_indptr, self.dependent_indices,
+                                self.positions([skill_id]))]
+
+    # ---------- CLOSURES ----------
+    def _closure(self, indptr, indices, skill_ids):
+        seen = np.zeros(len(self), dtype=bool)
+        frontier = self.positions(skill_ids)
+
+        while len(frontier):
+            reached = _gather(indptr, indices, frontier)
+            reached = np.unique(reached[~seen[reached]])
+            seen[reached] = True
+            frontier = reached
+
+        return self.ids[seen]
+
+    def ancestors(self, skill_ids):
+        """
+        Sorted ids of every transitive prerequisite of the given skills.
+        A skill is its own ancestor only when it lies on a cycle.
+        """
+        return self._closure(self.prerequisite_indptr, self.prerequisite_indices, skill_ids)
+
+    def descendants(self, skill_ids):
+        """Sorted ids of every skill that transitively requires the given skills."""
+        return self._closure(self.dependent_indptr, self.dependent_indices, skill_ids)
+
+    # ---------- ORDERING ----------
+    def _topological_levels(self):
+        n = len(self)
+        remaining = np.diff(self.prerequisite_indptr)
+        levels = np.full(n, -1, dtype=np.int64)
+
+        frontier = np.flatnonzero(remaining == 0)
+        level = 0
+        while len(frontier):
+            levels[frontier] = level
+            reached = _gather(self.dependent_indptr, self.dependent_indices, frontier)
+            np.subtract.at(remaining, reached, 1)
+            reached = np.unique(reached)
+            frontier = reached[remaining[reached] == 0]
+            level += 1
+
+        return levels
+
+    @property
+    def is_acyclic(self):
+        return bool((self.levels >= 0).all())
+
+    def topological_order(self):
+        """
+        Skill ids with every prerequisite before its dependents (by level,
+        then id). Skills that cannot be ordered because of a cycle come last.
+        """
+        levels = np.where(self.levels >= 0, self.levels, np.iinfo(np.int64).max)
+        return self.ids[np.lexsort((self.ids, levels))]
+
+    def cycles(self):
+        """Lists of skill ids that form prerequisite cycles (strong components)."""
+        if self.is_acyclic:
+            return []
+
+        src, dst = self.edges()
+        matrix = sparse.csr_matrix(
+            (np.ones(len(src), dtype=np.int8), (src, dst)), shape=(len(self), len(self))
+        )
+        _, labels = connected_components(matrix, directed=True, connection='strong')
+        sizes = np.bincount(labels)
+        on_cycle = (sizes[labels] > 1)
+        on_cycle[src[src == dst]] = True
+
+        return [
+            self.ids[on_cycle & (labels == label)].tolist()
+            for label in np.unique(labels[on_cycle])
+        ]
+
+    def order(self, skill_ids):
+        """
+        Stable prerequisite order for a list of skills (None allowed):
+        indices into skill_ids, keeping the input order except where a
+        skill has to wait for one of its transitive prerequisites.
+        """
+        skill_ids = list(skill_ids)
+        requires = [
+            set(self.ancestors([skill_id]).tolist()) - {skill_id} if skill_id is not None else set()
+            for skill_id in skill_ids
+        ]
+
+        pending = list(range(len(skill_ids)))
+        result = []
+        while pending:
+            waiting = {skill_ids[i] for i in pending}
+            ready = next(
+                (i for i in pending if not requires[i] & waiting),
+                pending[0]  # cycle among the pending skills: keep input order
+            )
+            pending.remove(ready)
+            result.append(ready)
+
+        return result
+
+
+class SkillGraphCache:
+    """
+    Per-process SkillGraph, reloaded when the version stamp in the shared
+    cache changes (same scheme as assessment.item_cache.ItemBankCache).
+    """
+
+    _entry = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        version = cache.get(VERSION_KEY)
+        entry = cls._entry
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        graph = SkillGraph.load()
+        with cls._lock:
+            cls._entry = (version, graph)
+        return graph
+
+    @classmethod
+    def invalidate(cls):
+        """Make every worker reload the graph on its next read."""
+        cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        with cls._lock:
+            cls._entry = None
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entry = None
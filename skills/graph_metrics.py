@@ -0,0 +1,205 @@
+import logging
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from scipy import sparse
+
+from .graph import SkillGraphCache
+from .models import SkillGraphMetrics
+
+
+logger = logging.getLogger(__name__)
+
+# Set while a refresh is queued, so a burst of prerequisite edits enqueues one job
+REFRESH_PENDING_KEY = 'skills:graph_metrics_refresh_pending'
+REFRESH_PENDING_TIMEOUT = 600
+
+METRIC_FIELDS = [
+    'direct_prerequisites', 'direct_dependents',
+    'transitive_prerequisites', 'transitive_dependents',
+    'depth', 'centrality', 'criticality_factor',
+]
+
+# Weights of the criticality factor; the defaults reproduce the original
+# 1 + 0.1 * prerequisites + 0.1 * dependents coefficient.
+DEFAULT_CRITICALITY_WEIGHTS = {
+    'direct': 0.1,
+    'transitive': 0.0,
+    'centrality': 0.0,
+}
+
+
+def load_edges():
+    """
+    Sorted skill ids and (skill position, prerequisite position) edge
+    arrays, read from this process's cached SkillGraph.
+    """
+    graph = SkillGraphCache.get()
+    src, dst = graph.edges()
+    return graph.ids, src, dst
+
+
+def topological_order(n, src, dst):
+    """
+    Kahn order from prerequisites to dependents. Skills on a cycle never
+    become ready; they are appended in id order and reported separately.
+    """
+    remaining = np.bincount(src, minlength=n)
+    order = np.argsort(dst, kind='stable')
+    dependents = np.split(src[order], np.cumsum(np.bincount(dst, minlength=n))[:-1])
+
+    result = list(np.flatnonzero(remaining == 0))
+    for node in result:
+        for dependent in dependents[node]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                result.append(dependent)
+
+    cyclic = np.flatnonzero(remaining > 0)
+    return np.array(result + cyclic.tolist(), dtype=np.int64), cyclic
+
+
+def pagerank(n, src, dst, damping=0.85, tol=1e-10, max_iter=100):
+    """PageRank with rank flowing from each skill to its prerequisites."""
+    if not n:
+        return np.zeros(0)
+
+    out_degree = np.bincount(src, minlength=n).astype(np.float64)
+    weights = 1.0 / out_degree[src]
+    transition = sparse.csr_matrix((weights, (dst, src)), shape=(n, n))
+    dangling = out_degree == 0
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        updated = damping * (transition @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+        if np.abs(updated - rank).sum() < tol:
+            return updated
+        rank = updated
+    return rank
+
+
+def compute_metrics(ids, src, dst, weights=None):
+    """
+    All metric columns as arrays aligned with ids. Transitive closures are
+    kept as Python int bitsets and merged along the topological order, so
+    the whole taxonomy costs one pass per direction.
+    """
+    weights = {**DEFAULT_CRITICALITY_WEIGHTS, **(weights or {})}
+    n = len(ids)
+
+    direct_prerequisites = np.bincount(src, minlength=n)
+    direct_dependents = np.bincount(dst, minlength=n)
+
+    order, cyclic = topological_order(n, src, dst)
+    if len(cyclic):
+        logger.warning("Prerequisite graph has %d skills on cycles", len(cyclic))
+
+    prerequisites = [[] for _ in range(n)]
+    dependents = [[] for _ in range(n)]
+    for s, d in zip(src.tolist(), dst.tolist()):
+        prerequisites[s].append(d)
+        dependents[d].append(s)
+
+    ancestors = [0] * n
+    depth = np.zeros(n, dtype=np.int64)
+    for node in order.tolist():
+        bits = 0
+        for prerequisite in prerequisites[node]:
+            bits |= ancestors[prerequisite] | (1 << prerequisite)
+            depth[node] = max(depth[node], depth[prerequisite] + 1)
+        ancestors[node] = bits & ~(1 << node)
+
+    descendants = [0] * n
+    for node in order[::-1].tolist():
+        bits = 0
+        for dependent in dependents[node]:
+            bits |= descendants[dependent] | (1 << dependent)
+        descendants[node] = bits & ~(1 << node)
+
+    transitive_prerequisites = np.array([bits.bit_count() for bits in ancestors], dtype=np.int64)
+    transitive_dependents = np.array([bits.bit_count() for bits in descendants], dtype=np.int64)
+    centrality = pagerank(n, src, dst)
+
+    criticality_factor = (
+        1
+        + weights['direct'] * (direct_prerequisites + direct_dependents)
+        + weights['transitive'] * (
+            transitive_prerequisites - direct_prerequisites
+            + transitive_dependents - direct_dependents
+        )
+        + weights['centrality'] * centrality * n
+    )
+
+    return {
+        'direct_prerequisites': direct_prerequisites,
+        'direct_dependents': direct_dependents,
+        'transitive_prerequisites': transitive_prerequisites,
+        'transitive_dependents': transitive_dependents,
+        'depth': depth,
+        'centrality': centrality,
+        'criticality_factor': criticality_factor,
+    }
+
+
+def refresh_graph_metrics(batch_size=1000, tolerance=1e-9):
+    """
+    Recompute metrics for every skill in memory and write only the rows
+    that are missing or whose values changed. Returns a summary dict.
+
+    The computation is deliberately global rather than limited to the
+    component around a change: PageRank (centrality) is a whole-graph
+    fixed point, so one edge shifts every score, and the full pass costs
+    about 0.1 s for a 14k-skill, 20k-edge taxonomy. The database writes
+    are what scale with the change.
+    """
+    ids, src, dst = load_edges()
+    metrics = compute_metrics(
+        ids, src, dst, getattr(settings, 'SKILL_CRITICALITY_WEIGHTS', None)
+    )
+    columns = {name: metrics[name].tolist() for name in METRIC_FIELDS}
+
+    stored = {
+        row[0]: row[1:]
+        for row in SkillGraphMetrics.objects.values_list('skill_id', *METRIC_FIELDS)
+    }
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    for i, skill_id in enumerate(ids.tolist()):
+        values = tuple(columns[name][i] for name in METRIC_FIELDS)
+        row = SkillGraphMetrics(
+            skill_id=skill_id, updated_at=now, **dict(zip(METRIC_FIELDS, values))
+        )
+
+        current = stored.get(skill_id)
+        if current is None:
+            to_create.append(row)
+        elif not np.allclose(current, values, rtol=0, atol=tolerance):
+            to_update.append(row)
+
+    with transaction.atomic():
+        SkillGraphMetrics.objects.bulk_create(to_create, batch_size=batch_size)
+        SkillGraphMetrics.objects.bulk_update(
+            to_update, METRIC_FIELDS + ['updated_at'], batch_size=batch_size
+        )
+
+    return {
+        'skills': len(ids),
+        'edges': len(src),
+        'created': len(to_create),
+        'updated': len(to_update),
+    }
+
+
+def schedule_refresh():
+    """Queue a refresh once the current transaction commits, unless one is pending."""
+    from .tasks import refresh_skill_graph_metrics_task
+
+    def enqueue():
+        if cache.add(REFRESH_PENDING_KEY, True, REFRESH_PENDING_TIMEOUT):
+            refresh_skill_graph_metrics_task.delay()
+
+    transaction.on_commit(enqueue)
@@ -0,0 +1,176 @@
+from django.db import transaction
+from django.db.models import Count, F, Max
+
+from .models import Occupation, OccupationClosure, OccupationSkill
+
+
+class HierarchyCycleError(ValueError):
+    """Raised when a parent change would make an occupation its own ancestor."""
+
+
+def closure_rows(parents):
+    """
+    {(ancestor_id, descendant_id): depth} for a {occupation_id: parent_id}
+    map, with each occupation's depth-0 self link. A chain that loops back
+    on itself is cut where the loop closes.
+    """
+    chains = {}
+    for occupation_id in parents:
+        # Climb to the first occupation whose chain is known, then unwind
+        path, seen = [], set()
+        node = occupation_id
+        while node is not None and node not in chains and node not in seen:
+            seen.add(node)
+            path.append(node)
+            node = parents.get(node)
+
+        above = chains.get(node, ())
+        for node in reversed(path):
+            chains[node] = [(node, 0)] + [(ancestor, depth + 1) for ancestor, depth in above]
+            above = chains[node]
+
+    return {
+        (ancestor, descendant): depth
+        for descendant, chain in chains.items()
+        for ancestor, depth in chain
+    }
+
+
+def rebuild_occupation_closure(batch_size=5000):
+    """
+    Recompute the closure from Occupation.parent and write only the rows
+    that differ. Used after bulk writes (imports) that bypass the signals.
+    """
+    parents = dict(Occupation.objects.values_list('id', 'parent_id'))
+    wanted = closure_rows(parents)
+    stored = {
+        (ancestor, descendant): (pk, depth)
+        for pk, ancestor, descendant, depth in OccupationClosure.objects.values_list(
+            'id', 'ancestor_id', 'descendant_id', 'depth'
+        ).iterator(chunk_size=batch_size)
+    }
+
+    created = [
+        OccupationClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth)
+        for (ancestor, descendant), depth in wanted.items()
+        if (ancestor, descendant) not in stored
+    ]
+    updated = [
+        OccupationClosure(id=pk, depth=wanted[key])
+        for key, (pk, depth) in stored.items()
+        if key in wanted and wanted[key] != depth
+    ]
+    deleted = [pk for key, (pk, _) in stored.items() if key not in wanted]
+
+    with transaction.atomic():
+        for start in range(0, len(deleted), batch_size):
+            OccupationClosure.objects.filter(pk__in=deleted[start:start + batch_size]).delete()
+        OccupationClosure.objects.bulk_create(created, batch_size=batch_size)
+        OccupationClosure.objects.bulk_update(updated, ['depth'], batch_size=batch_size)
+
+    return {
+        'occupations': len(parents),
+        'rows': len(wanted),
+        'created': len(created),
+        'updated': len(updated),
+        'deleted': len(deleted),
+    }
+
+
+# ---------- INCREMENTAL MAINTENANCE ----------
+def check_parent(occupation_id, parent_id):
+    """Raise HierarchyCycleError if parent_id lies in occupation_id's subtree."""
+    if parent_id is None or occupation_id is None:
+        return
+    if OccupationClosure.objects.filter(
+        ancestor_id=occupation_id, descendant_id=parent_id
+    ).exists():
+        raise HierarchyCycleError(
+            f"Occupation {parent_id} is a descendant of {occupation_id} and cannot be its parent"
+        )
+
+
+def _links_below(parent_id, subtree):
+    """Closure rows joining every ancestor of parent_id to every subtree row."""
+    if parent_id is None:
+        return []
+    ancestors = OccupationClosure.objects.filter(
+        descendant_id=parent_id
+    ).values_list('ancestor_id', 'depth')
+    return [
+        OccupationClosure(ancestor_id=ancestor, descendant_id=descendant, depth=above + below + 1)
+        for ancestor, above in ancestors
+        for descendant, below in subtree
+    ]
+
+
+def insert_occupation(occupation_id, parent_id):
+    """Closure rows for a new leaf occupation."""
+    with transaction.atomic():
+        OccupationClosure.objects.bulk_create(
+            [OccupationClosure(ancestor_id=occupation_id, descendant_id=occupation_id, depth=0)]
+            + _links_below(parent_id, [(occupation_id, 0)])
+        )
+
+
+def move_occupation(occupation_id, parent_id):
+    """
+    Re-attach an occupation's subtree under parent_id: links from the old
+    ancestors into the subtree are dropped and links from the new ones
+    added; links inside the subtree stay as they are.
+    """
+    with transaction.atomic():
+        subtree = list(
+            OccupationClosure.objects.filter(ancestor_id=occupation_id).values_list(
+                'descendant_id', 'depth'
+            )
+        )
+        subtree_ids = [descendant for descendant, _ in subtree]
+
+        OccupationClosure.objects.filter(descendant_id__in=subtree_ids).exclude(
+            ancestor_id__in=subtree_ids
+        ).delete()
+        OccupationClosure.objects.bulk_create(_links_below(parent_id, subtree))
+
+
+# ---------- QUERIES ----------
+def descendant_occupations(occupation_id, include_self=True, max_depth=None):
+    """Occupations in the subtree of occupation_id, annotated with depth."""
+    # One filter() call, so every condition applies to the same closure row
+    conditions = {'ancestor_links__ancestor_id': occupation_id}
+    if not include_self:
+        conditions['ancestor_links__depth__gt'] = 0
+    if max_depth is not None:
+        conditions['ancestor_links__depth__lte'] = max_depth
+    return Occupation.objects.filter(**conditions).annotate(
+        depth=F('ancestor_links__depth')
+    ).order_by('depth', 'preferred_label')
+
+
+def ancestor_occupations(occupation_id, include_self=False):
+    """Occupations above occupation_id, nearest first, annotated with depth."""
+    conditions = {'descendant_links__descendant_id': occupation_id}
+    if not include_self:
+        conditions['descendant_links__depth__gt'] = 0
+    return Occupation.objects.filter(**conditions).annotate(
+        depth=F('descendant_links__depth')
+    ).order_by('depth')
+
+
+def subtree_skill_requirements(occupation_id, include_self=True):
+    """
+    Union of the skills required anywhere in the subtree of occupation_id,
+    one row per skill with the highest importance and proficiency asked
+    for and the number of subtree occupations requiring it.
+    """
+    conditions = {'occupation__ancestor_links__ancestor_id': occupation_id}
+    if not include_self:
+        conditions['occupation__ancestor_links__depth__gt'] = 0
+
+    return OccupationSkill.objects.filter(**conditions).values(
+        'skill_id', 'skill__preferred_label', 'skill__skill_type'
+    ).annotate(
+        importance=Max('importance'),
+        required_proficiency_theta=Max('required_proficiency_theta'),
+        occupations=Count('occupation_id', distinct=True),
+    ).order_by('-importance', 'skill__preferred_label')
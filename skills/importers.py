@@ -0,0 +1,587 @@
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from itertools import islice
+from pathlib import Path
+
+from django.db import transaction
+
+from .models import Occupation, OccupationSkill, Skill
+
+
+# ESCO occupation-skill relation type -> (importance, required_proficiency_theta)
+ESCO_RELATION_LEVELS = {
+    'essential': (1.0, 1.0),
+    'optional': (0.5, 0.0),
+}
+
+# O*NET element ids are stored as the skill's concept URI
+ONET_ELEMENT_PREFIX = 'onet:element:'
+
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+COUNT_KEYS = ('inserted', 'updated', 'unchanged', 'skipped')
+
+
+def read_rows(path):
+    """
+    Stream dict rows from a CSV (ESCO), tab-separated .txt (O*NET) or
+    NDJSON file, one line at a time.
+    """
+    path = Path(path)
+    if path.suffix in NDJSON_SUFFIXES:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    csv.field_size_limit(sys.maxsize)
+    delimiter = '\t' if path.suffix == '.txt' else ','
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f, delimiter=delimiter)
+
+
+def split_labels(value):
+    """ESCO packs alternative labels into one newline-separated cell."""
+    if isinstance(value, list):
+        return [label.strip() for label in value if label.strip()]
+    return [label.strip() for label in (value or '').split('\n') if label.strip()]
+
+
+def content_hash(*values):
+    """Stable 128-bit digest of the imported content of a row."""
+    payload = json.dumps(values, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class ImportCheckpoint:
+    """
+    Rows committed per source file, kept in a small JSON file so an
+    interrupted import resumes after the last committed batch.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.offsets = {}
+
+    def load(self):
+        if self.path.exists():
+            self.offsets = json.loads(self.path.read_text()).get('offsets', {})
+        return self
+
+    def offset(self, name):
+        return self.offsets.get(name, 0)
+
+    def advance(self, name, offset):
+        self.offsets[name] = offset
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'offsets': self.offsets}))
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.offsets = {}
+        self.path.unlink(missing_ok=True)
+
+
+class TaxonomyImporter:
+    """
+    Streaming, delta-aware ESCO / O*NET importer.
+
+    Every source file is read row by row and handled in batches of
+    batch_size. Each imported Occupation, Skill and OccupationSkill row
+    carries a content_hash of its source content; a batch fetches the
+    stored hashes for its keys in one query and only rows that are new
+    or whose hash changed go into bulk_create(update_conflicts=True), so
+    unchanged rows keep their updated_at. Relation rows resolve URIs with
+    one lookup per batch, so memory is bounded by the batch size. Each
+    batch commits on its own and advances the checkpoint.
+
+    With prune=True the importer also remembers every key it saw and, for
+    sources read completely in this run, deletes rows of that source that
+    no longer appear in the export.
+
+    Sources (whichever exist in source_dir, in this order):
+
+    - ESCO: occupations_<lang>, skills_<lang>, broaderRelationsOccPillar_<lang>,
+      occupationSkillRelations_<lang>, skillSkillRelations_<lang>
+      (.csv, or .ndjson/.jsonl with the same column names)
+    - O*NET: "Occupation Data.txt", "Skills.txt", "Knowledge.txt"
+    """
+
+    def __init__(self, source_dir, language='en', batch_size=5000,
+                 checkpoint=None, progress=None, prune=False):
+        self.source_dir = Path(source_dir)
+        self.language = language
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.progress = progress
+        self.prune = prune
+        self.graph_changed = False
+        self.hierarchy_changed = False
+        self.seen = defaultdict(set)
+
+    def sources(self):
+        """(file stem, batch handler, pruning family) in import order."""
+        lang = self.language
+        return [
+            (f'occupations_{lang}', self.import_occupations, 'esco_occupations'),
+            (f'skills_{lang}', self.import_skills, 'esco_skills'),
+            (f'broaderRelationsOccPillar_{lang}', self.import_occupation_hierarchy, None),
+            (f'occupationSkillRelations_{lang}', self.import_occupation_skills, 'esco_links'),
+            (f'skillSkillRelations_{lang}', self.import_skill_relations, 'esco_prerequisites'),
+            ('Occupation Data', self.import_onet_occupations, 'onet_occupations'),
+            ('Skills', self.import_onet_ratings, 'onet_ratings'),
+            ('Knowledge', self.import_onet_ratings, 'onet_ratings'),
+        ]
+
+    def find(self, stem):
+        for suffix in ('.csv', '.txt') + NDJSON_SUFFIXES:
+            path = self.source_dir / f'{stem}{suffix}'
+            if path.exists():
+                return path
+        return None
+
+    # ---------- DRIVER ----------
+    def run(self):
+        """
+        Import every available source; returns one stats dict per file,
+        with 'deleted' filled in for pruned sources.
+        """
+        stats = []
+        complete = defaultdict(list)
+
+        for stem, handler, family in self.sources():
+            path = self.find(stem)
+            if path is None:
+                continue
+            file_stats = self.import_file(path, handler)
+            stats.append(file_stats)
+            if family:
+                complete[family].append(file_stats)
+
+        if self.prune:
+            for family, family_stats in complete.items():
+                # A resumed file was not seen in full, so its source cannot be pruned
+                if all(not s['resumed_at'] for s in family_stats):
+                    family_stats[0]['deleted'] = self.prune_family(family)
+
+        return stats
+
+    def import_file(self, path, handler):
+        skip = self.checkpoint.offset(path.name) if self.checkpoint else 0
+        rows = read_rows(path)
+        for _ in islice(rows, skip):
+            pass
+
+        stats = {'file': path.name, 'rows': 0, 'deleted': 0, 'resumed_at': skip}
+        stats.update(dict.fromkeys(COUNT_KEYS, 0))
+        start = time.perf_counter()
+
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+
+            with transaction.atomic():
+                counts = handler(batch)
+
+            stats['rows'] += len(batch)
+            for key in COUNT_KEYS:
+                stats[key] += counts[key]
+            if self.checkpoint:
+                self.checkpoint.advance(path.name, skip + stats['rows'])
+            if self.progress:
+                self.progress(path.name, stats['rows'], time.perf_counter() - start)
+
+        stats['seconds'] = time.perf_counter() - start
+        stats['rows_per_second'] = stats['rows'] / max(stats['seconds'], 1e-9)
+        return stats
+
+    # ---------- WRITES ----------
+    @staticmethod
+    def _ids(model, field, keys):
+        keys = {key for key in keys if key}
+        if not keys:
+            return {}
+        return dict(model.objects.filter(**{f'{field}__in': keys}).values_list(field, 'id'))
+
+    def _remember(self, family, keys):
+        if self.prune:
+            self.seen[family].update(keys)
+
+    def _sync(self, model, rows, stored, unique_fields, update_fields):
+        """
+        Upsert only the rows (key -> instance with content_hash set) that
+        are missing from stored (key -> content_hash) or differ from it.
+        """
+        counts = Counter()
+        changed = []
+        for key, obj in rows.items():
+            current = stored.get(key)
+            if current is None:
+                counts['inserted'] += 1
+            elif current != obj.content_hash:
+                counts['updated'] += 1
+            else:
+                counts['unchanged'] += 1
+                continue
+            changed.append(obj)
+
+        model.objects.bulk_create(
+            changed,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields + ['content_hash'],
+        )
+        return counts
+
+    def _sync_by_field(self, model, field, rows, update_fields):
+        stored = dict(
+            model.objects.filter(**{f'{field}__in': list(rows)}).values_list(field, 'content_hash')
+        )
+        return self._sync(model, rows, stored, [field], update_fields)
+
+    def _sync_links(self, values):
+        """
+        values: (occupation_id, skill_id) -> (importance, required theta).
+
+        The stored hashes of the batch's links come from one query on the
+        batch's occupation and skill ids. It can also return pairs that
+        are not in the batch; _sync only looks up the batch's own keys.
+        """
+        rows = {
+            (occupation_id, skill_id): OccupationSkill(
+                occupation_id=occupation_id,
+                skill_id=skill_id,
+                importance=importance,
+                required_proficiency_theta=theta,
+                content_hash=content_hash(occupation_id, skill_id, importance, theta),
+            )
+            for (occupation_id, skill_id), (importance, theta) in values.items()
+        }
+        stored = {
+            (occupation_id, skill_id): current
+            for occupation_id, skill_id, current in OccupationSkill.objects.filter(
+                occupation_id__in={key[0] for key in rows},
+                skill_id__in={key[1] for key in rows},
+            ).values_list('occupation_id', 'skill_id', 'content_hash')
+        }
+        return self._sync(
+            OccupationSkill, rows, stored, ['occupation', 'skill'],
+            ['importance', 'required_proficiency_theta']
+        )
+
+    # ---------- ESCO ----------
+    def import_occupations(self, batch):
+        occupations = {}
+        for row in batch:
+            if not row.get('conceptUri') or not row.get('preferredLabel'):
+                continue
+            label = row['preferredLabel']
+            alternative_labels = split_labels(row.get('altLabels'))
+            description = row.get('description') or row.get('definition') or ''
+            occupations[row['conceptUri']] = Occupation(
+                esco_uri=row['conceptUri'],
+                preferred_label=label,
+                alternative_labels=alternative_labels,
+                description=description,
+                content_hash=content_hash(label, alternative_labels, description),
+            )
+
+        self._remember('esco_occupations', occupations)
+        counts = self._sync_by_field(
+            Occupation, 'esco_uri', occupations,
+            ['preferred_label', 'alternative_labels', 'description', 'updated_at']
+        )
+        if counts['inserted']:
+            self.hierarchy_changed = True
+        counts['skipped'] = len(batch) - len(occupations)
+        return counts
+
+    @staticmethod
+    def _esco_skill_type(row):
+        if row.get('skillType') == 'knowledge':
+            return Skill.KNOWLEDGE
+        if row.get('reuseLevel') == 'transversal':
+            return Skill.SOFT
+        return Skill.TECHNICAL
+
+    def import_skills(self, batch):
+        skills = {}
+        for row in batch:
+            if not row.get('conceptUri') or not row.get('preferredLabel'):
+                continue
+            label = row['preferredLabel']
+            alternative_labels = split_labels(row.get('altLabels'))
+            description = row.get('description') or row.get('definition') or ''
+            skill_type = self._esco_skill_type(row)
+            skills[row['conceptUri']] = Skill(
+                esco_uri=row['conceptUri'],
+                preferred_label=label,
+                alternative_labels=alternative_labels,
+                description=description,
+                skill_type=skill_type,
+                content_hash=content_hash(label, alternative_labels, description, skill_type),
+            )
+
+        self._remember('esco_skills', skills)
+        counts = self._sync_by_field(
+            Skill, 'esco_uri', skills,
+            ['preferred_label', 'alternative_labels', 'description', 'skill_type', 'updated_at']
+        )
+        if counts['inserted']:
+            self.graph_changed = True
+        counts['skipped'] = len(batch) - len(skills)
+        return counts
+
+    def import_occupation_hierarchy(self, batch):
+        # Occupation -> occupation links only; ISCO group parents are not imported
+        links = {
+            row['conceptUri']: row['broaderUri']
+            for row in batch
+            if row.get('conceptType', 'Occupation') == 'Occupation'
+            and row.get('broaderType', 'Occupation') == 'Occupation'
+        }
+        stored = {
+            uri: (occupation_id, parent_id)
+            for uri, occupation_id, parent_id in Occupation.objects.filter(
+                esco_uri__in=set(links) | set(links.values())
+            ).values_list('esco_uri', 'id', 'parent_id')
+        }
+
+        counts = Counter()
+        updates = []
+        for uri, parent_uri in links.items():
+            if uri not in stored or parent_uri not in stored:
+                continue
+            occupation_id, current_parent = stored[uri]
+            parent_id = stored[parent_uri][0]
+            if current_parent == parent_id:
+                counts['unchanged'] += 1
+            else:
+                counts['updated'] += 1
+                updates.append(Occupation(id=occupation_id, parent_id=parent_id))
+
+        Occupation.objects.bulk_update(updates, ['parent'], batch_size=self.batch_size)
+        if updates:
+            self.hierarchy_changed = True
+        counts['skipped'] = len(batch) - counts['updated'] - counts['unchanged']
+        return counts
+
+    def import_occupation_skills(self, batch):
+        occupation_ids = self._ids(Occupation, 'esco_uri', [row['occupationUri'] for row in batch])
+        skill_ids = self._ids(Skill, 'esco_uri', [row['skillUri'] for row in batch])
+
+        values = {}
+        for row in batch:
+            occupation_id = occupation_ids.get(row['occupationUri'])
+            skill_id = skill_ids.get(row['skillUri'])
+            level = ESCO_RELATION_LEVELS.get(row.get('relationType'))
+            if occupation_id and skill_id and level:
+                values[occupation_id, skill_id] = level
+
+        self._remember('esco_links', values)
+        counts = self._sync_links(values)
+        counts['skipped'] = len(batch) - len(values)
+        return counts
+
+    def import_skill_relations(self, batch):
+        """Essential skill-skill relations become prerequisite edges."""
+        batch_size = len(batch)
+        batch = [row for row in batch if row.get('relationType') == 'essential']
+        ids = self._ids(
+            Skill, 'esco_uri',
+            [row['originalSkillUri'] for row in batch] + [row['relatedSkillUri'] for row in batch]
+        )
+
+        Prerequisite = Skill.prerequisites.through
+        edges = {
+            (ids[row['originalSkillUri']], ids[row['relatedSkillUri']])
+            for row in batch
+            if row['originalSkillUri'] in ids and row['relatedSkillUri'] in ids
+            and row['originalSkillUri'] != row['relatedSkillUri']
+        }
+        stored = set(
+            Prerequisite.objects.filter(
+                from_skill_id__in={src for src, _ in edges}
+            ).values_list('from_skill_id', 'to_skill_id')
+        )
+        new_edges = edges - stored
+
+        Prerequisite.objects.bulk_create(
+            [Prerequisite(from_skill_id=src, to_skill_id=dst) for src, dst in new_edges],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        if new_edges:
+            self.graph_changed = True
+
+        self._remember('esco_prerequisites', edges)
+        return {
+            'inserted': len(new_edges),
+            'updated': 0,
+            'unchanged': len(edges) - len(new_edges),
+            'skipped': batch_size - len(edges),
+        }
+
+    # ---------- O*NET ----------
+    def import_onet_occupations(self, batch):
+        occupations = {}
+        for row in batch:
+            if not row.get('O*NET-SOC Code') or not row.get('Title'):
+                continue
+            label = row['Title']
+            description = row.get('Description', '')
+            occupations[row['O*NET-SOC Code']] = Occupation(
+                onet_code=row['O*NET-SOC Code'],
+                preferred_label=label,
+                description=description,
+                content_hash=content_hash(label, description),
+            )
+
+        self._remember('onet_occupations', occupations)
+        counts = self._sync_by_field(
+            Occupation, 'onet_code', occupations, ['preferred_label', 'description', 'updated_at']
+        )
+        if counts['inserted']:
+            self.hierarchy_changed = True
+        counts['skipped'] = len(batch) - len(occupations)
+        return counts
+
+    def import_onet_ratings(self, batch):
+        """
+        Skills.txt / Knowledge.txt: one row per (occupation, element, scale).
+        Importance (IM, 1-5) maps to importance in [0, 1]; level (LV, 0-7)
+        maps to required_proficiency_theta in [-2, 2]. Inserted, updated
+        and unchanged count occupation-skill links, not rows.
+        """
+        rows = [
+            row for row in batch
+            if row.get('Scale ID') in ('IM', 'LV') and row.get('Recommend Suppress') != 'Y'
+        ]
+
+        elements = {}
+        for row in rows:
+            uri = ONET_ELEMENT_PREFIX + row['Element ID']
+            label = row['Element Name']
+            skill_type = Skill.KNOWLEDGE if row['Element ID'].startswith('2.C') else Skill.TECHNICAL
+            elements[uri] = Skill(
+                esco_uri=uri,
+                preferred_label=label,
+                skill_type=skill_type,
+                content_hash=content_hash(label, skill_type),
+            )
+
+        self._remember('onet_ratings', (('skill', uri) for uri in elements))
+        skill_counts = self._sync_by_field(
+            Skill, 'esco_uri', elements, ['preferred_label', 'skill_type', 'updated_at']
+        )
+        if skill_counts['inserted']:
+            self.graph_changed = True
+
+        occupation_ids = self._ids(Occupation, 'onet_code', [row['O*NET-SOC Code'] for row in rows])
+        skill_ids = self._ids(Skill, 'esco_uri', elements)
+
+        scales = defaultdict(dict)
+        for row in rows:
+            occupation_id = occupation_ids.get(row['O*NET-SOC Code'])
+            skill_id = skill_ids.get(ONET_ELEMENT_PREFIX + row['Element ID'])
+            if occupation_id and skill_id:
+                value = float(row['Data Value'])
+                if row['Scale ID'] == 'IM':
+                    value = min(max((value - 1) / 4, 0.0), 1.0)
+                else:
+                    value = min(max(value / 7 * 4 - 2, -2.0), 2.0)
+                scales[occupation_id, skill_id][row['Scale ID']] = value
+
+        # IM and LV rows of one link may land in different batches, so the
+        # scale missing from this batch keeps its stored value
+        current = {
+            (occupation_id, skill_id): (importance, theta)
+            for occupation_id, skill_id, importance, theta in OccupationSkill.objects.filter(
+                occupation_id__in={key[0] for key in scales},
+                skill_id__in={key[1] for key in scales},
+            ).values_list('occupation_id', 'skill_id', 'importance', 'required_proficiency_theta')
+        }
+        defaults = (
+            OccupationSkill._meta.get_field('importance').default,
+            OccupationSkill._meta.get_field('required_proficiency_theta').default,
+        )
+        values = {}
+        for key, scale in scales.items():
+            importance, theta = current.get(key, defaults)
+            values[key] = (scale.get('IM', importance), scale.get('LV', theta))
+
+        self._remember('onet_ratings', (('link', key) for key in values))
+        counts = self._sync_links(values)
+        counts['skipped'] = len(batch) - sum(len(scale) for scale in scales.values())
+        return counts
+
+    # ---------- PRUNING ----------
+    def _family_rows(self, family):
+        """[(model, {key: pk})] for every stored row that belongs to a source."""
+        Prerequisite = Skill.prerequisites.through
+        esco_skills = Skill.objects.filter(esco_uri__isnull=False).exclude(
+            esco_uri__startswith=ONET_ELEMENT_PREFIX
+        )
+        onet_skills = Skill.objects.filter(esco_uri__startswith=ONET_ELEMENT_PREFIX)
+
+        if family == 'esco_occupations':
+            occupations = Occupation.objects.filter(esco_uri__isnull=False)
+            return [(Occupation, dict(occupations.values_list('esco_uri', 'id')))]
+
+        if family == 'esco_skills':
+            return [(Skill, dict(esco_skills.values_list('esco_uri', 'id')))]
+
+        if family == 'esco_links':
+            links = OccupationSkill.objects.filter(
+                occupation__esco_uri__isnull=False, skill__esco_uri__isnull=False
+            ).exclude(
+                skill__esco_uri__startswith=ONET_ELEMENT_PREFIX
+            ).values_list('occupation_id', 'skill_id', 'id')
+            return [(OccupationSkill, {(o, s): pk for o, s, pk in links})]
+
+        if family == 'esco_prerequisites':
+            other = set(Skill.objects.exclude(pk__in=esco_skills).values_list('id', flat=True))
+            edges = Prerequisite.objects.values_list('from_skill_id', 'to_skill_id', 'id')
+            return [(Prerequisite, {
+                (src, dst): pk for src, dst, pk in edges
+                if src not in other and dst not in other
+            })]
+
+        if family == 'onet_occupations':
+            occupations = Occupation.objects.filter(onet_code__isnull=False)
+            return [(Occupation, dict(occupations.values_list('onet_code', 'id')))]
+
+        if family == 'onet_ratings':
+            links = OccupationSkill.objects.filter(
+                occupation__onet_code__isnull=False, skill__in=onet_skills
+            ).values_list('occupation_id', 'skill_id', 'id')
+            return [
+                (OccupationSkill, {('link', (o, s)): pk for o, s, pk in links}),
+                (Skill, {('skill', uri): pk for uri, pk in onet_skills.values_list('esco_uri', 'id')}),
+            ]
+
+        raise ValueError(f'Unknown import source: {family}')
+
+    def prune_family(self, family):
+        """Delete rows of a fully imported source that the export no longer has."""
+        seen = self.seen[family]
+        deleted = 0
+
+        with transaction.atomic():
+            for model, stored in self._family_rows(family):
+                missing = [pk for key, pk in stored.items() if key not in seen]
+                for start in range(0, len(missing), self.batch_size):
+                    model.objects.filter(pk__in=missing[start:start + self.batch_size]).delete()
+                deleted += len(missing)
+
+        if deleted and family in ('esco_skills', 'esco_prerequisites', 'onet_ratings'):
+            self.graph_changed = True
+        return deleted
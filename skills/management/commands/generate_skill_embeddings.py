@@ -0,0 +1,38 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from skills.embeddings import EMBEDDING_BACKENDS, EmbeddingPipeline, get_embedder
+
+
+class Command(BaseCommand):
+    help = 'Embed skills whose SkillEmbedding is missing or stale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', choices=sorted(EMBEDDING_BACKENDS),
+                            help='Defaults to SKILL_EMBEDDING_BACKEND')
+        parser.add_argument('--skill', type=int, action='append', dest='skill_ids',
+                            help='Limit to a skill id (repeatable)')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--concurrency', type=int)
+        parser.add_argument('--force', action='store_true',
+                            help='Re-embed skills even if their embedding is current')
+
+    def handle(self, *args, **options):
+        pipeline = EmbeddingPipeline(
+            get_embedder(options['backend']),
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+        )
+        summary = pipeline.run(skill_ids=options['skill_ids'], force=options['force'])
+
+        rates = summary['batch_rates']
+        batch_report = (
+            f"; per batch {np.median(rates):.0f} skills/s median, {min(rates):.0f} slowest"
+            if rates else ''
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Embedded {summary['skills']} skills with {summary['model_name']} "
+                f"in {summary['batches']} batches ({summary['seconds']:.1f}s{batch_report})"
+            )
+        )
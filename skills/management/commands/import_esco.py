@@ -1,7 +1,102 @@
-from django.core.management.base import BaseCommand
-  
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from skills.graph import SkillGraphCache
+from skills.graph_metrics import refresh_graph_metrics
+from skills.hierarchy import rebuild_occupation_closure
+from skills.importers import ImportCheckpoint, TaxonomyImporter
+from skills.resolver import SkillLabelIndexCache
+
+
 class Command(BaseCommand):
-      help = 'Import ESCO taxonomy data'
-      
-      def handle(self, *args, **options):
-          self.stdout.write('ESCO import command created - implementation pending')
\ No newline at end of file
+    help = 'Import the ESCO (CSV or NDJSON) and O*NET (tab-separated) taxonomy exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source_dir', help='Directory holding the ESCO / O*NET export files')
+        parser.add_argument('--language', default='en', help='ESCO file language suffix')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--checkpoint',
+                            help='Checkpoint file (default: <source_dir>/.import_esco_checkpoint.json)')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip rows committed by a previous interrupted run')
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete occupations, skills and links that are no longer in '
+                                 'the export (cascades to dependent rows such as questions)')
+        parser.add_argument('--skip-graph-metrics', action='store_true',
+                            help='Do not recompute SkillGraphMetrics after the import')
+
+    def handle(self, *args, **options):
+        source_dir = Path(options['source_dir'])
+        if not source_dir.is_dir():
+            raise CommandError(f'{source_dir} is not a directory')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        checkpoint = ImportCheckpoint(
+            options['checkpoint'] or source_dir / '.import_esco_checkpoint.json'
+        )
+        if options['resume']:
+            checkpoint.load()
+        resuming = bool(checkpoint.offsets)
+
+        importer = TaxonomyImporter(
+            source_dir,
+            language=options['language'],
+            batch_size=options['batch_size'],
+            checkpoint=checkpoint,
+            progress=self.report_progress,
+            prune=options['prune'],
+        )
+
+        start = time.perf_counter()
+        stats = importer.run()
+        elapsed = time.perf_counter() - start
+
+        if not stats:
+            raise CommandError(f'No ESCO or O*NET export files found in {source_dir}')
+
+        for file_stats in stats:
+            resumed = (
+                f", resumed at row {file_stats['resumed_at']}" if file_stats['resumed_at'] else ''
+            )
+            self.stdout.write(
+                f"{file_stats['file']}: {file_stats['rows']} rows; "
+                f"{file_stats['inserted']} inserted, {file_stats['updated']} updated, "
+                f"{file_stats['unchanged']} unchanged, {file_stats['deleted']} deleted, "
+                f"{file_stats['skipped']} skipped "
+                f"({file_stats['rows_per_second']:.0f} rows/s{resumed})"
+            )
+
+        checkpoint.clear()
+        SkillLabelIndexCache.invalidate()
+
+        # bulk writes bypass the Occupation signals that maintain the closure table
+        if importer.hierarchy_changed or resuming:
+            summary = rebuild_occupation_closure(batch_size=options['batch_size'])
+            self.stdout.write(
+                f"Occupation closure: {summary['created']} created, {summary['updated']} updated, "
+                f"{summary['deleted']} deleted"
+            )
+
+        # bulk_create bypasses the Skill / prerequisite signals; a resumed run
+        # may have written skills before the interruption
+        if importer.graph_changed or resuming:
+            SkillGraphCache.invalidate()
+            if not options['skip_graph_metrics']:
+                summary = refresh_graph_metrics()
+                self.stdout.write(
+                    f"Graph metrics: {summary['created']} created, {summary['updated']} updated"
+                )
+
+        total = sum(file_stats['rows'] for file_stats in stats)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {total} rows from {len(stats)} files in {elapsed:.1f}s '
+                f'({total / max(elapsed, 1e-9):.0f} rows/s)'
+            )
+        )
+
+    def report_progress(self, name, rows, elapsed):
+        self.stdout.write(f'  {name}: {rows} rows ({rows / max(elapsed, 1e-9):.0f} rows/s)')
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from skills.hierarchy import rebuild_occupation_closure
+
+
+class Command(BaseCommand):
+    help = 'Recompute the OccupationClosure table from Occupation.parent'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        summary = rebuild_occupation_closure()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{summary['occupations']} occupations, {summary['rows']} closure rows "
+                f"({elapsed:.2f}s); {summary['created']} created, {summary['updated']} updated, "
+                f"{summary['deleted']} deleted"
+            )
+        )
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from skills.graph_metrics import refresh_graph_metrics
+
+
+class Command(BaseCommand):
+    help = 'Recompute SkillGraphMetrics from the skill prerequisite graph'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        summary = refresh_graph_metrics()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{summary['skills']} skills, {summary['edges']} prerequisite edges "
+                f"({elapsed:.2f}s); {summary['created']} rows created, "
+                f"{summary['updated']} updated"
+            )
+        )
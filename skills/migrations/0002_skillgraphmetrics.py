@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillGraphMetrics',
+            fields=[
+                ('skill', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='graph_metrics', serialize=False, to='skills.skill')),
+                ('direct_prerequisites', models.PositiveIntegerField(default=0)),
+                ('direct_dependents', models.PositiveIntegerField(default=0)),
+                ('transitive_prerequisites', models.PositiveIntegerField(default=0)),
+                ('transitive_dependents', models.PositiveIntegerField(default=0)),
+                ('depth', models.PositiveIntegerField(default=0)),
+                ('centrality', models.FloatField(default=0.0)),
+                ('criticality_factor', models.FloatField(default=1.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'skill_graph_metrics',
+            },
+        ),
+    ]
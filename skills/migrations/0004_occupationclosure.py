@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_closure(apps, schema_editor):
+    from skills.hierarchy import closure_rows
+
+    Occupation = apps.get_model('skills', 'Occupation')
+    OccupationClosure = apps.get_model('skills', 'OccupationClosure')
+    rows = closure_rows(dict(Occupation.objects.values_list('id', 'parent_id')))
+    OccupationClosure.objects.bulk_create(
+        [
+            OccupationClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth)
+            for (ancestor, descendant), depth in rows.items()
+        ],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0003_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupationClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(default=0)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='skills.occupation')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='skills.occupation')),
+            ],
+            options={
+                'db_table': 'occupation_closure',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='occupation__descend_1824d0_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,7 @@ class Occupation(models.Model):
        preferred_label = models.CharField(max_length=255)
        alternative_labels = models.JSONField(default=list, blank=True)
        description = models.TextField(blank=True)
+       content_hash = models.CharField(max_length=32, blank=True, default="")
        parent = models.ForeignKey(
            "self", null=True, blank=True, on_delete=models.CASCADE, related_name="children"
        )
@@ -44,6 +45,7 @@ class Skill(models.Model):
            "self", symmetrical=False, related_name="required_for", blank=True
        )
        embeddings = models.JSONField(default=list, blank=True)
+       content_hash = models.CharField(max_length=32, blank=True, default="")
        created_at = models.DateTimeField(auto_now_add=True)
        updated_at = models.DateTimeField(auto_now=True)
 
@@ -63,6 +65,7 @@ class OccupationSkill(models.Model):
        skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
        importance = models.FloatField(default=0.5)
        required_proficiency_theta = models.FloatField(default=0.0)
+       content_hash = models.CharField(max_length=32, blank=True, default="", db_index=True)
 
        class Meta:
            db_table = "occupation_skills"
@@ -82,4 +85,50 @@ class SkillEmbedding(models.Model):
            db_table = "skill_embeddings"
 
        def _str_(self) -> str:
-           return f"Embedding for {self.skill.preferred_label}"
\ No newline at end of file
+           return f"Embedding for {self.skill.preferred_label}"
+
+class SkillGraphMetrics(models.Model):
+       """Materialized prerequisite-graph metrics, refreshed by skills.graph_metrics."""
+
+       skill = models.OneToOneField(
+           Skill, on_delete=models.CASCADE, primary_key=True, related_name="graph_metrics"
+       )
+       direct_prerequisites = models.PositiveIntegerField(default=0)
+       direct_dependents = models.PositiveIntegerField(default=0)
+       transitive_prerequisites = models.PositiveIntegerField(default=0)
+       transitive_dependents = models.PositiveIntegerField(default=0)
+       depth = models.PositiveIntegerField(default=0)
+       centrality = models.FloatField(default=0.0)
+       criticality_factor = models.FloatField(default=1.0)
+       updated_at = models.DateTimeField(auto_now=True)
+
+       class Meta:
+           db_table = "skill_graph_metrics"
+
+       def _str_(self) -> str:
+           return f"Graph metrics for {self.skill.preferred_label}"
+
+class OccupationClosure(models.Model):
+       """
+       Transitive closure of Occupation.parent: one row per (ancestor,
+       descendant) pair, including each occupation's depth-0 link to
+       itself. Maintained by skills.hierarchy.
+       """
+
+       ancestor = models.ForeignKey(
+           Occupation, on_delete=models.CASCADE, related_name="descendant_links"
+       )
+       descendant = models.ForeignKey(
+           Occupation, on_delete=models.CASCADE, related_name="ancestor_links"
+       )
+       depth = models.PositiveIntegerField(default=0)
+
+       class Meta:
+           db_table = "occupation_closure"
+           unique_together = ["ancestor", "descendant"]
+           indexes = [
+               models.Index(fields=["descendant", "depth"]),
+           ]
+
+       def _str_(self) -> str:
+           return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
@@ -0,0 +1,207 @@
+import logging
+import re
+import threading
+import unicodedata
+import uuid
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Skill
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'skills:label_index_version'
+
+NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+# score = TRIGRAM_WEIGHT * trigram dice + (1 - TRIGRAM_WEIGHT) * token containment
+TRIGRAM_WEIGHT = 0.6
+PREFERRED_LABEL_BONUS = 0.02
+
+
+def normalize_label(label):
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    label = unicodedata.normalize('NFKD', label or '')
+    label = ''.join(ch for ch in label if not unicodedata.combining(ch)).lower()
+    return NON_ALNUM_RE.sub(' ', label).strip()
+
+
+def trigrams(normalized):
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkillLabelIndex:
+    """
+    In-memory lookup from free-text skill names (LLM output) to skills,
+    over every preferred and alternative label.
+
+    Resolution tries a normalized exact match first. Otherwise the query's
+    tokens and character trigrams pull candidate labels from inverted
+    indexes, and each candidate is scored by trigram Dice similarity and
+    the share of query tokens it contains; shared postings are counted
+    for all candidates at once with np.bincount.
+    """
+
+    def __init__(self, labels):
+        """labels: iterable of (skill_id, label, is_preferred)."""
+        self.exact = {}
+        label_skills, preferred, trigram_counts = [], [], []
+        token_postings = defaultdict(list)
+        trigram_postings = defaultdict(list)
+
+        # Preferred labels first, so they win exact-match ties
+        for skill_id, label, is_preferred in sorted(labels, key=lambda row: (not row[2], row[0])):
+            normalized = normalize_label(label)
+            if not normalized:
+                continue
+
+            position = len(label_skills)
+            label_skills.append(skill_id)
+            preferred.append(is_preferred)
+            self.exact.setdefault(normalized, skill_id)
+
+            for token in set(normalized.split()):
+                token_postings[token].append(position)
+            grams = trigrams(normalized)
+            trigram_counts.append(len(grams))
+            for gram in grams:
+                trigram_postings[gram].append(position)
+
+        self.label_skills = np.array(label_skills, dtype=np.int64)
+        self.preferred = np.array(preferred, dtype=bool)
+        self.trigram_counts = np.array(trigram_counts, dtype=np.float64)
+        self.token_postings = {k: np.array(v, dtype=np.int64) for k, v in token_postings.items()}
+        self.trigram_postings = {k: np.array(v, dtype=np.int64) for k, v in trigram_postings.items()}
+
+    @classmethod
+    def load(cls):
+        """One query over Skill ids and labels."""
+        def labels():
+            rows = Skill.objects.values_list(
+                'id', 'preferred_label', 'alternative_labels'
+            ).iterator(chunk_size=5000)
+            for skill_id, label, alternative_labels in rows:
+                yield skill_id, label, True
+                for alternative in alternative_labels or ():
+                    yield skill_id, alternative, False
+
+        return cls(list(labels()))
+
+    def __len__(self):
+        return len(self.label_skills)
+
+    def _postings(self, index, keys):
+        arrays = [index[key] for key in keys if key in index]
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+
+    def resolve(self, name, min_score=0.5):
+        """(skill_id, score) for the best label, or (None, best score)."""
+        normalized = normalize_label(name)
+        if not normalized:
+            return None, 0.0
+        if normalized in self.exact:
+            return self.exact[normalized], 1.0
+
+        n = len(self)
+        tokens = set(normalized.split())
+        grams = trigrams(normalized)
+
+        shared_tokens = np.bincount(self._postings(self.token_postings, tokens), minlength=n)
+        shared_grams = np.bincount(self._postings(self.trigram_postings, grams), minlength=n)
+        candidates = np.flatnonzero(shared_grams)
+        if not len(candidates):
+            return None, 0.0
+
+        dice = 2 * shared_grams[candidates] / (len(grams) + self.trigram_counts[candidates])
+        containment = shared_tokens[candidates] / len(tokens)
+        scores = (
+            TRIGRAM_WEIGHT * dice
+            + (1 - TRIGRAM_WEIGHT) * containment
+            + PREFERRED_LABEL_BONUS * self.preferred[candidates]
+        )
+
+        best = int(np.argmax(scores))
+        score = float(min(scores[best], 1.0))
+        if score < min_score:
+            return None, score
+        return int(self.label_skills[candidates[best]]), score
+
+    def resolve_many(self, names, min_score=0.5):
+        return [self.resolve(name, min_score) for name in names]
+
+
+class SkillLabelIndexCache:
+    """Per-process SkillLabelIndex, versioned like SkillGraphCache."""
+
+    _entry = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        version = cache.get(VERSION_KEY)
+        entry = cls._entry
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        index = SkillLabelIndex.load()
+        with cls._lock:
+            cls._entry = (version, index)
+        return index
+
+    @classmethod
+    def invalidate(cls):
+        cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        with cls._lock:
+            cls._entry = None
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entry = None
+
+
+def resolve_skills(names, min_score=None, embedder=None):
+    """
+    Map free-text skill names to Skill instances (None where nothing is
+    close enough) with one label-index pass and one Skill query.
+
+    Names the label index cannot place are embedded in a single backend
+    call and matched against the skill embedding index, when
+    SKILL_RESOLVER_EMBEDDING_FALLBACK is on and that index is not empty.
+    The fallback is off by default: it adds a provider round trip to the
+    calling request, and the first one in a worker loads the embedding
+    index (from its sidecar, or from the database if none is published).
+    """
+    from .embedding_index import EmbeddingIndexCache
+    from .embeddings import get_embedder
+
+    if min_score is None:
+        min_score = getattr(settings, 'SKILL_RESOLVER_MIN_SCORE', 0.5)
+
+    names = list(names)
+    skill_ids = [
+        skill_id for skill_id, _ in SkillLabelIndexCache.get().resolve_many(names, min_score)
+    ]
+
+    unresolved = [i for i, skill_id in enumerate(skill_ids) if skill_id is None and names[i]]
+    if unresolved and getattr(settings, 'SKILL_RESOLVER_EMBEDDING_FALLBACK', False):
+        try:
+            embedder = embedder or get_embedder()
+            index = EmbeddingIndexCache.get(embedder.model_name)
+            if len(index):
+                ids, scores = index.search(embedder.embed([names[i] for i in unresolved]), k=1)
+                threshold = getattr(settings, 'SKILL_RESOLVER_MIN_SIMILARITY', 0.75)
+                for i, skill_id, score in zip(unresolved, ids[:, 0], scores[:, 0]):
+                    if score >= threshold:
+                        skill_ids[i] = int(skill_id)
+        except Exception:
+            # The label match already ran; a failing backend only loses the fallback
+            logger.exception("Embedding fallback failed for %d skill names", len(unresolved))
+
+    skills = Skill.objects.in_bulk([skill_id for skill_id in skill_ids if skill_id is not None])
+    return [skills.get(skill_id) for skill_id in skill_ids]
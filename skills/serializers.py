@@ -0,0 +1,33 @@
+from rest_framework import serializers
+from .models import Occupation, Skill
+
+
+class SkillSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Skill
+        fields = ['id', 'esco_uri', 'preferred_label', 'alternative_labels',
+                  'description', 'skill_type']
+
+
+class OccupationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Occupation
+        fields = ['id', 'esco_uri', 'onet_code', 'preferred_label',
+                  'alternative_labels', 'description', 'parent']
+
+
+class OccupationTreeSerializer(serializers.ModelSerializer):
+    depth = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Occupation
+        fields = ['id', 'preferred_label', 'parent', 'depth']
+
+
+class SubtreeSkillSerializer(serializers.Serializer):
+    skill_id = serializers.IntegerField()
+    preferred_label = serializers.CharField(source='skill__preferred_label')
+    skill_type = serializers.CharField(source='skill__skill_type')
+    importance = serializers.FloatField()
+    required_proficiency_theta = serializers.FloatField()
+    occupations = serializers.IntegerField()
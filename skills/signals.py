@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .embedding_index import EmbeddingIndexCache
+from .graph import SkillGraphCache
+from .graph_metrics import schedule_refresh
+from .hierarchy import check_parent, insert_occupation, move_occupation
+from .models import Occupation, Skill, SkillEmbedding
+from .resolver import SkillLabelIndexCache
+
+
+def graph_changed():
+    # Invalidate first so the metrics refresh reads the new graph
+    transaction.on_commit(SkillGraphCache.invalidate)
+    schedule_refresh()
+
+
+@receiver(m2m_changed, sender=Skill.prerequisites.through)
+def refresh_graph_on_prerequisites_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        graph_changed()
+
+
+@receiver(post_save, sender=Skill)
+def refresh_graph_on_skill_create(sender, instance, created, **kwargs):
+    if created:
+        graph_changed()
+
+
+@receiver(post_delete, sender=Skill)
+def refresh_graph_on_skill_delete(sender, instance, **kwargs):
+    graph_changed()
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def invalidate_label_index(sender, instance, **kwargs):
+    transaction.on_commit(SkillLabelIndexCache.invalidate)
+
+
+@receiver(post_save, sender=SkillEmbedding)
+@receiver(post_delete, sender=SkillEmbedding)
+def invalidate_embedding_index(sender, instance, **kwargs):
+    model_name = instance.model_name
+    transaction.on_commit(lambda: EmbeddingIndexCache.invalidate(model_name))
+
+
+@receiver(pre_save, sender=Occupation)
+def remember_occupation_parent(sender, instance, **kwargs):
+    instance._stored_parent_id = None
+    if instance.pk is not None:
+        instance._stored_parent_id = sender.objects.filter(pk=instance.pk).values_list(
+            'parent_id', flat=True
+        ).first()
+        if instance.parent_id != instance._stored_parent_id:
+            check_parent(instance.pk, instance.parent_id)
+
+
+@receiver(post_save, sender=Occupation)
+def update_occupation_closure(sender, instance, created, raw=False, **kwargs):
+    # Closure rows cascade away with the occupation, so deletes need no receiver
+    if raw:
+        return
+    if created:
+        insert_occupation(instance.pk, instance.parent_id)
+    elif instance.parent_id != getattr(instance, '_stored_parent_id', instance.parent_id):
+        move_occupation(instance.pk, instance.parent_id)
@@ -0,0 +1,12 @@
+from celery import shared_task
+from django.core.cache import cache
+
+from .graph_metrics import REFRESH_PENDING_KEY, refresh_graph_metrics
+
+
+@shared_task
+def refresh_skill_graph_metrics_task():
+    """Recompute SkillGraphMetrics after prerequisite changes."""
+    # Cleared first so edits made during the refresh queue another run
+    cache.delete(REFRESH_PENDING_KEY)
+    return refresh_graph_metrics()
@@ -1,3 +1,643 @@
-from django.test import TestCase
+import csv
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from skills.embedding_index import EmbeddingIndex, EmbeddingIndexCache
+from skills.embeddings import EmbeddingPipeline, HashingEmbedder, get_embedder, skill_text
+
+from skills.graph import SkillGraph, SkillGraphCache
+from skills.graph_metrics import refresh_graph_metrics
+from skills.hierarchy import (
+    HierarchyCycleError, ancestor_occupations, closure_rows, descendant_occupations,
+    rebuild_occupation_closure, subtree_skill_requirements,
+)
+from skills.importers import TaxonomyImporter
+from skills.models import (
+    Occupation, OccupationClosure, OccupationSkill, Skill, SkillEmbedding, SkillGraphMetrics,
+)
+from skills.resolver import SkillLabelIndex, SkillLabelIndexCache, resolve_skills
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class SkillGraphTests(SimpleTestCase):
+    """
+    Skills 1..6: 3 requires 2, 2 requires 1, 4 requires 1 and 3;
+    5 and 6 require each other.
+    """
+
+    def setUp(self):
+        self.graph = SkillGraph.from_edges(
+            [1, 2, 3, 4, 5, 6], [(3, 2), (2, 1), (4, 1), (4, 3), (5, 6), (6, 5)]
+        )
+
+    def test_neighbours_and_closures(self):
+        self.assertEqual(self.graph.prerequisites(4).tolist(), [1, 3])
+        self.assertEqual(self.graph.dependents(1).tolist(), [2, 4])
+        self.assertEqual(self.graph.ancestors([4]).tolist(), [1, 2, 3])
+        self.assertEqual(self.graph.descendants([1]).tolist(), [2, 3, 4])
+        self.assertEqual(self.graph.ancestors([5]).tolist(), [5, 6])
+
+    def test_topological_order_and_cycles(self):
+        self.assertEqual(self.graph.levels.tolist(), [0, 1, 2, 3, -1, -1])
+        self.assertEqual(self.graph.topological_order().tolist(), [1, 2, 3, 4, 5, 6])
+        self.assertFalse(self.graph.is_acyclic)
+        self.assertEqual(self.graph.cycles(), [[5, 6]])
+        self.assertTrue(SkillGraph.from_edges([1, 2], [(2, 1)]).is_acyclic)
+
+    def test_order_moves_prerequisites_first(self):
+        # Input positions: skill 4, unknown, skill 2, skill 1
+        self.assertEqual(self.graph.order([4, None, 2, 1]), [1, 3, 2, 0])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GraphMetricsTests(TestCase):
+
+    def test_refresh_writes_metrics_and_only_changes(self):
+        skills = Skill.objects.bulk_create([
+            Skill(preferred_label=f'S{i}', skill_type='skill') for i in range(4)
+        ])
+        a, b, c, d = skills
+        Skill.prerequisites.through.objects.bulk_create([
+            Skill.prerequisites.through(from_skill=b, to_skill=a),
+            Skill.prerequisites.through(from_skill=c, to_skill=b),
+            Skill.prerequisites.through(from_skill=d, to_skill=a),
+        ])
+        SkillGraphCache.invalidate()
+
+        summary = refresh_graph_metrics()
+        self.assertEqual((summary['skills'], summary['edges'], summary['created']), (4, 3, 4))
+
+        metrics = {m.skill_id: m for m in SkillGraphMetrics.objects.all()}
+        self.assertEqual(metrics[a.id].transitive_dependents, 3)
+        self.assertEqual(metrics[c.id].transitive_prerequisites, 2)
+        self.assertEqual(metrics[c.id].depth, 2)
+        self.assertAlmostEqual(metrics[a.id].criticality_factor, 1.2)
+        self.assertAlmostEqual(sum(m.centrality for m in metrics.values()), 1.0)
+        self.assertEqual(
+            max(metrics.values(), key=lambda m: m.centrality).skill_id, a.id
+        )
+
+        summary = refresh_graph_metrics()
+        self.assertEqual((summary['created'], summary['updated']), (0, 0))
+
+
+class ClosureRowsTests(SimpleTestCase):
+
+    def test_rows_cover_every_ancestor_with_depth(self):
+        self.assertEqual(closure_rows({1: None, 2: 1, 3: 2, 4: 1}), {
+            (1, 1): 0, (2, 2): 0, (3, 3): 0, (4, 4): 0,
+            (1, 2): 1, (2, 3): 1, (1, 3): 2, (1, 4): 1,
+        })
+
+    def test_loop_is_cut_where_it_closes(self):
+        self.assertEqual(closure_rows({1: 2, 2: 1}), {(1, 1): 0, (2, 2): 0, (2, 1): 1})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OccupationClosureTests(TestCase):
+    """
+    root
+    |-- engineer
+    |   `-- data engineer
+    `-- analyst
+        `-- data analyst
+    """
+
+    def setUp(self):
+        self.root = Occupation.objects.create(preferred_label='Root')
+        self.engineer = Occupation.objects.create(preferred_label='Engineer', parent=self.root)
+        self.data_engineer = Occupation.objects.create(
+            preferred_label='Data Engineer', parent=self.engineer
+        )
+        self.analyst = Occupation.objects.create(preferred_label='Analyst', parent=self.root)
+        self.data_analyst = Occupation.objects.create(
+            preferred_label='Data Analyst', parent=self.analyst
+        )
+
+    def assertClosureMatchesParents(self):
+        parents = dict(Occupation.objects.values_list('id', 'parent_id'))
+        stored = {
+            (ancestor, descendant): depth
+            for ancestor, descendant, depth in OccupationClosure.objects.values_list(
+                'ancestor_id', 'descendant_id', 'depth'
+            )
+        }
+        self.assertEqual(stored, closure_rows(parents))
+
+    def test_insert_links_new_leaf_to_every_ancestor(self):
+        self.assertClosureMatchesParents()
+        self.assertEqual(
+            [(o.preferred_label, o.depth) for o in ancestor_occupations(self.data_engineer.pk)],
+            [('Engineer', 1), ('Root', 2)],
+        )
+        self.assertEqual(
+            [o.preferred_label for o in descendant_occupations(self.root.pk, include_self=False, max_depth=1)],
+            ['Analyst', 'Engineer'],
+        )
+
+    def test_move_reattaches_the_whole_subtree(self):
+        self.analyst.parent = self.engineer
+        self.analyst.save()
+
+        self.assertClosureMatchesParents()
+        self.assertEqual(
+            [(o.preferred_label, o.depth) for o in descendant_occupations(self.engineer.pk)],
+            [('Engineer', 0), ('Analyst', 1), ('Data Engineer', 1), ('Data Analyst', 2)],
+        )
+
+        self.analyst.parent = None
+        self.analyst.save()
+        self.assertClosureMatchesParents()
+        self.assertFalse(ancestor_occupations(self.data_analyst.pk).filter(pk=self.root.pk).exists())
+
+    def test_parent_inside_own_subtree_is_rejected(self):
+        self.engineer.parent = self.data_engineer
+        with self.assertRaises(HierarchyCycleError):
+            self.engineer.save()
+        self.assertClosureMatchesParents()
+
+    def test_rebuild_repairs_rows_after_bulk_writes(self):
+        # A queryset update bypasses the signals that keep the closure in step
+        Occupation.objects.filter(pk=self.analyst.pk).update(parent=self.engineer)
+        OccupationClosure.objects.filter(ancestor=self.root, descendant=self.data_engineer).update(depth=5)
+
+        # Created: engineer above analyst and data analyst. Updated: root's
+        # depth to both, and the corrupted row
+        summary = rebuild_occupation_closure(batch_size=2)
+        self.assertEqual(
+            (summary['created'], summary['updated'], summary['deleted']), (2, 3, 0)
+        )
+        self.assertClosureMatchesParents()
+        self.assertEqual(
+            rebuild_occupation_closure(), {
+                'occupations': 5, 'rows': 13, 'created': 0, 'updated': 0, 'deleted': 0,
+            }
+        )
+
+    def test_subtree_skill_requirements_take_the_highest_requirement(self):
+        sql, python = Skill.objects.bulk_create([
+            Skill(preferred_label='SQL', skill_type='skill'),
+            Skill(preferred_label='Python', skill_type='skill'),
+        ])
+        OccupationSkill.objects.bulk_create([
+            OccupationSkill(occupation=self.data_engineer, skill=sql, importance=0.5,
+                            required_proficiency_theta=1.0),
+            OccupationSkill(occupation=self.data_analyst, skill=sql, importance=1.0,
+                            required_proficiency_theta=0.5),
+            OccupationSkill(occupation=self.data_analyst, skill=python, importance=0.5,
+                            required_proficiency_theta=0.0),
+        ])
+
+        rows = list(subtree_skill_requirements(self.root.pk))
+        self.assertEqual(
+            [(r['skill__preferred_label'], r['importance'], r['required_proficiency_theta'],
+              r['occupations']) for r in rows],
+            [('SQL', 1.0, 1.0, 2), ('Python', 0.5, 0.0, 1)],
+        )
+        self.assertEqual(len(subtree_skill_requirements(self.engineer.pk)), 1)
+
+
+ESCO = 'http://data.europa.eu/esco'
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TaxonomyImporterTests(TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source_dir = Path(tmp.name)
+        self.skills = {f'{ESCO}/skill/s{i}': f'skill {i}' for i in range(4)}
+        self.occupations = {f'{ESCO}/occupation/o{i}': f'occupation {i}' for i in range(2)}
+        self.links = {
+            (f'{ESCO}/occupation/o0', f'{ESCO}/skill/s0'): 'essential',
+            (f'{ESCO}/occupation/o1', f'{ESCO}/skill/s1'): 'essential',
+            (f'{ESCO}/occupation/o0', f'{ESCO}/skill/s1'): 'optional',
+            (f'{ESCO}/occupation/o1', f'{ESCO}/skill/s2'): 'essential',
+        }
+
+    def run_import(self, **kwargs):
+        write_csv(
+            self.source_dir / 'skills_en.csv',
+            ['conceptUri', 'skillType', 'reuseLevel', 'preferredLabel', 'altLabels', 'description'],
+            [[uri, 'skill/competence', 'sector-specific', label, '', ''] for uri, label in self.skills.items()],
+        )
+        write_csv(
+            self.source_dir / 'occupations_en.csv',
+            ['conceptUri', 'preferredLabel', 'altLabels', 'description'],
+            [[uri, label, '', ''] for uri, label in self.occupations.items()],
+        )
+        write_csv(
+            self.source_dir / 'occupationSkillRelations_en.csv',
+            ['occupationUri', 'relationType', 'skillType', 'skillUri'],
+            [[occupation, relation, '', skill] for (occupation, skill), relation in self.links.items()],
+        )
+        # Two rows per batch: the second link batch's id lookup also matches
+        # (o1, s1) from the first
+        stats = TaxonomyImporter(self.source_dir, batch_size=2, **kwargs).run()
+        return {
+            file_stats['file'].split('_')[0]: tuple(
+                file_stats[key] for key in ('inserted', 'updated', 'unchanged', 'deleted')
+            )
+            for file_stats in stats
+        }
+
+    def test_first_import_inserts_everything(self):
+        self.assertEqual(self.run_import(), {
+            'occupations': (2, 0, 0, 0),
+            'skills': (4, 0, 0, 0),
+            'occupationSkillRelations': (4, 0, 0, 0),
+        })
+        self.assertEqual(Skill.objects.count(), 4)
+        self.assertEqual(
+            OccupationSkill.objects.get(
+                occupation__esco_uri=f'{ESCO}/occupation/o0', skill__esco_uri=f'{ESCO}/skill/s1'
+            ).importance,
+            0.5,
+        )
+
+    def test_reimport_counts_only_the_delta(self):
+        self.run_import()
+        self.assertEqual(self.run_import(), {
+            'occupations': (0, 0, 2, 0),
+            'skills': (0, 0, 4, 0),
+            'occupationSkillRelations': (0, 0, 4, 0),
+        })
+
+        self.skills[f'{ESCO}/skill/s3'] = 'renamed skill'
+        self.skills[f'{ESCO}/skill/s4'] = 'skill 4'
+        self.links[f'{ESCO}/occupation/o0', f'{ESCO}/skill/s1'] = 'essential'
+        self.links[f'{ESCO}/occupation/o1', f'{ESCO}/skill/s0'] = 'optional'
+        self.assertEqual(self.run_import(), {
+            'occupations': (0, 0, 2, 0),
+            'skills': (1, 1, 3, 0),
+            'occupationSkillRelations': (1, 1, 3, 0),
+        })
+        self.assertEqual(Skill.objects.get(esco_uri=f'{ESCO}/skill/s3').preferred_label, 'renamed skill')
+        self.assertEqual(OccupationSkill.objects.count(), 5)
+
+    def test_unchanged_rows_keep_updated_at(self):
+        self.run_import()
+        before = dict(Skill.objects.values_list('esco_uri', 'updated_at'))
+        self.skills[f'{ESCO}/skill/s0'] = 'renamed skill'
+        self.run_import()
+        after = dict(Skill.objects.values_list('esco_uri', 'updated_at'))
+
+        self.assertNotEqual(before.pop(f'{ESCO}/skill/s0'), after.pop(f'{ESCO}/skill/s0'))
+        self.assertEqual(before, after)
+
+    def test_prune_deletes_rows_missing_from_the_export(self):
+        self.run_import()
+        del self.links[f'{ESCO}/occupation/o1', f'{ESCO}/skill/s2']
+
+        self.assertEqual(self.run_import()['occupationSkillRelations'], (0, 0, 3, 0))
+        self.assertEqual(OccupationSkill.objects.count(), 4)
+        self.assertEqual(self.run_import(prune=True)['occupationSkillRelations'], (0, 0, 3, 1))
+        self.assertEqual(OccupationSkill.objects.count(), 3)
+
+
+class EmbeddingIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.ids = np.arange(10, 60)
+        self.vectors = rng.normal(size=(50, 8))
+        self.index = EmbeddingIndex(self.ids, self.vectors, model_name='test', dim=8)
+
+    def brute_force(self, query, k, exclude=()):
+        unit = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        scores = unit @ (query / np.linalg.norm(query))
+        order = [i for i in np.argsort(-scores) if self.ids[i] not in exclude]
+        return self.ids[order[:k]].tolist(), scores[order[:k]]
+
+    def test_search_matches_brute_force(self):
+        queries = np.random.default_rng(8).normal(size=(5, 8))
+        ids, scores = self.index.search(queries, k=4, batch_size=2)
+
+        self.assertEqual(ids.shape, (5, 4))
+        for query, row_ids, row_scores in zip(queries, ids, scores):
+            expected_ids, expected_scores = self.brute_force(query, 4)
+            self.assertEqual(row_ids.tolist(), expected_ids)
+            np.testing.assert_allclose(row_scores, expected_scores, rtol=1e-5)
+
+    def test_search_excludes_ids_and_caps_k(self):
+        query = self.vectors[0]
+        ids, _ = self.index.search(query, k=3, exclude_ids=[10, 999])
+        self.assertEqual(ids[0].tolist(), self.brute_force(query, 3, exclude={10})[0])
+        self.assertNotIn(10, ids[0].tolist())
+
+        ids, scores = self.index.search(query, k=500)
+        self.assertEqual(ids.shape, (1, 50))
+
+        empty = EmbeddingIndex([], None, dim=8)
+        ids, scores = empty.search(query, k=3)
+        self.assertEqual((ids.shape, scores.shape), ((1, 0), (1, 0)))
+
+    def test_add_inserts_and_replaces(self):
+        self.index.add([10, 100], [[1, 0, 0, 0, 0, 0, 0, 0], [0, 2, 0, 0, 0, 0, 0, 0]])
+
+        self.assertEqual(len(self.index), 51)
+        self.assertIn(100, self.index)
+        np.testing.assert_allclose(self.index.vector(100), [0, 1, 0, 0, 0, 0, 0, 0])
+        ids, scores = self.index.search([[1, 0, 0, 0, 0, 0, 0, 0]], k=1)
+        self.assertEqual((ids[0, 0], round(float(scores[0, 0]), 5)), (10, 1.0))
+
+        with self.assertRaises(ValueError):
+            self.index.add([101], [[1, 2, 3]])
+
+    def test_empty_index_learns_dimension_on_add(self):
+        index = EmbeddingIndex([], None)
+        index.add([1, 2], [[3, 4], [0, 1]])
+
+        self.assertEqual((index.dim, len(index)), (2, 2))
+        np.testing.assert_allclose(index.vector(1), [0.6, 0.8])
+
+    def test_remove_moves_last_row_into_the_gap(self):
+        last = self.index.vector(59)
+        self.index.remove([10, 12345])
+
+        self.assertEqual(len(self.index), 49)
+        self.assertNotIn(10, self.index)
+        self.assertEqual(self.index.ids[0], 59)
+        np.testing.assert_allclose(self.index.vector(59), last)
+        ids, _ = self.index.search(self.vectors[0], k=49)
+        self.assertNotIn(10, ids[0].tolist())
+
+    def test_save_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.index.save(tmp)
+            loaded = EmbeddingIndex.load(tmp)
+
+            self.assertIsInstance(loaded.matrix, np.memmap)
+            self.assertEqual((loaded.model_name, loaded.dim), ('test', 8))
+            self.assertEqual(loaded.ids.tolist(), self.ids.tolist())
+            np.testing.assert_array_equal(loaded.matrix, self.index.matrix)
+
+            # The first add copies the mapped matrix into memory
+            loaded.add([100], [np.ones(8)])
+            self.assertNotIsInstance(loaded.matrix, np.memmap)
+            self.assertEqual(len(loaded), 51)
+            self.assertEqual(len(EmbeddingIndex.load(tmp)), 50)
+
+    def test_load_rejects_incomplete_sidecar(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.index.save(tmp)
+            np.save(Path(tmp) / 'ids.npy', self.ids[:10])
+            with self.assertRaises(ValueError):
+                EmbeddingIndex.load(tmp)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EmbeddingIndexCacheTests(TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name) / 'test'
+        settings = self.settings(SKILL_EMBEDDING_INDEX_DIR=tmp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        cache.clear()
+        EmbeddingIndexCache.clear()
+        self.addCleanup(EmbeddingIndexCache.clear)
+
+        skills = Skill.objects.bulk_create([
+            Skill(preferred_label=f'S{i}', skill_type='skill') for i in range(3)
+        ])
+        SkillEmbedding.objects.bulk_create([
+            SkillEmbedding(skill=skill, vector=[float(i), 1.0], model_name='test')
+            for i, skill in enumerate(skills)
+        ] + [SkillEmbedding(skill=Skill.objects.create(preferred_label='X', skill_type='skill'),
+                            vector=[1.0, 2.0, 3.0], model_name='other')])
+        self.skills = skills
+
+    def published(self):
+        return sorted(p.name for p in self.root.iterdir() if not p.name.startswith('.'))
+
+    def test_builds_from_database_and_publishes_sidecar(self):
+        index = EmbeddingIndexCache.get('test')
+        self.assertEqual(sorted(index.ids.tolist()), [s.id for s in self.skills])
+        self.assertEqual(len(self.published()), 1)
+
+        with self.assertNumQueries(0):
+            self.assertIs(EmbeddingIndexCache.get('test'), index)
+
+        # Another worker maps the published sidecar without touching the database
+        EmbeddingIndexCache.clear()
+        with self.assertNumQueries(0):
+            loaded = EmbeddingIndexCache.get('test')
+        self.assertIsInstance(loaded.matrix, np.memmap)
+        self.assertEqual(loaded.ids.tolist(), index.ids.tolist())
+
+    def test_invalidate_reloads_and_prunes_older_versions(self):
+        first = EmbeddingIndexCache.get('test')
+        old_version = self.published()[0]
+
+        SkillEmbedding.objects.filter(skill=self.skills[0]).delete()
+        EmbeddingIndexCache.invalidate('test')
+        second = EmbeddingIndexCache.get('test')
+
+        self.assertIsNot(second, first)
+        self.assertNotIn(self.skills[0].id, second)
+        self.assertNotIn(old_version, self.published())
+        self.assertEqual(len(self.published()), 1)
+
+    def test_late_publish_keeps_newer_versions(self):
+        index = EmbeddingIndexCache.get('test')
+        newer = self.published()[0]
+        older = f'{int(newer.split("-")[0]) - 1:020d}-stale'
+
+        EmbeddingIndexCache._publish(index, self.root, older)
+        self.assertEqual(self.published(), [older, newer])
+
+    def test_unreadable_sidecar_falls_back_to_database(self):
+        EmbeddingIndexCache.get('test')
+        EmbeddingIndexCache.clear()
+
+        with mock.patch.object(EmbeddingIndex, 'load', side_effect=FileNotFoundError), \
+                self.assertLogs('skills.embedding_index', 'WARNING'):
+            index = EmbeddingIndexCache.get('test')
+        self.assertEqual(len(index), 3)
+
+
+class HashingEmbedderTests(SimpleTestCase):
+
+    def test_vectors_are_deterministic_unit_rows(self):
+        texts = ['Python programming', 'python programmer', 'Welding']
+        vectors = HashingEmbedder(dim=64).embed(texts)
+
+        self.assertEqual((vectors.shape, vectors.dtype), ((3, 64), np.float32))
+        np.testing.assert_array_equal(vectors, HashingEmbedder(dim=64).embed(texts))
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+        # Shared words and trigrams land closer than unrelated text
+        self.assertGreater(vectors[0] @ vectors[1], vectors[0] @ vectors[2])
+
+    def test_model_name_carries_dimension(self):
+        self.assertEqual(HashingEmbedder(dim=32).model_name, 'hashing-v1-32')
+        self.assertIsInstance(get_embedder('hashing'), HashingEmbedder)
+        with self.assertRaises(ValueError):
+            get_embedder('missing')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EmbeddingPipelineTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.embedder = HashingEmbedder(dim=16)
+        self.pipeline = EmbeddingPipeline(self.embedder, batch_size=2, concurrency=2)
+        self.skills = Skill.objects.bulk_create([
+            Skill(preferred_label=f'Skill {i}', skill_type='skill', description=f'Does thing {i}')
+            for i in range(5)
+        ])
+
+    def embed(self, skill, model_name=None):
+        return SkillEmbedding.objects.create(
+            skill=skill, vector=[0.0] * 16, model_name=model_name or self.embedder.model_name
+        )
+
+    def test_stale_skills_selection(self):
+        fresh, other_model, outdated, *missing = self.skills
+        self.embed(fresh)
+        self.embed(other_model, model_name='hashing-v1-8')
+        embedding = self.embed(outdated)
+        Skill.objects.filter(pk=outdated.pk).update(
+            updated_at=embedding.created_at + timedelta(seconds=1)
+        )
+
+        stale = set(self.pipeline.stale_skills().values_list('id', flat=True))
+        self.assertEqual(stale, {other_model.id, outdated.id} | {s.id for s in missing})
+        self.assertEqual(
+            list(self.pipeline.stale_skills(skill_ids=[fresh.id, outdated.id]).values_list('id', flat=True)),
+            [outdated.id],
+        )
+        self.assertEqual(self.pipeline.stale_skills(force=True).count(), 5)
+
+    def test_write_is_bulk(self):
+        self.embed(self.skills[0], model_name='old')
+        ids = [s.id for s in self.skills]
+
+        with CaptureQueriesContext(connection) as small:
+            self.pipeline._write(ids[:2], self.embedder.embed(['a', 'b']))
+        with CaptureQueriesContext(connection) as large:
+            self.pipeline._write(ids, self.embedder.embed(['a'] * 5))
+
+        # One read plus one insert and one update, whatever the batch size
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(SkillEmbedding.objects.count(), 5)
+        self.assertEqual(
+            set(SkillEmbedding.objects.values_list('model_name', flat=True)), {self.embedder.model_name}
+        )
+
+    def test_run_embeds_stale_skills_and_summarizes(self):
+        self.embed(self.skills[0])
+
+        with mock.patch.object(EmbeddingIndexCache, 'invalidate') as invalidate:
+            summary = self.pipeline.run()
+        self.assertEqual((summary['skills'], summary['batches']), (4, 2))
+        self.assertEqual(len(summary['batch_rates']), 2)
+        self.assertEqual(summary['model_name'], self.embedder.model_name)
+        invalidate.assert_called_once_with(self.embedder.model_name)
+
+        embedding = SkillEmbedding.objects.get(skill=self.skills[3])
+        expected = self.embedder.embed(['Skill 3. Does thing 3'])[0]
+        np.testing.assert_allclose(embedding.vector, expected, rtol=1e-6)
+
+        with mock.patch.object(EmbeddingIndexCache, 'invalidate') as invalidate:
+            summary = self.pipeline.run()
+        self.assertEqual((summary['skills'], summary['batches']), (0, 0))
+        invalidate.assert_not_called()
+
+
+class SkillLabelIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = SkillLabelIndex([
+            (1, 'Python programming', True),
+            (1, 'Python', False),
+            (2, 'Welding', True),
+            (3, 'Project management', True),
+            (4, 'Python', True),
+        ])
+
+    def test_exact_match_prefers_preferred_labels(self):
+        self.assertEqual(self.index.resolve('  PYTHON programming! '), (1, 1.0))
+        self.assertEqual(self.index.resolve('python'), (4, 1.0))
+        self.assertEqual(self.index.resolve('Wélding'), (2, 1.0))
+
+    def test_alias_match(self):
+        index = SkillLabelIndex([(1, 'Python programming', True), (1, 'Py', False)])
+        self.assertEqual(index.resolve('py'), (1, 1.0))
+
+    def test_fuzzy_match_and_cutoff(self):
+        skill_id, score = self.index.resolve('project managment')
+        self.assertEqual(skill_id, 3)
+        self.assertTrue(0.5 <= score < 1.0)
+
+        self.assertEqual(self.index.resolve('project managment', min_score=0.99), (None, score))
+        self.assertEqual(self.index.resolve('xyz qqq')[0], None)
+        self.assertEqual(self.index.resolve(''), (None, 0.0))
+        self.assertEqual(
+            [skill_id for skill_id, _ in self.index.resolve_many(['welding', 'welding work'])], [2, 2]
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResolveSkillsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        SkillLabelIndexCache.clear()
+        EmbeddingIndexCache.clear()
+        self.addCleanup(SkillLabelIndexCache.clear)
+        self.addCleanup(EmbeddingIndexCache.clear)
+
+        self.embedder = HashingEmbedder(dim=64)
+        self.python, self.welding = Skill.objects.bulk_create([
+            Skill(preferred_label='Python programming', alternative_labels=['Python'],
+                  skill_type='skill', description='Writing software in Python'),
+            Skill(preferred_label='Welding', skill_type='skill', description='Joining metal'),
+        ])
+        texts = [skill_text(s.preferred_label, s.alternative_labels, s.description)
+                 for s in (self.python, self.welding)]
+        SkillEmbedding.objects.bulk_create([
+            SkillEmbedding(skill=skill, vector=vector, model_name=self.embedder.model_name)
+            for skill, vector in zip((self.python, self.welding), self.embedder.embed(texts).tolist())
+        ])
+
+    def test_label_matches_in_one_pass(self):
+        names = ['python', 'python programing', 'WELDING', 'Astronomy', '']
+        # Label index load plus one in_bulk; the fallback is off by default
+        with self.assertNumQueries(2):
+            skills = resolve_skills(names)
+        self.assertEqual(skills, [self.python, self.python, self.welding, None, None])
+
+    @override_settings(SKILL_EMBEDDING_INDEX_DIR=None, SKILL_RESOLVER_MIN_SIMILARITY=0.3)
+    def test_embedding_fallback(self):
+        names = ['software writing in python']
+        self.assertEqual(resolve_skills(names, min_score=0.99, embedder=self.embedder), [None])
+
+        with self.settings(SKILL_RESOLVER_EMBEDDING_FALLBACK=True):
+            self.assertEqual(
+                resolve_skills(names, min_score=0.99, embedder=self.embedder), [self.python]
+            )
+            with self.settings(SKILL_RESOLVER_MIN_SIMILARITY=0.99):
+                self.assertEqual(resolve_skills(names, min_score=0.99, embedder=self.embedder), [None])
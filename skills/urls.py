@@ -1,6 +1,9 @@
-from django.urls import path
-from . import views
+from rest_framework.routers import DefaultRouter
+from .views import OccupationViewSet, SkillViewSet
 
-urlpatterns=[
-    
-]
\ No newline at end of file
+
+router = DefaultRouter()
+router.register(r"occupations", OccupationViewSet)
+router.register(r"skills", SkillViewSet)
+
+urlpatterns = router.urls
@@ -1,9 +1,63 @@
-from django.shortcuts import render
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .hierarchy import ancestor_occupations, descendant_occupations, subtree_skill_requirements
+from .models import Occupation, Skill
+from .serializers import (
+    OccupationSerializer,
+    OccupationTreeSerializer,
+    SkillSerializer,
+    SubtreeSkillSerializer,
+)
+
+
+def _flag(request, name, default):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
 
 class OccupationViewSet(viewsets.ReadOnlyModelViewSet):
       queryset = Occupation.objects.all()
       serializer_class = OccupationSerializer
-      
+
+      @action(detail=True, methods=['get'])
+      def descendants(self, request, pk=None):
+          """Occupations below this one (?include_self, ?max_depth)."""
+          occupation = self.get_object()
+          max_depth = request.query_params.get('max_depth')
+          if max_depth is not None and not max_depth.isdigit():
+              return Response(
+                  {'error': 'max_depth must be a non-negative integer'},
+                  status=status.HTTP_400_BAD_REQUEST
+              )
+
+          occupations = descendant_occupations(
+              occupation.pk,
+              include_self=_flag(request, 'include_self', False),
+              max_depth=int(max_depth) if max_depth is not None else None,
+          )
+          return Response(OccupationTreeSerializer(occupations, many=True).data)
+
+      @action(detail=True, methods=['get'])
+      def ancestors(self, request, pk=None):
+          """Path from this occupation up to its root, nearest first."""
+          occupation = self.get_object()
+          occupations = ancestor_occupations(occupation.pk)
+          return Response(OccupationTreeSerializer(occupations, many=True).data)
+
+      @action(detail=True, methods=['get'])
+      def subtree_skills(self, request, pk=None):
+          """Union of the skills required across this occupation's subtree."""
+          occupation = self.get_object()
+          skills = subtree_skill_requirements(
+              occupation.pk, include_self=_flag(request, 'include_self', True)
+          )
+          return Response(SubtreeSkillSerializer(skills, many=True).data)
+
+
 class SkillViewSet(viewsets.ReadOnlyModelViewSet):
       queryset = Skill.objects.all()
-      serializer_class = SkillSerializer
\ No newline at end of file
+      serializer_class = SkillSerializer
@@ -6,6 +6,16 @@ def send_welcome_email(user_id):
       return f"Email sent to user {user_id}"
 
 @shared_task
-def generate_skill_embeddings(skill_id):
-      print(f"Generating embeddings for skill {skill_id}")
-      return f"Embeddings generated for skill {skill_id}"
\ No newline at end of file
+def generate_skill_embeddings(skill_id=None, backend=None, force=False):
+      """
+      Embed one skill, or every skill whose embedding is missing or stale
+      when skill_id is None.
+      """
+      from skills.embeddings import EmbeddingPipeline, get_embedder
+
+      pipeline = EmbeddingPipeline(get_embedder(backend))
+      summary = pipeline.run(
+          skill_ids=None if skill_id is None else [skill_id], force=force
+      )
+      summary.pop('batch_rates')
+      return summary